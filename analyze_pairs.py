@@ -3,7 +3,11 @@ import json
 import requests
 import argparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from budget import Budget
+from build_files import classify_build_files
+from catalog import HEURISTIC, PipelineCatalog
 
 def load_env():
     """Simple .env loader."""
@@ -19,8 +23,10 @@ def load_env():
                     os.environ[key.strip()] = value.strip()
 
 class PairAnalyzer:
-    def __init__(self, token: str, repo_owner: str, repo_name: str):
+    def __init__(self, token: str, repo_owner: str, repo_name: str, budget: Optional[Budget] = None):
         self.token = token
+        # Run budget (budget.py): defaults to the ledger of the calling pipeline run
+        self.budget = budget if budget is not None else Budget.from_env()
         self.owner = repo_owner
         self.name = repo_name
         self.headers = {
@@ -30,52 +36,93 @@ class PairAnalyzer:
         self.api_url = "https://api.github.com"
 
     def get_changed_files(self, commit_sha: str) -> List[str]:
-        """Fetches list of changed files for a commit using REST API."""
+        """
+        Fetches list of changed files for a commit using REST API.
+
+        Raises requests.RequestException when the commit cannot be fetched
+        (e.g. a 403 rate limit), so the pair is not classified without files.
+        """
         url = f"{self.api_url}/repos/{self.owner}/{self.name}/commits/{commit_sha}"
-        try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                return [f['filename'] for f in data.get('files', [])]
-            else:
-                print(f"Failed to fetch commit {commit_sha}: {response.status_code}")
-                return []
-        except Exception as e:
-            print(f"Error fetching commit {commit_sha}: {e}")
-            return []
+        response = requests.get(url, headers=self.headers, timeout=10)
+        if self.budget is not None:
+            self.budget.charge("rest_calls")
+        response.raise_for_status()
+        return [f['filename'] for f in response.json().get('files', [])]
 
     def classify_pair(self, pair: Dict[str, Any]) -> Dict[str, Any]:
-        """Classifies a pair based on changed files."""
+        """Classifies a pair based on changed files (raises if they cannot be fetched)."""
         good_commit = pair["good_commit"]
         files = self.get_changed_files(good_commit)
         
-        is_dependency_update = False
-        for f in files:
-            if "libs.versions.toml" in f or f.endswith("build.gradle") or f.endswith("build.gradle.kts"):
-                is_dependency_update = True
-                break
+        is_dependency_update = bool(classify_build_files(files))
         
         pair["files_changed"] = files
         pair["category"] = "Dependency Update" if is_dependency_update else "Other"
         return pair
 
-    def analyze(self, input_file: str, output_file: str):
-        with open(input_file, 'r') as f:
-            pairs = json.load(f)
+    def analyze(self, input_file: str, output_file: str, catalog=None):
+        """
+        Classifies all pairs from the input file.
+
+        With a PipelineCatalog, pairs are read from the catalog instead (only
+        those without a heuristic verdict yet) and each result is written back
+        to it as soon as it is ready. Without one, pairs already in the output
+        file are kept and not classified again.
+
+        Once the run budget is exhausted, the remaining pairs are left for the
+        next run, like pairs whose changed files could not be fetched.
+        """
+        repo = f"{self.owner}/{self.name}"
+        if catalog is not None:
+            pairs = list(catalog.iter_pairs(repo, missing_verdict=HEURISTIC))
+        else:
+            with open(input_file, 'r') as f:
+                pairs = json.load(f)
             
-        print(f"Analyzing {len(pairs)} pairs...")
-        
         analyzed_pairs = []
+        if catalog is None and os.path.exists(output_file):
+            try:
+                with open(output_file, 'r') as f:
+                    analyzed_pairs = json.load(f)
+            except Exception:
+                print("Warning: Could not load existing results, starting fresh.")
+            analyzed = {p["good_commit"] for p in analyzed_pairs}
+            pairs = [p for p in pairs if p["good_commit"] not in analyzed]
+            
+        print(f"Analyzing {len(pairs)} pairs...")
+
+        def classify(pair):
+            # Checkpoint: pairs not started once the budget is used up wait for the next run
+            if self.budget is not None and self.budget.exhausted():
+                return None
+            return self.classify_pair(pair)
+
+        skipped = failed = 0
         with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_pair = {executor.submit(self.classify_pair, pair): pair for pair in pairs}
+            future_to_pair = {executor.submit(classify, pair): pair for pair in pairs}
             
             for future in as_completed(future_to_pair):
                 try:
                     result = future.result()
+                    if result is None:
+                        skipped += 1
+                        continue
                     analyzed_pairs.append(result)
+                    if catalog is not None:
+                        catalog.record_files(repo, result, result["files_changed"], result["category"])
                     print(f"Analyzed {result['good_commit'][:7]} -> {result['category']}")
                 except Exception as e:
-                    print(f"Analysis failed for a pair: {e}")
+                    failed += 1
+                    print(f"Analysis failed for {future_to_pair[future]['good_commit'][:7]}: {e}")
+
+        if failed:
+            print(f"{failed} pairs failed; left for the next run.")
+        if skipped:
+            print(f"Stopping: {self.budget.exhausted()} budget exhausted; {skipped} pairs left for the next run.")
+
+        if catalog is not None:
+            print(f"Saved analyzed results to catalog {catalog.path}")
+            return
                     
         with open(output_file, 'w') as f:
             json.dump(analyzed_pairs, f, indent=2)
@@ -87,6 +134,7 @@ def main():
     parser.add_argument("repo", help="owner/name")
     parser.add_argument("--input", default="mining_results.json")
     parser.add_argument("--output", default="analyzed_results.json")
+    parser.add_argument("--catalog", help="Pipeline catalog (SQLite) to read/write instead of --input/--output")
     
     args = parser.parse_args()
     
@@ -97,7 +145,8 @@ def main():
         
     owner, name = args.repo.split("/", 1)
     analyzer = PairAnalyzer(token, owner, name)
-    analyzer.analyze(args.input, args.output)
+    catalog = PipelineCatalog(args.catalog) if args.catalog else None
+    analyzer.analyze(args.input, args.output, catalog=catalog)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,166 @@
+"""
+Run budgets shared by all pipeline stages.
+
+A budget ledger is a small JSON file with limits and running totals for:
+
+- graphql_points: GitHub GraphQL rate limit points (one per query; the
+  mining queries stay within GitHub's minimum cost of one point)
+- rest_calls: GitHub REST requests
+- llm_tokens: prompt + completion tokens of LLM calls
+- seconds: wall time since the ledger was created
+
+run_pipeline.py (or test_generator.py) creates the ledger from its --max-*
+flags and passes its path to the stages it starts through the
+PIPELINE_BUDGET environment variable. Every stage charges what it consumes
+as it goes, under an exclusive file lock, so parallel processes share one
+budget. At each checkpoint (a saved batch of PRs, an analyzed pair, a
+generated sample) the stage asks whether the budget is exhausted and, if so,
+stops there; the next run resumes from that checkpoint like after any
+interruption. A call in flight when the budget runs out still completes, so
+totals can overshoot by one batch.
+
+    python budget.py --ledger budget_ledger.json   # show consumption
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+BUDGET_ENV = "PIPELINE_BUDGET"
+RESOURCES = ("graphql_points", "rest_calls", "llm_tokens", "seconds")
+
+
+class BudgetExhausted(Exception):
+    """Raised at a checkpoint once a resource of the run budget is used up."""
+
+    def __init__(self, resource: str):
+        super().__init__(f"{resource} budget exhausted")
+        self.resource = resource
+
+
+class Budget:
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def create(cls, path: str, limits: Dict[str, Optional[float]]) -> "Budget":
+        """Starts a new ledger (totals at zero, wall clock now); None means unlimited."""
+        budget = cls(path)
+        with budget._locked():
+            budget._write({
+                "limits": {resource: limits.get(resource) for resource in RESOURCES},
+                "used": {resource: 0 for resource in RESOURCES if resource != "seconds"},
+                "started_at": time.time(),
+            })
+        return budget
+
+    @classmethod
+    def from_env(cls) -> Optional["Budget"]:
+        """The ledger of the current run, if one was set up by the caller."""
+        path = os.environ.get(BUDGET_ENV)
+        return cls(path) if path and os.path.exists(path) else None
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Any]:
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def _write(self, ledger: Dict[str, Any]) -> None:
+        tmp = f"{self.path}.tmp-{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(ledger, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def charge(self, resource: str, amount: float = 1) -> None:
+        """Adds consumption of one resource."""
+        if not amount:
+            return
+        with self._locked():
+            ledger = self._read()
+            ledger["used"][resource] = ledger["used"].get(resource, 0) + amount
+            self._write(ledger)
+
+    def usage(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """{resource: {"used": ..., "limit": ...}}, wall time included."""
+        with self._locked():
+            ledger = self._read()
+        used = dict(ledger["used"], seconds=time.time() - ledger["started_at"])
+        return {resource: {"used": used.get(resource, 0), "limit": ledger["limits"].get(resource)}
+                for resource in RESOURCES}
+
+    def exhausted(self) -> Optional[str]:
+        """Name of the first resource whose limit is reached, or None."""
+        for resource, entry in self.usage().items():
+            if entry["limit"] is not None and entry["used"] >= entry["limit"]:
+                return resource
+        return None
+
+    def check(self) -> None:
+        """Raises BudgetExhausted if any limit is reached."""
+        resource = self.exhausted()
+        if resource:
+            raise BudgetExhausted(resource)
+
+    def summary(self) -> str:
+        parts = []
+        for resource, entry in self.usage().items():
+            limit = f"/{entry['limit']:g}" if entry["limit"] is not None else ""
+            parts.append(f"{resource} {entry['used']:.0f}{limit}")
+        return ", ".join(parts)
+
+
+def add_budget_arguments(parser: argparse.ArgumentParser) -> None:
+    """The --max-* flags shared by run_pipeline.py and test_generator.py."""
+    parser.add_argument("--max-graphql-points", type=float, default=None, help="Stop after this many GraphQL points")
+    parser.add_argument("--max-rest-calls", type=float, default=None, help="Stop after this many GitHub REST calls")
+    parser.add_argument("--max-llm-tokens", type=float, default=None, help="Stop after this many LLM tokens")
+    parser.add_argument("--max-hours", type=float, default=None, help="Stop after this much wall time")
+    parser.add_argument("--budget-ledger", default="budget_ledger.json",
+                        help="Ledger file shared by the stages of this run (with any --max-* flag)")
+
+
+def budget_from_args(args: argparse.Namespace) -> Optional[Budget]:
+    """
+    Creates the run's ledger from the --max-* flags and exports it to child
+    processes; without flags, joins a ledger inherited from a parent run.
+    """
+    limits = {
+        "graphql_points": args.max_graphql_points,
+        "rest_calls": args.max_rest_calls,
+        "llm_tokens": args.max_llm_tokens,
+        "seconds": args.max_hours * 3600 if args.max_hours is not None else None,
+    }
+    if all(limit is None for limit in limits.values()):
+        return Budget.from_env()
+    budget = Budget.create(args.budget_ledger, limits)
+    os.environ[BUDGET_ENV] = os.path.abspath(args.budget_ledger)
+    return budget
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the consumption of a run budget ledger")
+    parser.add_argument("--ledger", default="budget_ledger.json", help="Ledger file")
+    args = parser.parse_args()
+    if not os.path.exists(args.ledger):
+        print(f"Error: Ledger not found: {args.ledger}")
+        return
+    budget = Budget(args.ledger)
+    print(budget.summary())
+    resource = budget.exhausted()
+    if resource:
+        print(f"Exhausted: {resource}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Shared build-file matcher.
+
+Every stage that needs to know "is this path a Gradle build file?" goes through
+this module, so the heuristic classifier, the SWE-bench miner and the POC
+extractor all agree on what counts as a build script change.
+
+The rules live in one declarative table (BUILD_FILE_RULES). They are compiled
+into a single regex with one named group per rule, so a path is classified in
+one pass and the name of the matching rule comes back via ``match.lastgroup``.
+All rules are suffix rules, so the regex is built over the *reversed* suffixes
+and anchored at the start of the reversed, lowercased path: a path that is not
+a build file is usually rejected after looking at its last few characters.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+# (rule name, file name suffixes, directory markers that must also appear in
+# the path). Suffixes and markers are matched case-insensitively. The first
+# rule that matches wins.
+BUILD_FILE_RULES = [
+    ("build_script", ("build.gradle", "build.gradle.kts"), ()),
+    ("settings_script", ("settings.gradle", "settings.gradle.kts"), ()),
+    ("version_catalog", ("libs.versions.toml",), ()),
+    ("wrapper_properties", ("gradle-wrapper.properties",), ()),
+    ("gradle_properties", ("gradle.properties",), ()),
+    ("build_logic", (".kt", ".kts", ".gradle"), ("build-logic", "buildsrc")),
+]
+
+
+def _reversed_alternation(literals) -> str:
+    return "(?:" + "|".join(re.escape(s.lower()[::-1]) for s in literals) + ")"
+
+
+def _compile_rules(rules) -> "re.Pattern[str]":
+    groups = []
+    for name, suffixes, markers in rules:
+        pattern = _reversed_alternation(suffixes)
+        if markers:
+            pattern += ".*" + _reversed_alternation(markers)
+        groups.append(f"(?P<{name}>{pattern})")
+    return re.compile("|".join(groups), re.DOTALL)
+
+
+_BUILD_FILE_RE = _compile_rules(BUILD_FILE_RULES)
+
+
+def match_build_file(path: str) -> Optional[str]:
+    """Returns the name of the rule that matches `path`, or None."""
+    if not path:
+        return None
+    m = _BUILD_FILE_RE.match(path.lower()[::-1])
+    return m.lastgroup if m else None
+
+
+def is_build_file(path: str) -> bool:
+    """Checks if a path is a Gradle build file."""
+    return match_build_file(path) is not None
+
+
+def classify_build_files(paths: Iterable[str]) -> Dict[str, str]:
+    """
+    Classifies a list of paths in bulk.
+
+    Returns a dict mapping each matching path to the name of its rule, in
+    input order. Paths that are not build files are left out.
+    """
+    match = _BUILD_FILE_RE.match
+    matched = {}
+    for path in paths:
+        if path:
+            m = match(path.lower()[::-1])
+            if m:
+                matched[path] = m.lastgroup
+    return matched
+
+
+def filter_build_files(paths: Iterable[str]) -> List[str]:
+    """Returns the build files from `paths`, preserving input order."""
+    return [p for p in paths if is_build_file(p)]
@@ -0,0 +1,505 @@
+"""
+SQLite-backed pipeline catalog.
+
+A single embedded database (stdlib sqlite3, WAL mode) that every stage of the
+pipeline can read from and write to instead of re-parsing and rewriting whole
+JSON arrays:
+
+- repos:                 one row per repository, with the mining cursor
+- prs:                   merged PRs per repository
+- pairs:                 Bad -> Good commit pairs per PR
+- pair_files:            files changed by the good commit, with build-file rule
+- verdicts:              heuristic and AI classifications per pair
+- samples:               generated/verified SWE-bench-like samples
+- swe_bench_instances:   SWE-bench format entries from mine_gradle_prs.py
+
+Writes go through short IMMEDIATE transactions so several processes can share
+one catalog file. The JSON files of the old pipeline can still be produced
+with `python catalog.py export` and loaded with `python catalog.py import`.
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from build_files import match_build_file
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    id INTEGER PRIMARY KEY,
+    full_name TEXT NOT NULL UNIQUE,
+    mining_cursor TEXT,
+    swe_bench_mined_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS prs (
+    id INTEGER PRIMARY KEY,
+    repo_id INTEGER NOT NULL REFERENCES repos(id),
+    number INTEGER NOT NULL,
+    url TEXT,
+    UNIQUE (repo_id, number)
+);
+
+CREATE TABLE IF NOT EXISTS pairs (
+    id INTEGER PRIMARY KEY,
+    pr_id INTEGER NOT NULL REFERENCES prs(id),
+    bad_commit TEXT NOT NULL,
+    bad_msg TEXT,
+    good_commit TEXT NOT NULL,
+    good_msg TEXT,
+    created_at TEXT,
+    UNIQUE (pr_id, bad_commit, good_commit)
+);
+CREATE INDEX IF NOT EXISTS idx_pairs_good_commit ON pairs (good_commit);
+
+CREATE TABLE IF NOT EXISTS pair_files (
+    pair_id INTEGER NOT NULL REFERENCES pairs(id),
+    path TEXT NOT NULL,
+    build_rule TEXT,
+    PRIMARY KEY (pair_id, path)
+);
+CREATE INDEX IF NOT EXISTS idx_pair_files_build_rule ON pair_files (build_rule)
+    WHERE build_rule IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS verdicts (
+    pair_id INTEGER NOT NULL REFERENCES pairs(id),
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at TEXT,
+    PRIMARY KEY (pair_id, kind)
+);
+CREATE INDEX IF NOT EXISTS idx_verdicts_kind ON verdicts (kind, value);
+
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY,
+    pair_id INTEGER REFERENCES pairs(id),
+    name TEXT NOT NULL UNIQUE,
+    path TEXT,
+    status TEXT,
+    details TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_samples_status ON samples (status);
+
+CREATE TABLE IF NOT EXISTS swe_bench_instances (
+    instance_id TEXT PRIMARY KEY,
+    pr_id INTEGER NOT NULL REFERENCES prs(id),
+    data TEXT NOT NULL
+);
+"""
+
+# Verdict kinds written by the classification stages
+HEURISTIC = "heuristic"
+AI = "ai"
+
+EXPORT_STAGES = ["mining", "analyzed", "ai", "candidates", "swe_bench", "samples"]
+
+# Pairs read per query by iter_pairs / iter_candidates
+PAGE_SIZE = 500
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class PipelineCatalog:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        # Autocommit mode: transactions are opened explicitly in transaction()
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Runs a block in one IMMEDIATE write transaction."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _fetchall(self, query: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self.conn.execute(query, params).fetchall()
+
+    # -- repos / PRs / pairs -------------------------------------------------
+
+    def _repo_id(self, conn: sqlite3.Connection, repo: str) -> int:
+        conn.execute("INSERT OR IGNORE INTO repos (full_name, updated_at) VALUES (?, ?)", (repo, _now()))
+        return conn.execute("SELECT id FROM repos WHERE full_name = ?", (repo,)).fetchone()[0]
+
+    def _pr_id(self, conn: sqlite3.Connection, repo: str, number: int, url: Optional[str] = None) -> int:
+        repo_id = self._repo_id(conn, repo)
+        conn.execute("INSERT OR IGNORE INTO prs (repo_id, number, url) VALUES (?, ?, ?)", (repo_id, number, url))
+        if url:
+            conn.execute("UPDATE prs SET url = ? WHERE repo_id = ? AND number = ? AND url IS NULL",
+                         (url, repo_id, number))
+        return conn.execute("SELECT id FROM prs WHERE repo_id = ? AND number = ?", (repo_id, number)).fetchone()[0]
+
+    def _pair_id(self, conn: sqlite3.Connection, repo: str, pair: Dict[str, Any]) -> Optional[int]:
+        row = conn.execute(
+            """SELECT pairs.id FROM pairs
+               JOIN prs ON prs.id = pairs.pr_id
+               JOIN repos ON repos.id = prs.repo_id
+               WHERE repos.full_name = ? AND prs.number = ? AND pairs.bad_commit = ? AND pairs.good_commit = ?""",
+            (repo, pair["pr_id"], pair["bad_commit"], pair["good_commit"]),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_cursor(self, repo: str) -> Optional[str]:
+        rows = self._fetchall("SELECT mining_cursor FROM repos WHERE full_name = ?", (repo,))
+        return rows[0][0] if rows else None
+
+    def add_pairs(self, repo: str, pairs: List[Dict[str, Any]], cursor: Optional[str] = None) -> int:
+        """
+        Adds mined pairs (mining_results.json schema) for a repo and, if given,
+        advances the mining cursor in the same transaction.
+
+        Returns the number of pairs that were not already in the catalog.
+        """
+        with self.transaction() as conn:
+            added = self._add_pairs(conn, repo, pairs)
+            if cursor is not None:
+                repo_id = self._repo_id(conn, repo)
+                conn.execute("UPDATE repos SET mining_cursor = ?, updated_at = ? WHERE id = ?",
+                             (cursor, _now(), repo_id))
+        return added
+
+    def _add_pairs(self, conn: sqlite3.Connection, repo: str, pairs: List[Dict[str, Any]]) -> int:
+        added = 0
+        for pair in pairs:
+            pr_id = self._pr_id(conn, repo, pair["pr_id"], pair.get("pr_url"))
+            cur = conn.execute(
+                """INSERT OR IGNORE INTO pairs (pr_id, bad_commit, bad_msg, good_commit, good_msg, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (pr_id, pair["bad_commit"], pair.get("bad_msg"), pair["good_commit"], pair.get("good_msg"), _now()),
+            )
+            added += cur.rowcount
+        return added
+
+    def has_good_commit(self, repo: str, good_commit: str) -> bool:
+        rows = self._fetchall(
+            """SELECT 1 FROM pairs
+               JOIN prs ON prs.id = pairs.pr_id
+               JOIN repos ON repos.id = prs.repo_id
+               WHERE repos.full_name = ? AND pairs.good_commit = ? LIMIT 1""",
+            (repo, good_commit),
+        )
+        return bool(rows)
+
+    def record_files(self, repo: str, pair: Dict[str, Any], files: List[str], category: str):
+        """Stores the changed files of a pair and its heuristic verdict."""
+        with self.transaction() as conn:
+            self._record_files(conn, repo, pair, files, category)
+
+    def _record_files(self, conn: sqlite3.Connection, repo: str, pair: Dict[str, Any], files: List[str],
+                      category: str):
+        pair_id = self._pair_id(conn, repo, pair)
+        if pair_id is None:
+            raise KeyError(f"Unknown pair {repo}#{pair['pr_id']} {pair['good_commit']}")
+        conn.execute("DELETE FROM pair_files WHERE pair_id = ?", (pair_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO pair_files (pair_id, path, build_rule) VALUES (?, ?, ?)",
+            [(pair_id, f, match_build_file(f)) for f in files],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO verdicts (pair_id, kind, value, updated_at) VALUES (?, ?, ?, ?)",
+            (pair_id, HEURISTIC, category, _now()),
+        )
+
+    def record_verdict(self, repo: str, pair: Dict[str, Any], kind: str, value: str):
+        with self.transaction() as conn:
+            self._record_verdict(conn, repo, pair, kind, value)
+
+    def _record_verdict(self, conn: sqlite3.Connection, repo: str, pair: Dict[str, Any], kind: str, value: str):
+        pair_id = self._pair_id(conn, repo, pair)
+        if pair_id is None:
+            raise KeyError(f"Unknown pair {repo}#{pair['pr_id']} {pair['good_commit']}")
+        conn.execute(
+            "INSERT OR REPLACE INTO verdicts (pair_id, kind, value, updated_at) VALUES (?, ?, ?, ?)",
+            (pair_id, kind, value, _now()),
+        )
+
+    def iter_pairs(self, repo: Optional[str] = None, missing_verdict: Optional[str] = None,
+                   with_verdict: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields pairs in the analyzed/AI results schema.
+
+        `missing_verdict` restricts to pairs that have no verdict of that kind
+        yet (used by stages to resume), `with_verdict` to pairs that have one.
+        """
+        query = """SELECT pairs.id, repos.full_name, prs.number, prs.url, pairs.bad_commit, pairs.bad_msg,
+                          pairs.good_commit, pairs.good_msg,
+                          h.value AS category, a.value AS ai_verdict
+                   FROM pairs
+                   JOIN prs ON prs.id = pairs.pr_id
+                   JOIN repos ON repos.id = prs.repo_id
+                   LEFT JOIN verdicts h ON h.pair_id = pairs.id AND h.kind = 'heuristic'
+                   LEFT JOIN verdicts a ON a.pair_id = pairs.id AND a.kind = 'ai'"""
+        clauses, params = [], []
+        if repo:
+            clauses.append("repos.full_name = ?")
+            params.append(repo)
+        for kind, present in ((missing_verdict, False), (with_verdict, True)):
+            if kind:
+                clauses.append(f"{'' if present else 'NOT '}EXISTS "
+                               "(SELECT 1 FROM verdicts v WHERE v.pair_id = pairs.id AND v.kind = ?)")
+                params.append(kind)
+
+        for row, files in self._iter_pair_rows(query, clauses, params):
+            pair = {
+                "pr_id": row["number"],
+                "pr_url": row["url"],
+                "bad_commit": row["bad_commit"],
+                "bad_msg": row["bad_msg"],
+                "good_commit": row["good_commit"],
+                "good_msg": row["good_msg"],
+            }
+            if row["category"] is not None:
+                pair["files_changed"] = [path for path, _ in files]
+                pair["category"] = row["category"]
+            if row["ai_verdict"] is not None:
+                pair["ai_is_dependency_update"] = row["ai_verdict"]
+            yield pair
+
+    def _iter_pair_rows(self, query: str, clauses: List[str],
+                        params: List[Any]) -> Iterator[Tuple[sqlite3.Row, List[Tuple[str, Optional[str]]]]]:
+        """
+        Yields (row, [(path, build_rule), ...]) for a pairs query, PAGE_SIZE
+        pairs at a time.
+
+        Pages are keyed on pairs.id, so callers may write to the catalog while
+        iterating, and the changed files of a whole page are read in one query.
+        """
+        last_id = 0
+        while True:
+            page_query = query + " WHERE " + " AND ".join(clauses + ["pairs.id > ?"])
+            rows = self._fetchall(page_query + " ORDER BY pairs.id LIMIT ?", list(params) + [last_id, PAGE_SIZE])
+            if not rows:
+                return
+            ids = [row["id"] for row in rows]
+            by_pair: Dict[int, List[Tuple[str, Optional[str]]]] = {}
+            for f in self._fetchall(f"SELECT pair_id, path, build_rule FROM pair_files "
+                                    f"WHERE pair_id IN ({','.join('?' * len(ids))}) ORDER BY rowid", ids):
+                by_pair.setdefault(f["pair_id"], []).append((f["path"], f["build_rule"]))
+            for row in rows:
+                yield row, by_pair.get(row["id"], [])
+            last_id = rows[-1]["id"]
+
+    def iter_candidates(self, repo: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields candidates in the candidates.json schema.
+
+        Pairs without a heuristic verdict have not been analyzed yet and are
+        included with unknown file lists; analyzed pairs are included only if
+        at least one changed file matched a build-file rule.
+        """
+        query = """SELECT pairs.id, prs.number, prs.url, pairs.bad_commit, pairs.bad_msg,
+                          pairs.good_commit, pairs.good_msg, h.value AS category
+                   FROM pairs
+                   JOIN prs ON prs.id = pairs.pr_id
+                   JOIN repos ON repos.id = prs.repo_id
+                   LEFT JOIN verdicts h ON h.pair_id = pairs.id AND h.kind = 'heuristic'"""
+        clauses = ["""(h.value IS NULL
+                       OR EXISTS (SELECT 1 FROM pair_files f
+                                  WHERE f.pair_id = pairs.id AND f.build_rule IS NOT NULL))"""]
+        params = []
+        if repo:
+            clauses.append("repos.full_name = ?")
+            params.append(repo)
+
+        for row, files in self._iter_pair_rows(query, clauses, params):
+            analyzed = row["category"] is not None
+            yield {
+                "pr_id": row["number"],
+                "pr_url": row["url"],
+                "bad_commit": row["bad_commit"],
+                "bad_msg": row["bad_msg"],
+                "good_commit": row["good_commit"],
+                "good_msg": row["good_msg"],
+                "build_files_changed": [path for path, rule in files if rule is not None] if analyzed else None,
+                "all_files_changed": [path for path, _ in files] if analyzed else None,
+                "category": row["category"] if analyzed else "Unknown",
+            }
+
+    # -- samples ---------------------------------------------------------------
+
+    def record_sample(self, name: str, path: Optional[str] = None, status: Optional[str] = None,
+                      details: Optional[Dict[str, Any]] = None, pair: Optional[Dict[str, Any]] = None,
+                      repo: Optional[str] = None):
+        with self.transaction() as conn:
+            pair_id = self._pair_id(conn, repo, pair) if (pair and repo) else None
+            self._record_sample(conn, name, path, status, details, pair_id)
+
+    def _record_sample(self, conn: sqlite3.Connection, name: str, path: Optional[str], status: Optional[str],
+                       details: Optional[Dict[str, Any]], pair_id: Optional[int] = None,
+                       updated_at: Optional[str] = None):
+        conn.execute(
+            """INSERT INTO samples (pair_id, name, path, status, details, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (name) DO UPDATE SET
+                   pair_id = COALESCE(excluded.pair_id, samples.pair_id),
+                   path = COALESCE(excluded.path, samples.path),
+                   status = COALESCE(excluded.status, samples.status),
+                   details = COALESCE(excluded.details, samples.details),
+                   updated_at = excluded.updated_at""",
+            (pair_id, name, path, status, json.dumps(details) if details is not None else None,
+             updated_at or _now()),
+        )
+
+    def iter_samples(self, status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        query = "SELECT name, path, status, details, updated_at FROM samples"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        for row in self._fetchall(query + " ORDER BY name", params):
+            yield {
+                "name": row["name"],
+                "path": row["path"],
+                "status": row["status"],
+                "details": json.loads(row["details"]) if row["details"] else None,
+                "updated_at": row["updated_at"],
+            }
+
+    # -- SWE-bench instances -------------------------------------------------
+
+    def add_swe_bench_instances(self, repo: str, entries: List[Dict[str, Any]]):
+        with self.transaction() as conn:
+            self._add_swe_bench_instances(conn, repo, entries)
+
+    def _add_swe_bench_instances(self, conn: sqlite3.Connection, repo: str, entries: List[Dict[str, Any]]):
+        self._repo_id(conn, repo)
+        for entry in entries:
+            pr_id = self._pr_id(conn, repo, entry["issue_id"], entry.get("pr_url"))
+            conn.execute(
+                "INSERT OR REPLACE INTO swe_bench_instances (instance_id, pr_id, data) VALUES (?, ?, ?)",
+                (entry["instance_id"], pr_id, json.dumps(entry)),
+            )
+
+    def add_swe_bench_repo_results(self, repo: str, entries: List[Dict[str, Any]]):
+        """Stores a fully mined repo's entries and marks the repo as done."""
+        with self.transaction() as conn:
+            self._add_swe_bench_instances(conn, repo, entries)
+            conn.execute("UPDATE repos SET swe_bench_mined_at = ? WHERE full_name = ?", (_now(), repo))
+
+    def swe_bench_repos(self) -> List[str]:
+        """Repos that mine_gradle_prs.py has already fully processed."""
+        return [r[0] for r in self._fetchall(
+            "SELECT full_name FROM repos WHERE swe_bench_mined_at IS NOT NULL ORDER BY full_name")]
+
+    def iter_swe_bench_instances(self, repo: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        query = """SELECT swe_bench_instances.data FROM swe_bench_instances
+                   JOIN prs ON prs.id = swe_bench_instances.pr_id
+                   JOIN repos ON repos.id = prs.repo_id"""
+        params = []
+        if repo:
+            query += " WHERE repos.full_name = ?"
+            params.append(repo)
+        for row in self._fetchall(query + " ORDER BY repos.full_name, prs.number", params):
+            yield json.loads(row[0])
+
+    # -- JSON compatibility ------------------------------------------------------
+
+    def export_json(self, stage: str, output_file: str, repo: Optional[str] = None) -> int:
+        """Writes one stage's data in the legacy JSON file format."""
+        if stage == "mining":
+            rows = [{k: p[k] for k in ("pr_id", "pr_url", "bad_commit", "bad_msg", "good_commit", "good_msg")}
+                    for p in self.iter_pairs(repo)]
+        elif stage == "analyzed":
+            rows = list(self.iter_pairs(repo, with_verdict=HEURISTIC))
+        elif stage == "ai":
+            rows = list(self.iter_pairs(repo, with_verdict=AI))
+        elif stage == "candidates":
+            rows = list(self.iter_candidates(repo))
+        elif stage == "swe_bench":
+            rows = list(self.iter_swe_bench_instances(repo))
+        elif stage == "samples":
+            rows = list(self.iter_samples())
+        else:
+            raise ValueError(f"Unknown stage: {stage}")
+
+        with open(output_file, "w") as f:
+            json.dump(rows, f, indent=2)
+        return len(rows)
+
+    def import_json(self, stage: str, input_file: str, repo: Optional[str] = None) -> int:
+        """Loads a legacy JSON stage file (or an export of any stage) into the catalog, in one transaction."""
+        if stage not in EXPORT_STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        with open(input_file, "r") as f:
+            rows = json.load(f)
+        if stage not in ("swe_bench", "samples") and not repo:
+            raise ValueError(f"--repo is required to import stage '{stage}'")
+
+        with self.transaction() as conn:
+            if stage == "swe_bench":
+                by_repo: Dict[str, List[Dict[str, Any]]] = {}
+                for entry in rows:
+                    by_repo.setdefault(entry["repo"], []).append(entry)
+                for entry_repo, entries in by_repo.items():
+                    self._add_swe_bench_instances(conn, entry_repo, entries)
+            elif stage == "samples":
+                for sample in rows:
+                    self._record_sample(conn, sample["name"], sample.get("path"), sample.get("status"),
+                                        sample.get("details"), updated_at=sample.get("updated_at"))
+            else:
+                self._add_pairs(conn, repo, rows)
+                for pair in rows:
+                    if stage == "candidates":
+                        # Unanalyzed candidates have no file lists and the category "Unknown"
+                        if pair.get("all_files_changed") is not None:
+                            self._record_files(conn, repo, pair, pair["all_files_changed"], pair["category"])
+                    elif "files_changed" in pair and "category" in pair:
+                        self._record_files(conn, repo, pair, pair["files_changed"], pair["category"])
+                    if "ai_is_dependency_update" in pair:
+                        self._record_verdict(conn, repo, pair, AI, pair["ai_is_dependency_update"])
+        return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline catalog import/export")
+    parser.add_argument("command", choices=["export", "import", "stats"])
+    parser.add_argument("--db", default="catalog.db", help="Path to the catalog database")
+    parser.add_argument("--stage", choices=EXPORT_STAGES, help="Stage to import or export")
+    parser.add_argument("--repo", help="Restrict to one repository (owner/name)")
+    parser.add_argument("--file", help="JSON file to read (import) or write (export)")
+
+    args = parser.parse_args()
+    catalog = PipelineCatalog(args.db)
+
+    if args.command == "stats":
+        for table in ["repos", "prs", "pairs", "pair_files", "verdicts", "samples", "swe_bench_instances"]:
+            count = catalog._fetchall(f"SELECT COUNT(*) FROM {table}")[0][0]
+            print(f"{table}: {count}")
+        return
+
+    if not args.stage or not args.file:
+        print("Error: --stage and --file are required.")
+        return
+
+    if args.command == "export":
+        count = catalog.export_json(args.stage, args.file, args.repo)
+        print(f"Exported {count} {args.stage} entries to {args.file}")
+    else:
+        count = catalog.import_json(args.stage, args.file, args.repo)
+        print(f"Imported {count} {args.stage} entries from {args.file}")
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,11 @@ import json
 import time
 import argparse
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from budget import Budget
+from catalog import AI, HEURISTIC, PipelineCatalog
+from git_objects import GitError, open_repo
 
 def load_env():
     env_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -18,8 +22,11 @@ def load_env():
                     os.environ[key.strip()] = value.strip()
 
 class GeminiClassifier:
-    def __init__(self, github_token: str, gemini_key: str, repo_owner: str, repo_name: str):
+    def __init__(self, github_token: str, gemini_key: str, repo_owner: str, repo_name: str, git_cache: str = None,
+                 budget: Optional[Budget] = None):
         self.github_token = github_token
+        # Run budget (budget.py): defaults to the ledger of the calling pipeline run
+        self.budget = budget if budget is not None else Budget.from_env()
         self.gemini_key = gemini_key
         self.owner = repo_owner
         self.name = repo_name
@@ -28,12 +35,21 @@ class GeminiClassifier:
             "Accept": "application/vnd.github.v3.diff"
         }
         self.gemini_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={gemini_key}"
+        self.local_repo = open_repo(repo_owner, repo_name, git_cache)
 
     def get_commit_diff(self, commit_sha: str) -> str:
         """Fetches the diff of a commit."""
+        if self.local_repo is not None:
+            try:
+                return self.local_repo.commit_diff(commit_sha)[:10000]  # Truncate
+            except GitError as e:
+                print(f"Local git diff failed for {commit_sha}, falling back to GitHub API: {e}")
+
         url = f"https://api.github.com/repos/{self.owner}/{self.name}/commits/{commit_sha}"
         try:
             response = requests.get(url, headers=self.headers, timeout=15)
+            if self.budget is not None:
+                self.budget.charge("rest_calls")
             if response.status_code == 200:
                 return response.text[:10000]  # Truncate
             else:
@@ -71,6 +87,10 @@ class GeminiClassifier:
             response = requests.post(self.gemini_url, json=payload, timeout=30)
             if response.status_code == 200:
                 data = response.json()
+                if self.budget is not None:
+                    # Fall back to ~4 characters per token if the response has no usage
+                    tokens = data.get("usageMetadata", {}).get("totalTokenCount") or len(prompt_text) // 4
+                    self.budget.charge("llm_tokens", tokens)
                 try:
                     answer = data["candidates"][0]["content"]["parts"][0]["text"].strip().upper()
                     if "YES" in answer:
@@ -89,19 +109,30 @@ class GeminiClassifier:
             print(f"Gemini Request Error: {e}")
             return "ERROR"
 
-    def run(self, input_file: str, output_file: str):
-        if not os.path.exists(input_file):
+    def run(self, input_file: str, output_file: str, catalog=None):
+        """
+        Classifies analyzed pairs, skipping ones that already have a verdict.
+
+        With a PipelineCatalog, pairs are read from the catalog (analyzed ones
+        without an AI verdict yet) and each verdict is committed immediately.
+        Once the run budget is exhausted, classification stops and the
+        remaining pairs are left for the next run.
+        """
+        repo = f"{self.owner}/{self.name}"
+        if catalog is not None:
+            pairs = list(catalog.iter_pairs(repo, missing_verdict=AI, with_verdict=HEURISTIC))
+        elif not os.path.exists(input_file):
             print(f"Error: Input file {input_file} not found.")
             return
-
-        with open(input_file, 'r') as f:
-            pairs = json.load(f)
+        else:
+            with open(input_file, 'r') as f:
+                pairs = json.load(f)
             
         # Load existing results to skip already processed ones
         existing_results = []
         processed_commits = set()
         
-        if os.path.exists(output_file):
+        if catalog is None and os.path.exists(output_file):
             try:
                 with open(output_file, 'r') as f:
                     existing_results = json.load(f)
@@ -121,6 +152,11 @@ class GeminiClassifier:
             if good_commit in processed_commits:
                 print(f"[{i+1}/{len(pairs)}] Skipping {good_commit[:7]} (Already processed)")
                 continue
+
+            resource = self.budget.exhausted() if self.budget is not None else None
+            if resource:
+                print(f"[{i+1}/{len(pairs)}] Stopping: {resource} budget exhausted; the next run resumes here.")
+                break
                 
             msg = pair["good_msg"]
             
@@ -136,14 +172,20 @@ class GeminiClassifier:
             processed_commits.add(good_commit)
             new_count += 1
             
+            if catalog is not None:
+                catalog.record_verdict(repo, pair, AI, ai_verdict)
             # Save incrementally every 5 items
-            if new_count % 5 == 0:
+            elif new_count % 5 == 0:
                 with open(output_file, 'w') as f:
                     json.dump(results, f, indent=2)
                 print(f"  [Saved progress to {output_file}]")
             
             time.sleep(1) # Rate limit niceness
             
+        if catalog is not None:
+            print(f"Saved all AI classification results to catalog {catalog.path}")
+            return
+
         # Final save
         with open(output_file, 'w') as f:
             json.dump(results, f, indent=2)
@@ -155,6 +197,8 @@ def main():
     parser.add_argument("repo", help="owner/name")
     parser.add_argument("--input", default="analyzed_results.json")
     parser.add_argument("--output", default="ai_classified_results.json")
+    parser.add_argument("--catalog", help="Pipeline catalog (SQLite) to read/write instead of --input/--output")
+    parser.add_argument("--git-cache", help="Directory for local blobless clones used for diffs (default: GIT_OBJECT_CACHE env var)")
     
     args = parser.parse_args()
     
@@ -166,8 +210,9 @@ def main():
         return
         
     owner, name = args.repo.split("/", 1)
-    classifier = GeminiClassifier(gh_token, gemini_key, owner, name)
-    classifier.run(args.input, args.output)
+    classifier = GeminiClassifier(gh_token, gemini_key, owner, name, git_cache=args.git_cache)
+    catalog = PipelineCatalog(args.catalog) if args.catalog else None
+    classifier.run(args.input, args.output, catalog=catalog)
 
 if __name__ == "__main__":
     main()
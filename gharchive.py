@@ -0,0 +1,248 @@
+"""
+Offline pair mining from GH Archive event dumps (https://www.gharchive.org).
+
+The hourly dumps (YYYY-MM-DD-H.json.gz, one JSON event per line) contain the
+public PullRequestEvents of all repositories, and older dumps also contain
+StatusEvents and CheckSuiteEvents. Their payloads match the webhook payloads,
+so they are replayed into a StatusTracker (status_tracker.py) exactly like
+webhook_receiver.py deliveries:
+
+- files are scanned in parallel by a process pool. A regex on the raw line
+  keeps only the three event types before any JSON is parsed, and the
+  events are slimmed to the fields the tracker uses
+- the parent applies the events in archive order. Merges are applied after
+  all files, so states reported later in the scanned range still count;
+  states in the dumps of a later run re-evaluate the PRs merged before
+- merged PRs become pairs (mining_results.json schema) where the recorded
+  states suffice. Merged PRs with a failed commit but no pair become
+  candidates, since the fixing commit was not seen (the public timeline has
+  no per-push PR events). Current dumps carry hardly any StatusEvents or
+  CheckSuiteEvents; with stateless_candidates, merged PRs without any
+  recorded state become candidates too, best limited to a few repositories
+
+Candidates are written to candidate_prs.json next to mining_results.json.
+With a token, their full histories are fetched through the API (the second
+phase of GitHubMiner's pre-screen) to fill these gaps; nothing else uses API
+quota.
+
+    python mine_fixes.py --gharchive archive/ --workers 8 --catalog catalog.db
+"""
+
+import gzip
+import json
+import os
+import re
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from mine_fixes import GitHubMiner
+from status_tracker import StatusTracker
+from webhook_receiver import merge_results
+
+# GH Archive event type -> webhook event name
+EVENT_TYPES = {"PullRequestEvent": "pull_request", "StatusEvent": "status", "CheckSuiteEvent": "check_suite"}
+PREFILTER = re.compile(rb'"type":\s*"(?:PullRequestEvent|StatusEvent|CheckSuiteEvent)"')
+ARCHIVE_NAME = re.compile(r"(\d{4}-\d{2}-\d{2})-(\d{1,2})\.json\.gz$")
+
+
+def archive_files(paths: Iterable[str]) -> List[str]:
+    """*.json.gz files of the given files/directories in chronological order."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".json.gz"))
+        else:
+            files.append(path)
+
+    def hour(path):
+        # Hours are not zero-padded: 2024-01-01-10 sorts after 2024-01-01-9
+        match = ARCHIVE_NAME.search(os.path.basename(path))
+        return (match.group(1), int(match.group(2))) if match else (os.path.basename(path), 0)
+
+    return sorted(set(files), key=hour)
+
+
+def slim_event(event: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    (webhook event name, payload with only the fields StatusTracker reads), or None.
+
+    Events without the PR number or commit sha they refer to are dropped too.
+    """
+    name = EVENT_TYPES.get(event.get("type"))
+    payload = event.get("payload") or {}
+    repository = {"full_name": (event.get("repo") or {}).get("name")}
+    if name == "pull_request":
+        pr = payload.get("pull_request") or {}
+        action = payload.get("action")
+        if action not in ("opened", "reopened", "synchronize") and not (action == "closed" and pr.get("merged")):
+            return None
+        number, sha = payload.get("number") or pr.get("number"), (pr.get("head") or {}).get("sha")
+        if not number or not sha:
+            return None
+        return name, {"action": action, "repository": repository, "pull_request": {
+            "number": number,
+            "html_url": pr.get("html_url"),
+            "merged": pr.get("merged"),
+            "head": {"sha": sha},
+        }}
+    if name == "status":
+        if not payload.get("sha"):
+            return None
+        return name, {"repository": repository, "sha": payload.get("sha"), "state": payload.get("state"),
+                      "context": payload.get("context"),
+                      "commit": {"commit": {"message": ((payload.get("commit") or {}).get("commit") or {})
+                                 .get("message")}}}
+    if name == "check_suite":
+        suite = payload.get("check_suite") or {}
+        if not suite.get("head_sha"):
+            return None
+        return name, {"action": payload.get("action"), "repository": repository, "check_suite": {
+            "head_sha": suite.get("head_sha"),
+            "conclusion": suite.get("conclusion"),
+            "app": {"slug": (suite.get("app") or {}).get("slug")},
+            "head_commit": {"message": (suite.get("head_commit") or {}).get("message")},
+        }}
+    return None
+
+
+def scan_file(path: str, repos: Optional[Set[str]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """Relevant events of one hourly dump, in file order (runs in a worker process)."""
+    events = []
+    try:
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                if not PREFILTER.search(line):
+                    continue
+                try:
+                    slim = slim_event(json.loads(line))
+                except ValueError:
+                    continue
+                if slim and (repos is None or slim[1]["repository"]["full_name"] in repos):
+                    events.append(slim)
+    except (OSError, EOFError) as e:
+        # Truncated downloads: keep what was readable
+        print(f"Warning: {path} is incomplete ({e})")
+    return events
+
+
+def ingest(paths: Iterable[str], tracker: StatusTracker, workers: int = 4, repos: Optional[Set[str]] = None,
+           stateless_candidates: bool = False) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Replays the dumps into the tracker.
+
+    Args:
+        stateless_candidates: Also make merged PRs without any known commit state candidates
+
+    Returns:
+        (pairs, candidates) per repo. Candidates are merged PRs with a failed
+        commit followed only by commits without a known state, in pair schema
+        without the good commit. Stateless candidates have no bad commit either.
+    """
+    files = archive_files(paths)
+    print(f"Scanning {len(files)} archive file(s) with {workers} process(es)...")
+    merges = {}
+    pairs = defaultdict(list)
+    skipped = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, events in zip(files, pool.map(partial(scan_file, repos=repos), files)):
+            for event, payload in events:
+                pr = payload.get("pull_request")
+                try:
+                    if event == "pull_request" and payload["action"] == "closed":
+                        repo = payload["repository"]["full_name"]
+                        tracker.record_head(repo, pr["number"], pr["head"]["sha"], pr["html_url"])
+                        merges[(repo, pr["number"])] = pr["html_url"]
+                    else:
+                        # A late state of a PR merged by an earlier run
+                        for pair in tracker.handle_event(event, payload):
+                            pairs[pair.pop("repo")].append(pair)
+                except (ValueError, sqlite3.IntegrityError) as e:
+                    # One malformed event must not abort hours of dumps
+                    skipped += 1
+                    print(f"Skipping malformed {event} event in {os.path.basename(path)}: {e}")
+            print(f"{os.path.basename(path)}: {len(events)} event(s)")
+    if skipped:
+        print(f"Skipped {skipped} malformed event(s)")
+
+    miner = GitHubMiner("", "", "")
+    candidates = defaultdict(list)
+    for (repo, number), url in merges.items():
+        if tracker.is_merged(repo, number):
+            continue
+        found = tracker.merge(repo, number, url=url)
+        if found:
+            pairs[repo].extend(found)
+            continue
+        nodes = tracker.commit_nodes(repo, number)
+        if stateless_candidates and all(node["commit"]["status"] is None for node in nodes):
+            candidates[repo].append({"pr_id": number, "pr_url": url, "bad_commit": None, "bad_msg": None})
+            continue
+        failed = [i for i, node in enumerate(nodes) if miner.is_build_failed(node)]
+        # A PR merged on a failed head has nothing to fill in
+        if failed and failed[-1] < len(nodes) - 1:
+            bad_commit = nodes[failed[-1]]["commit"]
+            candidates[repo].append({"pr_id": number, "pr_url": url, "bad_commit": bad_commit["oid"],
+                                     "bad_msg": miner.headline(bad_commit)})
+    print(f"Merged PRs: {len(merges)}, pairs: {sum(map(len, pairs.values()))}, "
+          f"candidates: {sum(map(len, candidates.values()))}")
+    return dict(pairs), dict(candidates)
+
+
+def save_candidates(path: str, candidates: List[Dict[str, Any]]) -> None:
+    """Adds candidate PRs to a JSON file, skipping PRs already in it."""
+    existing = []
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            existing = json.load(f)
+    known = {candidate["pr_id"] for candidate in existing}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(existing + [c for c in candidates if c["pr_id"] not in known], f, indent=2)
+
+
+def fill_gaps(token: str, repo: str, candidates: List[Dict[str, Any]], catalog=None) -> List[Dict[str, Any]]:
+    """Pairs of candidate PRs from their full commit histories (API)."""
+    owner, name = repo.split("/", 1)
+    miner = GitHubMiner(token, owner, name, prescreen=False)
+    full_prs = miner.fetch_full_prs([candidate["pr_id"] for candidate in candidates])
+    return miner.new_pairs(full_prs, set(), catalog)
+
+
+def ingest_archives(paths: Iterable[str], tracker_db: str, repos: Optional[Set[str]] = None, workers: int = 4,
+                    results_dir: str = "results", catalog=None, token: Optional[str] = None,
+                    stateless_candidates: bool = False) -> int:
+    """
+    Mines the dumps and stores pairs in the catalog or per-repo mining_results.json.
+
+    Returns the number of new pairs.
+    """
+    tracker = StatusTracker(tracker_db)
+    try:
+        pairs, candidates = ingest(paths, tracker, workers, repos, stateless_candidates)
+    finally:
+        tracker.close()
+
+    added = 0
+    for repo in sorted(set(pairs) | set(candidates)):
+        owner, name = repo.split("/", 1)
+        output_dir = os.path.join(results_dir, f"{owner}_{name}")
+        repo_pairs = pairs.get(repo, [])
+        if token and candidates.get(repo):
+            try:
+                repo_pairs = repo_pairs + fill_gaps(token, repo, candidates[repo], catalog)
+            except Exception as e:
+                print(f"[{repo}] Filling gaps failed: {e}")
+        elif candidates.get(repo):
+            save_candidates(os.path.join(output_dir, "candidate_prs.json"), candidates[repo])
+        if not repo_pairs:
+            continue
+        if catalog is not None:
+            added += catalog.add_pairs(repo, repo_pairs)
+        else:
+            added += merge_results(os.path.join(output_dir, "mining_results.json"), repo_pairs)
+    print(f"Saved {added} new pair(s)" + (f" to catalog {catalog.path}" if catalog is not None else
+                                          f" under {results_dir}/"))
+    return added
@@ -0,0 +1,160 @@
+"""
+Local git object backend.
+
+Keeps one blobless partial bare clone per repository under a cache directory
+and answers "file at commit", "diff between commits" and "parent of commit"
+from local git objects instead of the GitHub REST API. Commit and tree objects
+come down with the clone; blobs are fetched lazily (and only once) by git's
+promisor mechanism when a file or diff actually needs them.
+
+The backend is optional: callers get None from open_repo() unless a cache
+directory is configured (argument or GIT_OBJECT_CACHE environment variable),
+and every method raises GitError so callers can fall back to HTTP.
+
+The token for private repositories reaches git through GIT_CONFIG_* environment
+variables of the git processes, never through their command lines, which any
+local user could read.
+"""
+
+import base64
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_repo_locks: Dict[str, threading.Lock] = {}
+_repo_locks_guard = threading.Lock()
+
+
+class GitError(Exception):
+    pass
+
+
+def _lock_for(path: Path) -> threading.Lock:
+    with _repo_locks_guard:
+        return _repo_locks.setdefault(str(path), threading.Lock())
+
+
+class LocalGitRepo:
+    def __init__(self, owner: str, name: str, cache_dir: str, token: Optional[str] = None):
+        self.owner = owner
+        self.name = name
+        self.path = Path(cache_dir) / owner / f"{name}.git"
+        self.remote_url = f"https://github.com/{owner}/{name}.git"
+        self.token = token
+
+    def _env(self) -> Optional[Dict[str, str]]:
+        """Environment of git processes: the auth header as an extra GIT_CONFIG_* entry."""
+        if not self.token:
+            return None
+        env = dict(os.environ)
+        basic = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+        index = int(env.get("GIT_CONFIG_COUNT") or 0)
+        env[f"GIT_CONFIG_KEY_{index}"] = "http.https://github.com/.extraheader"
+        env[f"GIT_CONFIG_VALUE_{index}"] = f"AUTHORIZATION: basic {basic}"
+        env["GIT_CONFIG_COUNT"] = str(index + 1)
+        return env
+
+    def _git(self, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+        cmd = ["git", "--git-dir", str(self.path)] + list(args)
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self._env())
+        if check and proc.returncode != 0:
+            raise GitError(f"git {' '.join(args)} failed: {proc.stderr.decode('utf-8', 'replace').strip()}")
+        return proc
+
+    def ensure(self):
+        """Creates the blobless bare clone on first use."""
+        with _lock_for(self.path):
+            if (self.path / "HEAD").exists():
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            print(f"Cloning {self.owner}/{self.name} (blobless) into {self.path}...")
+            cmd = ["git", "clone", "--bare", "--filter=blob:none", "--quiet", self.remote_url, str(self.path)]
+            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self._env())
+            if proc.returncode != 0:
+                raise GitError(f"git clone failed: {proc.stderr.decode('utf-8', 'replace').strip()}")
+
+    def has_commit(self, sha: str) -> bool:
+        return self._git("cat-file", "-e", f"{sha}^{{commit}}", check=False).returncode == 0
+
+    def ensure_commits(self, *shas: str):
+        """Fetches commits that are not in the clone yet (e.g. from PR branches)."""
+        self.ensure()
+        missing = [sha for sha in shas if sha and not self.has_commit(sha)]
+        if missing:
+            with _lock_for(self.path):
+                self._git("fetch", "--quiet", "--filter=blob:none", "origin", *missing)
+
+    def fetch_pr_head(self, pr_number: int) -> str:
+        """Fetches refs/pull/N/head and returns its commit SHA."""
+        self.ensure()
+        ref = f"refs/pull/{pr_number}/head"
+        with _lock_for(self.path):
+            self._git("fetch", "--quiet", "--filter=blob:none", "origin", f"+{ref}:{ref}")
+        return self._git("rev-parse", ref).stdout.decode().strip()
+
+    def file_at(self, sha: str, path: str) -> Optional[str]:
+        """
+        Returns the content of `path` at commit `sha`, or None if it is not a file there.
+
+        Existence is decided from the tree, which is local; a failed lazy
+        fetch of the blob raises GitError.
+        """
+        self.ensure_commits(sha)
+        entry = self._git("ls-tree", "-z", sha, "--", path).stdout.decode("utf-8", "replace").split("\0")[0]
+        if not entry:
+            return None
+        _, kind, oid = entry.split("\t", 1)[0].split()
+        if kind != "blob":
+            return None
+        return self._git("cat-file", "blob", oid).stdout.decode("utf-8", "replace")
+
+    def parent(self, sha: str) -> Optional[str]:
+        """Returns the first parent of a commit, or None for a root commit."""
+        self.ensure_commits(sha)
+        proc = self._git("rev-parse", "--verify", "--quiet", f"{sha}^1", check=False)
+        if proc.returncode != 0:
+            return None
+        return proc.stdout.decode().strip()
+
+    def diff(self, base: str, head: str, paths: Optional[List[str]] = None) -> str:
+        """Unified diff between two commits, optionally limited to some paths."""
+        self.ensure_commits(base, head)
+        args = ["diff", "--no-color", "--no-ext-diff", base, head]
+        if paths:
+            args += ["--"] + list(paths)
+        return self._git(*args).stdout.decode("utf-8", "replace")
+
+    def file_patch(self, base: str, head: str, path: str) -> Optional[str]:
+        """
+        Diff hunks of one file between two commits, without the git headers.
+
+        This matches the `patch` field of the GitHub compare API. Returns None
+        if the file did not change.
+        """
+        diff = self.diff(base, head, [path])
+        start = diff.find("\n@@")
+        if start == -1:
+            return None
+        return diff[start + 1:].rstrip("\n")
+
+    def commit_diff(self, sha: str) -> str:
+        """Diff of a commit against its first parent, like the GitHub .diff media type."""
+        parent = self.parent(sha)
+        if parent is None:
+            return self._git("show", "--no-color", "--format=", sha).stdout.decode("utf-8", "replace")
+        return self.diff(parent, sha)
+
+
+def open_repo(owner: str, name: str, cache_dir: Optional[str] = None) -> Optional[LocalGitRepo]:
+    """
+    Returns a LocalGitRepo if a git object cache is configured, else None.
+
+    The cache directory comes from `cache_dir` or the GIT_OBJECT_CACHE
+    environment variable; GITHUB_TOKEN is used for private repositories.
+    """
+    cache_dir = cache_dir or os.environ.get("GIT_OBJECT_CACHE")
+    if not cache_dir:
+        return None
+    return LocalGitRepo(owner, name, cache_dir, token=os.environ.get("GITHUB_TOKEN"))
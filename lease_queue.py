@@ -0,0 +1,302 @@
+"""
+SQLite-backed work queue with leases.
+
+Several processes, on one machine or on several machines sharing a
+directory, pull work units from one database file:
+
+- a unit is identified by (queue, key) and carries a JSON payload, a
+  priority, an optional cursor (progress checkpoint) and, once done, a result
+- `claim` hands out pending units, highest priority first, and leases them
+  to the caller until `lease_expires`; units whose lease has expired (the
+  worker crashed or was killed) are handed out again, with their last cursor
+- a worker keeps its lease alive with `heartbeat`/`checkpoint` (or the
+  `keep_alive` context manager) and finishes with `complete` or `release`
+
+Every state change is one IMMEDIATE transaction and checks the lease owner,
+so a worker whose lease was taken over cannot overwrite the new owner's
+progress. Lease expiry uses wall-clock time, so machines sharing a queue need
+roughly synchronized clocks (leases should be much longer than the skew).
+SQLite locking requires a filesystem with working POSIX locks; on network
+filesystems without them, put the database on one node and run the workers
+there or over a local mount.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_units (
+    queue TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT,
+    priority REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cursor TEXT,
+    result TEXT,
+    error TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (queue, key)
+);
+CREATE INDEX IF NOT EXISTS idx_work_units_claim ON work_units (queue, status, priority);
+"""
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def default_worker_id() -> str:
+    """Unique per process: <host>:<pid>."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _unit(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "queue": row["queue"],
+        "key": row["key"],
+        "payload": json.loads(row["payload"]) if row["payload"] else None,
+        "priority": row["priority"],
+        "status": row["status"],
+        "owner": row["owner"],
+        "lease_expires": row["lease_expires"],
+        "attempts": row["attempts"],
+        "cursor": row["cursor"],
+        "result": json.loads(row["result"]) if row["result"] else None,
+        "error": row["error"],
+        "updated_at": row["updated_at"],
+    }
+
+
+class LeaseQueue:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        # Autocommit mode: transactions are opened explicitly in transaction()
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Runs a block in one IMMEDIATE write transaction."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    # -- producers ---------------------------------------------------------------
+
+    def add(self, queue: str, key: str, payload: Optional[Dict[str, Any]] = None, priority: float = 0,
+            reset_if_changed: bool = False) -> bool:
+        """
+        Adds a pending unit unless (queue, key) already exists.
+
+        With reset_if_changed, an existing unit whose payload differs is updated
+        and made pending again (its cursor and result are dropped). Leased
+        units are left to their owner; they keep the old payload, so adding
+        them again after they finished resets them then.
+
+        Returns True if the unit is new or was reset.
+        """
+        encoded = json.dumps(payload, sort_keys=True) if payload is not None else None
+        with self.transaction() as conn:
+            cur = conn.execute(
+                """INSERT OR IGNORE INTO work_units (queue, key, payload, priority, updated_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (queue, key, encoded, priority, _now()),
+            )
+            if cur.rowcount or not reset_if_changed:
+                return bool(cur.rowcount)
+            cur = conn.execute(
+                """UPDATE work_units SET payload = ?, priority = ?, status = ?, owner = NULL,
+                       lease_expires = NULL, attempts = 0, cursor = NULL, result = NULL, error = NULL,
+                       updated_at = ?
+                   WHERE queue = ? AND key = ? AND payload IS NOT ? AND status != ?""",
+                (encoded, priority, PENDING, _now(), queue, key, encoded, LEASED),
+            )
+            return bool(cur.rowcount)
+
+    def set_priority(self, queue: str, key: str, priority: float) -> None:
+        with self.transaction() as conn:
+            conn.execute("UPDATE work_units SET priority = ? WHERE queue = ? AND key = ?", (priority, queue, key))
+
+    # -- workers -----------------------------------------------------------------
+
+    def claim(self, queue: str, owner: str, lease_seconds: float, limit: int = 1,
+              max_attempts: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Leases up to `limit` pending or expired units to `owner`, highest priority first.
+
+        Units that already used up max_attempts leases are marked failed instead.
+        """
+        now = time.time()
+        claimed = []
+        with self.transaction() as conn:
+            while len(claimed) < limit:
+                row = conn.execute(
+                    """SELECT * FROM work_units
+                       WHERE queue = ? AND (status = ? OR (status = ? AND lease_expires < ?))
+                       ORDER BY priority DESC, key LIMIT 1""",
+                    (queue, PENDING, LEASED, now),
+                ).fetchone()
+                if row is None:
+                    break
+                if max_attempts is not None and row["attempts"] >= max_attempts:
+                    conn.execute(
+                        """UPDATE work_units SET status = ?, owner = NULL, lease_expires = NULL, error = ?,
+                               updated_at = ? WHERE queue = ? AND key = ?""",
+                        (FAILED, row["error"] or f"gave up after {row['attempts']} lease(s)", _now(), queue, row["key"]),
+                    )
+                    continue
+                conn.execute(
+                    """UPDATE work_units SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1,
+                           updated_at = ? WHERE queue = ? AND key = ?""",
+                    (LEASED, owner, now + lease_seconds, _now(), queue, row["key"]),
+                )
+                claimed.append(_unit(conn.execute(
+                    "SELECT * FROM work_units WHERE queue = ? AND key = ?", (queue, row["key"])).fetchone()))
+        return claimed
+
+    def _update_owned(self, queue: str, key: str, owner: str, assignments: str, params: tuple) -> bool:
+        with self.transaction() as conn:
+            cur = conn.execute(
+                f"""UPDATE work_units SET {assignments}, updated_at = ?
+                    WHERE queue = ? AND key = ? AND owner = ? AND status = ?""",
+                params + (_now(), queue, key, owner, LEASED),
+            )
+            return bool(cur.rowcount)
+
+    def heartbeat(self, queue: str, key: str, owner: str, lease_seconds: float) -> bool:
+        """Extends the lease; False if `owner` no longer holds it."""
+        return self._update_owned(queue, key, owner, "lease_expires = ?", (time.time() + lease_seconds,))
+
+    def checkpoint(self, queue: str, key: str, owner: str, cursor: str, lease_seconds: float) -> bool:
+        """Stores the unit's progress cursor and extends the lease; False if the lease was lost."""
+        return self._update_owned(queue, key, owner, "cursor = ?, lease_expires = ?",
+                                  (cursor, time.time() + lease_seconds))
+
+    def complete(self, queue: str, key: str, owner: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """Marks the unit done with its result; False if the lease was lost."""
+        return self._update_owned(queue, key, owner, "status = ?, owner = NULL, lease_expires = NULL, result = ?",
+                                  (DONE, json.dumps(result) if result is not None else None))
+
+    def release(self, queue: str, key: str, owner: str, error: Optional[str] = None,
+                failed: bool = False, count_attempt: bool = True) -> bool:
+        """
+        Gives the unit back (pending again, cursor kept), or marks it failed.
+
+        Without count_attempt, the lease does not count towards max_attempts
+        (the worker stopped for a reason unrelated to the unit).
+        """
+        attempts = "attempts" if count_attempt else "MAX(attempts - 1, 0)"
+        return self._update_owned(
+            queue, key, owner, f"status = ?, owner = NULL, lease_expires = NULL, error = ?, attempts = {attempts}",
+            (FAILED if failed else PENDING, error))
+
+    @contextmanager
+    def keep_alive(self, queue: str, key: str, owner: str, lease_seconds: float):
+        """Renews the lease from a background thread while the block runs."""
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(lease_seconds / 3):
+                if not self.heartbeat(queue, key, owner, lease_seconds):
+                    return
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    # -- inspection --------------------------------------------------------------
+
+    def get(self, queue: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM work_units WHERE queue = ? AND key = ?", (queue, key)).fetchone()
+        return _unit(row) if row else None
+
+    def iter_units(self, queue: str, status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        query = "SELECT * FROM work_units WHERE queue = ?"
+        params: List[Any] = [queue]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY key", params).fetchall()
+        for row in rows:
+            yield _unit(row)
+
+    def counts(self, queue: str) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM work_units WHERE queue = ? GROUP BY status", (queue,)).fetchall()
+        return {status: n for status, n in rows}
+
+    def unfinished(self, queue: str) -> int:
+        """Units that are pending or leased (including expired leases)."""
+        counts = self.counts(queue)
+        return counts.get(PENDING, 0) + counts.get(LEASED, 0)
+
+    def requeue(self, queue: str, status: str = FAILED) -> int:
+        """Makes all units with `status` pending again (e.g. to retry failures)."""
+        with self.transaction() as conn:
+            cur = conn.execute(
+                """UPDATE work_units SET status = ?, owner = NULL, lease_expires = NULL, attempts = 0, error = NULL,
+                       updated_at = ? WHERE queue = ? AND status = ?""",
+                (PENDING, _now(), queue, status),
+            )
+            return cur.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or reset a lease queue")
+    parser.add_argument("command", choices=["stats", "list", "requeue"])
+    parser.add_argument("--db", default="queue.db", help="Path to the queue database")
+    parser.add_argument("--queue", required=True, help="Queue name (e.g. verify, mining)")
+    parser.add_argument("--status", help="Only units with this status (list), or the status to requeue (default: failed)")
+
+    args = parser.parse_args()
+    lease_queue = LeaseQueue(args.db)
+
+    if args.command == "stats":
+        for status, count in sorted(lease_queue.counts(args.queue).items()):
+            print(f"{status}: {count}")
+    elif args.command == "list":
+        for unit in lease_queue.iter_units(args.queue, args.status):
+            owner = f" ({unit['owner']})" if unit["owner"] else ""
+            cursor = f" cursor={unit['cursor']}" if unit["cursor"] else ""
+            print(f"{unit['status']:<8} {unit['key']}{owner}{cursor}")
+    else:
+        count = lease_queue.requeue(args.queue, args.status or FAILED)
+        print(f"Requeued {count} unit(s)")
+
+if __name__ == "__main__":
+    main()
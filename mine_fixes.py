@@ -2,8 +2,14 @@ import os
 import json
 import time
 import argparse
+import threading
 import requests
-from typing import List, Dict, Optional, Generator, Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import List, Dict, Optional, Generator, Any, Callable, Set, Tuple
+
+from budget import Budget
+from catalog import PipelineCatalog
 
 # GraphQL Queries
 PR_QUERY = """
@@ -55,7 +61,7 @@ query ($owner: String!, $name: String!, $pr_number: Int!, $cursor: String) {
         nodes {
           commit {
             oid
-            message
+            messageHeadline
             committedDate
             statusCheckRollup {
               state
@@ -71,6 +77,158 @@ query ($owner: String!, $name: String!, $pr_number: Int!, $cursor: String) {
 }
 """
 
+# Two-phase mining: a cheap pre-screen page of PRs with only the build state
+# of their last commits, then full histories (oid, headline) of the PRs that
+# can contain a Bad -> Good pair, several PRs per request via aliases.
+#
+# GitHub charges a query (1 + connections fetched) / 100 points, at least 1:
+# the first/last size of a nested connection changes its node count, not its
+# points. A page of 50 full PRs and a pre-screen page of 100 PRs therefore
+# both cost 1 point, and an aliased request of up to FULL_PR_BATCH_SIZE full
+# histories costs 1 more. mine() buffers pre-screened pages until a full
+# batch of candidates is collected, so phase one halves the points of a
+# single-phase run and phase two adds about one point per batch of candidates.
+PR_PRESCREEN_QUERY = """
+query ($owner: String!, $name: String!, $cursor: String, $limit: Int!) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: $limit, states: MERGED, after: $cursor, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      nodes {
+        ...PrescreenPR
+      }
+    }
+  }
+}
+"""
+
+# Commits per PR in the pre-screen (the most recent ones); longer PRs always
+# get their full history fetched. The rollup state includes legacy statuses.
+PRESCREEN_COMMITS = 20
+# PRs per pre-screen page (the GraphQL maximum)
+PRESCREEN_PAGE_SIZE = 100
+
+PRESCREEN_FRAGMENT = """
+fragment PrescreenPR on PullRequest {
+  number
+  commits(last: %d) {
+    totalCount
+    nodes {
+      commit {
+        statusCheckRollup {
+          state
+        }
+      }
+    }
+  }
+}
+""" % PRESCREEN_COMMITS
+
+FULL_PR_FRAGMENT = """
+fragment FullPR on PullRequest {
+  number
+  url
+  commits(first: 100) {
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      commit {
+        oid
+        messageHeadline
+        committedDate
+        statusCheckRollup {
+          state
+        }
+        status {
+          state
+        }
+      }
+    }
+  }
+}
+"""
+
+# Full histories fetched per aliased request in the second phase
+FULL_PR_BATCH_SIZE = 50
+# Pre-screened pages buffered at most before their candidates are resolved
+PRESCREEN_MAX_PAGES = 5
+
+# Merged PRs of one merged-date window, for sharded mining (search API)
+SEARCH_QUERY = """
+query ($q: String!, $cursor: String, $limit: Int!) {
+  search(query: $q, type: ISSUE, first: $limit, after: $cursor) {
+    issueCount
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      ... on PullRequest {
+        number
+        url
+        commits(first: 100) {
+          pageInfo {
+            hasNextPage
+            endCursor
+          }
+          nodes {
+            commit {
+              oid
+              message
+              committedDate
+              statusCheckRollup {
+                state
+              }
+              status {
+                state
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+SEARCH_PRESCREEN_QUERY = """
+query ($q: String!, $cursor: String, $limit: Int!) {
+  search(query: $q, type: ISSUE, first: $limit, after: $cursor) {
+    issueCount
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      ...PrescreenPR
+    }
+  }
+}
+"""
+
+SEARCH_COUNT_QUERY = """
+query ($q: String!) {
+  search(query: $q, type: ISSUE, first: 1) {
+    issueCount
+  }
+}
+"""
+
+REPO_CREATED_QUERY = """
+query ($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    createdAt
+  }
+}
+"""
+
+# The search API returns at most 1000 results per query
+SEARCH_RESULT_LIMIT = 1000
+
 def load_env():
     """Simple .env loader to avoid external dependencies."""
     env_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -85,12 +243,21 @@ def load_env():
                     os.environ[key.strip()] = value.strip()
 
 class GitHubMiner:
-    def __init__(self, token: str, repo_owner: str, repo_name: str):
+    def __init__(self, token: str, repo_owner: str, repo_name: str, prescreen: bool = True,
+                 budget: Optional[Budget] = None):
         self.token = token
         self.owner = repo_owner
         self.name = repo_name
+        self.prescreen = prescreen
+        # Run budget (budget.py): defaults to the ledger of the calling pipeline run
+        self.budget = budget if budget is not None else Budget.from_env()
         self.headers = {"Authorization": f"Bearer {token}"}
         self.api_url = "https://api.github.com/graphql"
+        self._pairs_lock = threading.Lock()
+        # PRs scanned by mine()/mine_sharded() so far (reported to repo_scheduler.py)
+        self.prs_scanned = 0
+        # Whether the last mine() reached its limit or the last PR, rather than stopping early
+        self.finished = False
 
     def _query(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
         """Executes a GraphQL query with retry logic."""
@@ -104,6 +271,8 @@ class GitHubMiner:
                     timeout=30
                 )
                 if response.status_code == 200:
+                    if self.budget is not None:
+                        self.budget.charge("graphql_points")
                     data = response.json()
                     if "errors" in data:
                         # Handle GraphQL errors (some might be transient)
@@ -124,6 +293,13 @@ class GitHubMiner:
                 time.sleep(wait_time)
         raise Exception("Max retries exceeded")
 
+    def budget_exhausted(self) -> bool:
+        """Checkpoint test: True (with a message) once the run budget is used up."""
+        resource = self.budget.exhausted() if self.budget is not None else None
+        if resource:
+            print(f"Stopping: {resource} budget exhausted; the next run resumes from the last checkpoint.")
+        return resource is not None
+
     def is_build_successful(self, commit_node: Dict[str, Any]) -> bool:
         """
         Determines if a commit build was successful.
@@ -194,6 +370,91 @@ class GitHubMiner:
             
         return all_commits
 
+    @staticmethod
+    def headline(commit: Dict[str, Any]) -> str:
+        """First line of a commit message (pre-screened histories only fetch messageHeadline)."""
+        if "messageHeadline" in commit:
+            return commit["messageHeadline"]
+        return commit["message"].split('\n')[0]
+
+    def may_contain_pair(self, pr_node: Dict[str, Any]) -> bool:
+        """
+        Pre-screen: True if the PR's commit states contain a failed commit
+        followed by a successful one, or not all of its commits were seen.
+        """
+        commits = pr_node["commits"]
+        if commits["totalCount"] > len(commits["nodes"]):
+            return True
+        seen_failure = False
+        for commit_node in commits["nodes"]:
+            if self.is_build_failed(commit_node):
+                seen_failure = True
+            elif seen_failure and self.is_build_successful(commit_node):
+                return True
+        return False
+
+    def fetch_full_prs(self, numbers: List[int]) -> List[Dict[str, Any]]:
+        """Full commit histories of the given PRs, FULL_PR_BATCH_SIZE PRs per aliased request."""
+        full_prs = []
+        for i in range(0, len(numbers), FULL_PR_BATCH_SIZE):
+            batch = numbers[i:i + FULL_PR_BATCH_SIZE]
+            aliases = "\n".join(f"    pr{number}: pullRequest(number: {number}) {{ ...FullPR }}" for number in batch)
+            query = ("query ($owner: String!, $name: String!) {\n"
+                     f"  repository(owner: $owner, name: $name) {{\n{aliases}\n  }}\n}}\n" + FULL_PR_FRAGMENT)
+            data = self._query(query, {"owner": self.owner, "name": self.name})
+            repository = (data.get("data") or {}).get("repository") or {}
+            full_prs.extend(repository[f"pr{number}"] for number in batch if repository.get(f"pr{number}"))
+        return full_prs
+
+    def find_pairs(self, pr_node: Dict[str, Any], commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Bad -> Good pairs of one PR: every successful commit that follows a failed one."""
+        pairs = []
+        last_bad_commit = None
+        for commit_node in commits:
+            commit = commit_node["commit"]
+            if self.is_build_failed(commit_node):
+                last_bad_commit = commit_node
+            elif self.is_build_successful(commit_node):
+                if last_bad_commit:
+                    bad_commit = last_bad_commit["commit"]
+                    pairs.append({
+                        "pr_id": pr_node["number"],
+                        "pr_url": pr_node["url"],
+                        "bad_commit": bad_commit["oid"],
+                        "bad_msg": self.headline(bad_commit),
+                        "good_commit": commit["oid"],
+                        "good_msg": self.headline(commit)
+                    })
+                    last_bad_commit = None
+        return pairs
+
+    def new_pairs(self, pr_nodes: List[Dict[str, Any]], known_good: Set[str], catalog=None) -> List[Dict[str, Any]]:
+        """
+        Pairs of a page of PRs whose good commit is not known yet.
+
+        known_good is updated in place (under a lock, so concurrent shards
+        can share it); with a catalog, its good commits count as known too.
+        """
+        repo = f"{self.owner}/{self.name}"
+        if self.prescreen:
+            numbers = [pr["number"] for pr in pr_nodes if self.may_contain_pair(pr)]
+            print(f"Pre-screen: {len(numbers)} of {len(pr_nodes)} PRs can contain a pair")
+            pr_nodes = self.fetch_full_prs(numbers) if numbers else []
+        candidates = []
+        for pr in pr_nodes:
+            candidates.extend(self.find_pairs(pr, self.get_all_commits_for_pr(pr)))
+
+        batch_results = []
+        with self._pairs_lock:
+            for pair in candidates:
+                oid = pair["good_commit"]
+                if oid in known_good or (catalog is not None and catalog.has_good_commit(repo, oid)):
+                    continue
+                known_good.add(oid)
+                batch_results.append(pair)
+                print(f"Found pair in PR #{pair['pr_id']}: {pair['bad_commit'][:7]} -> {oid[:7]}")
+        return batch_results
+
     def load_state(self, state_file: str) -> Optional[str]:
         if os.path.exists(state_file):
             try:
@@ -208,12 +469,30 @@ class GitHubMiner:
         with open(state_file, 'w') as f:
             json.dump({"cursor": cursor}, f)
 
-    def mine(self, limit: int, output_file: str, state_file: str) -> List[Dict[str, Any]]:
-        """Mines the repository for Bad -> Good commit pairs with resumability."""
+    def mine(self, limit: int, output_file: str, state_file: str, catalog=None, cursor: Optional[str] = None,
+             checkpoint: Optional[Callable[[str, int], bool]] = None) -> List[Dict[str, Any]]:
+        """
+        Mines the repository for Bad -> Good commit pairs with resumability.
+
+        With a PipelineCatalog, pairs and the cursor are stored in the catalog
+        (one transaction per batch) instead of the output and state files, and
+        only the pairs found in this run are returned.
+
+        A given cursor overrides the stored one. checkpoint(cursor, prs_scanned)
+        is called after each saved batch; mining stops when it returns False
+        (used by mining_coordinator.py when a lease was lost). With the
+        pre-screen, a batch spans the pages needed to collect
+        FULL_PR_BATCH_SIZE candidates (at most PRESCREEN_MAX_PAGES pages).
+
+        Afterwards, self.finished tells whether the limit or the last PR was
+        reached; it stays False when mining stopped early (GraphQL errors such
+        as rate limits, an exhausted budget, an empty page, a lost lease).
+        """
         results = []
+        repo = f"{self.owner}/{self.name}"
         
         # Load existing results if they exist, to avoid overwriting
-        if os.path.exists(output_file):
+        if catalog is None and os.path.exists(output_file):
             try:
                 with open(output_file, 'r') as f:
                     results = json.load(f)
@@ -221,23 +500,33 @@ class GitHubMiner:
             except Exception:
                 print("Warning: Could not load existing results, starting fresh list.")
         
-        cursor = self.load_state(state_file)
+        if cursor is None:
+            cursor = catalog.get_cursor(repo) if catalog is not None else self.load_state(state_file)
         if cursor:
             print(f"Resuming from cursor: {cursor}")
             
+        known_good = {r['good_commit'] for r in results}
         processed_count = 0
-        
-        while processed_count < limit:
-            batch_size = min(50, limit - processed_count)
+        self.finished = False
+        page_size = PRESCREEN_PAGE_SIZE if self.prescreen else 50
+        # Pre-screened pages whose candidates are not resolved yet: they are
+        # saved (and the cursor advanced past them) together with a full batch
+        buffered, buffered_pages, buffered_prs = [], 0, 0
+
+        while processed_count + buffered_prs < limit:
+            if self.budget_exhausted():
+                break
+            batch_size = min(page_size, limit - processed_count - buffered_prs)
             variables = {
                 "owner": self.owner,
                 "name": self.name,
-                "cursor": cursor,
+                "cursor": page_cursor if buffered_pages else cursor,
                 "limit": batch_size
             }
             
-            print(f"Fetching PRs (cursor={cursor})...")
-            data = self._query(PR_QUERY, variables)
+            print(f"Fetching PRs (cursor={variables['cursor']})...")
+            query = PR_PRESCREEN_QUERY + PRESCREEN_FRAGMENT if self.prescreen else PR_QUERY
+            data = self._query(query, variables)
             
             if not data.get("data") or not data["data"].get("repository"):
                 print("No data returned or repository not found.")
@@ -245,73 +534,292 @@ class GitHubMiner:
 
             prs = data["data"]["repository"]["pullRequests"]
             nodes = prs["nodes"]
+            last_page = not prs["pageInfo"]["hasNextPage"]
             
-            if not nodes:
+            if not nodes and not buffered_pages:
                 print("No more PRs found.")
+                self.finished = last_page
                 break
-            
-            batch_results = []
-            for pr in nodes:
-                pr_number = pr["number"]
-                commits = self.get_all_commits_for_pr(pr)
-                
-                last_bad_commit = None
-                
-                for commit_node in commits:
-                    commit = commit_node["commit"]
-                    oid = commit["oid"]
-                    msg = commit["message"].split('\n')[0]
-                    
-                    if self.is_build_failed(commit_node):
-                        last_bad_commit = commit_node
-                    elif self.is_build_successful(commit_node):
-                        if last_bad_commit:
-                            bad_commit = last_bad_commit["commit"]
-                            pair = {
-                                "pr_id": pr_number,
-                                "pr_url": pr["url"],
-                                "bad_commit": bad_commit["oid"],
-                                "bad_msg": bad_commit["message"].split('\n')[0],
-                                "good_commit": oid,
-                                "good_msg": msg
-                            }
-                            # Check for duplicates before adding
-                            if not any(r['good_commit'] == oid for r in results) and not any(r['good_commit'] == oid for r in batch_results):
-                                batch_results.append(pair)
-                                print(f"Found pair in PR #{pr_number}: {bad_commit['oid'][:7]} -> {oid[:7]}")
-                            
-                            last_bad_commit = None
-            
+
+            if self.prescreen:
+                buffered.extend(pr for pr in nodes if self.may_contain_pair(pr))
+                buffered_pages += 1
+                buffered_prs += len(nodes)
+                page_cursor = prs["pageInfo"]["endCursor"]
+                if (0 < len(buffered) < FULL_PR_BATCH_SIZE and buffered_pages < PRESCREEN_MAX_PAGES
+                        and nodes and not last_page and processed_count + buffered_prs < limit):
+                    continue
+                nodes, scanned = buffered, buffered_prs
+                buffered, buffered_pages, buffered_prs = [], 0, 0
+            else:
+                scanned = len(nodes)
+
+            batch_results = self.new_pairs(nodes, known_good, catalog)
             results.extend(batch_results)
             
             # Save progress after each batch
-            processed_count += len(nodes)
-            cursor = prs["pageInfo"]["endCursor"]
-            self.save_state(state_file, cursor)
-            
-            with open(output_file, "w") as f:
-                json.dump(results, f, indent=2)
-            print(f"Saved {len(results)} pairs (total) to {output_file}")
+            processed_count += scanned
+            self.prs_scanned += scanned
+            cursor = prs["pageInfo"]["endCursor"] or cursor
+            if catalog is not None:
+                catalog.add_pairs(repo, batch_results, cursor)
+                print(f"Saved {len(batch_results)} new pairs to catalog {catalog.path}")
+            else:
+                self.save_state(state_file, cursor)
+                
+                with open(output_file, "w") as f:
+                    json.dump(results, f, indent=2)
+                print(f"Saved {len(results)} pairs (total) to {output_file}")
+
+            if checkpoint is not None and not checkpoint(cursor, processed_count):
+                print("Stopping: work unit is no longer leased to this worker.")
+                break
             
-            if not prs["pageInfo"]["hasNextPage"]:
+            if last_page:
                 print("Reached end of PRs.")
+                self.finished = True
                 break
-                
+        else:
+            self.finished = True
+
+        return results
+
+    # -- sharded mining ----------------------------------------------------------
+
+    def window_query(self, start: date, end: date) -> str:
+        # A fixed sort keeps cursor pagination within a window deterministic
+        return (f"repo:{self.owner}/{self.name} is:pr is:merged sort:created-asc "
+                f"merged:{start.isoformat()}..{end.isoformat()}")
+
+    def count_window(self, start: date, end: date) -> int:
+        data = self._query(SEARCH_COUNT_QUERY, {"q": self.window_query(start, end)})
+        return data["data"]["search"]["issueCount"]
+
+    def prescreen_window(self, start: date, end: date, limit: int) -> List[Dict[str, Any]]:
+        """Build states (PrescreenPR nodes) of the first `limit` PRs merged in a window."""
+        data = self._query(SEARCH_PRESCREEN_QUERY + PRESCREEN_FRAGMENT,
+                           {"q": self.window_query(start, end), "cursor": None, "limit": limit})
+        search = (data.get("data") or {}).get("search") or {}
+        return [node for node in search.get("nodes", []) if node]
+
+    def repo_created_date(self) -> date:
+        data = self._query(REPO_CREATED_QUERY, {"owner": self.owner, "name": self.name})
+        return date.fromisoformat(data["data"]["repository"]["createdAt"][:10])
+
+    def plan_windows(self, since: date, until: date,
+                     max_prs: int = SEARCH_RESULT_LIMIT) -> List[Tuple[date, date]]:
+        """
+        Splits [since, until] into merged-date windows of at most max_prs PRs each
+        (halving windows that are too large), since one search query returns at
+        most 1000 results. Empty windows are dropped.
+        """
+        windows = []
+        stack = [(since, until)]
+        while stack:
+            start, end = stack.pop()
+            count = self.count_window(start, end)
+            if count == 0:
+                continue
+            if count <= max_prs or start == end:
+                if count > SEARCH_RESULT_LIMIT:
+                    print(f"Warning: {count} PRs merged in {start}..{end}; only the first {SEARCH_RESULT_LIMIT} are reachable")
+                windows.append((start, end))
+                continue
+            middle = start + (end - start) // 2
+            stack.append((middle + timedelta(days=1), end))
+            stack.append((start, middle))
+        return sorted(windows)
+
+    def load_shards(self, state_file: str) -> Tuple[Dict[str, Dict[str, Any]], Optional[date], Optional[date]]:
+        """Window states and the first and last days planned so far (None before the first plan)."""
+        if os.path.exists(state_file):
+            try:
+                with open(state_file, 'r') as f:
+                    state = json.load(f)
+                shards = state.get("shards", {})
+                since = state.get("shards_since")
+                until = state.get("shards_until")
+                if until is None and shards:
+                    # State files written before shards_until: the last window's end
+                    until = max(window.split("..")[1] for window in shards)
+                if since is None and until is not None:
+                    # ... or before shards_since: the first window's start
+                    since = min([window.split("..")[0] for window in shards] or [until])
+                return (shards, date.fromisoformat(since) if since else None,
+                        date.fromisoformat(until) if until else None)
+            except Exception as e:
+                print(f"Warning: Could not load state file: {e}")
+        return {}, None, None
+
+    def save_shards(self, state_file: str, shards: Dict[str, Dict[str, Any]],
+                    since: Optional[date] = None, until: Optional[date] = None):
+        state = {}
+        if os.path.exists(state_file):
+            with open(state_file, 'r') as f:
+                state = json.load(f)
+        state["shards"] = shards
+        if since is not None:
+            state["shards_since"] = since.isoformat()
+        if until is not None:
+            state["shards_until"] = until.isoformat()
+        tmp_file = state_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, state_file)
+
+    def mine_sharded(self, limit: int, output_file: str, state_file: str, catalog=None, workers: int = 4,
+                     since: Optional[date] = None, max_window_prs: int = SEARCH_RESULT_LIMIT) -> List[Dict[str, Any]]:
+        """
+        Mines the repository's merged PRs in merged-date windows, concurrently.
+
+        The history (from `since`, default: the repository's creation date,
+        until today) is split into windows of at most max_window_prs merged
+        PRs. Each window is paginated through the search API with its own
+        cursor, `workers` windows at a time. Window cursors live under
+        "shards" in the state file (also with a catalog), so an interrupted
+        run resumes every window where it stopped; delete them to re-plan.
+        Later runs extend the plan with windows from the last planned day
+        (again, for PRs merged after that run) until today, and with windows
+        before the first planned day when `since` is earlier; a later `since`
+        is ignored with a warning.
+        Pairs of all windows are merged and deduplicated on the good commit.
+        `limit` caps the PRs scanned across all windows.
+        """
+        repo = f"{self.owner}/{self.name}"
+        results = []
+        if catalog is None and os.path.exists(output_file):
+            try:
+                with open(output_file, 'r') as f:
+                    results = json.load(f)
+                    print(f"Loaded {len(results)} existing pairs from {output_file}")
+            except Exception:
+                print("Warning: Could not load existing results, starting fresh list.")
+        known_good = {r['good_commit'] for r in results}
+
+        shards, planned_since, planned_until = self.load_shards(state_file)
+        today = date.today()
+        if planned_until is None:
+            since = since or self.repo_created_date()
+            ranges = [(since, today)]
+        else:
+            ranges = []
+            if since is not None and since < planned_since:
+                ranges.append((since, planned_since - timedelta(days=1)))
+            elif since is not None and since > planned_since:
+                print(f"Warning: windows from {planned_since} are already planned; --since {since} is ignored "
+                      f"(delete the shards from {state_file} to re-plan)")
+            # The last planned day is planned again: PRs may have been merged after that run.
+            # Pairs found twice are dropped by the good-commit deduplication.
+            ranges.append((planned_until, today))
+            since = min(since or planned_since, planned_since)
+        windows = [window for start, end in ranges for window in self.plan_windows(start, end, max_window_prs)]
+        for start, end in windows:
+            # A window planned before keeps its progress
+            shards.setdefault(f"{start.isoformat()}..{end.isoformat()}", {"cursor": None, "done": False})
+        self.save_shards(state_file, shards, since=since, until=today)
+        print(f"Planned {len(windows)} merged-date window(s) in "
+              + ", ".join(f"{start} to {end}" for start, end in ranges))
+
+        pending = [window for window, shard in shards.items() if not shard["done"]]
+        print(f"Mining {len(pending)} window(s) with {workers} worker(s)...")
+        lock = threading.Lock()
+        scanned = [0]
+
+        def mine_window(window: str):
+            start, end = (date.fromisoformat(d) for d in window.split(".."))
+            shard = shards[window]
+            while True:
+                with lock:
+                    if scanned[0] >= limit:
+                        return
+                if self.budget_exhausted():
+                    return
+                query = SEARCH_PRESCREEN_QUERY + PRESCREEN_FRAGMENT if self.prescreen else SEARCH_QUERY
+                data = self._query(query, {"q": self.window_query(start, end), "cursor": shard["cursor"],
+                                           "limit": 50})
+                if not data.get("data") or not data["data"].get("search"):
+                    print(f"No data returned for window {window}.")
+                    return
+                search = data["data"]["search"]
+                nodes = [node for node in search["nodes"] if node]
+                batch_results = self.new_pairs(nodes, known_good, catalog)
+
+                with lock:
+                    scanned[0] += len(nodes)
+                    self.prs_scanned += len(nodes)
+                    results.extend(batch_results)
+                    shard["cursor"] = search["pageInfo"]["endCursor"]
+                    shard["done"] = not search["pageInfo"]["hasNextPage"] or not nodes
+                    if catalog is not None:
+                        catalog.add_pairs(repo, batch_results)
+                    else:
+                        with open(output_file, "w") as f:
+                            json.dump(results, f, indent=2)
+                    self.save_shards(state_file, shards, until=today)
+                    print(f"[{window}] {len(nodes)} PRs, {len(batch_results)} new pairs ({len(results)} total)")
+                if shard["done"]:
+                    return
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for future in [executor.submit(mine_window, window) for window in pending]:
+                future.result()
+
+        remaining = sum(1 for shard in shards.values() if not shard["done"])
+        print(f"Scanned {scanned[0]} PRs; {remaining} window(s) left to mine.")
         return results
 
 def main():
     load_env()
     
     parser = argparse.ArgumentParser(description="Mine Self-Correction Pairs from GitHub")
-    parser.add_argument("repo", help="GitHub repository in 'owner/name' format")
+    parser.add_argument("repo", nargs="?",
+                        help="GitHub repository in 'owner/name' format (optional with --gharchive: only this repo)")
     parser.add_argument("--token", help="GitHub PAT (optional if GITHUB_TOKEN env var is set)")
     parser.add_argument("--limit", type=int, default=100, help="Number of PRs to scan")
     parser.add_argument("--output", default="mining_results.json", help="Output JSON file")
     parser.add_argument("--state", default="mining_state.json", help="State file for resumability")
+    parser.add_argument("--catalog", help="Pipeline catalog (SQLite) to read/write instead of --output/--state")
+    parser.add_argument("--no-prescreen", action="store_true",
+                        help="Fetch full commit histories of every PR instead of pre-screening build states first")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Split the history into merged-date windows and mine them concurrently (search API)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Windows mined at once with --sharded, processes scanning files with --gharchive")
+    parser.add_argument("--since", help="With --sharded: first merge date to mine, YYYY-MM-DD (default: repo creation)")
+    parser.add_argument("--max-window-prs", type=int, default=SEARCH_RESULT_LIMIT,
+                        help="With --sharded: split windows with more merged PRs than this")
+    parser.add_argument("--report", help="Write the number of PRs scanned by this run to a JSON file")
+    parser.add_argument("--gharchive", nargs="+", metavar="PATH",
+                        help="Mine GH Archive hourly dumps (*.json.gz files or directories) instead of the API")
+    parser.add_argument("--tracker-db", default="gharchive_status.db",
+                        help="With --gharchive: per-PR commit status database, kept across runs")
+    parser.add_argument("--results-dir", default="results",
+                        help="With --gharchive: per-repo results without a catalog (results/<owner>_<name>)")
+    parser.add_argument("--fill-gaps", action="store_true",
+                        help="With --gharchive: fetch candidate PRs through the API (needs a token)")
+    parser.add_argument("--stateless-candidates", action="store_true",
+                        help="With --gharchive: merged PRs without any recorded build state become candidates too "
+                             "(best with a repo)")
     
     args = parser.parse_args()
     
     token = args.token or os.environ.get("GITHUB_TOKEN")
+    if args.gharchive:
+        from gharchive import ingest_archives
+        if args.fill_gaps and not token:
+            print("Error: --fill-gaps needs a GitHub token. Set GITHUB_TOKEN or use --token.")
+            return
+        catalog = PipelineCatalog(args.catalog) if args.catalog else None
+        ingest_archives(args.gharchive, args.tracker_db, repos={args.repo} if args.repo else None,
+                        workers=args.workers, results_dir=args.results_dir, catalog=catalog,
+                        token=token if args.fill_gaps else None,
+                        stateless_candidates=args.stateless_candidates)
+        print("Mining complete.")
+        return
+
+    if not args.repo:
+        print("Error: A repository is required unless --gharchive is used.")
+        return
     if not token:
         print("Error: No GitHub token provided. Set GITHUB_TOKEN or use --token.")
         return
@@ -322,10 +830,19 @@ def main():
         
     owner, name = args.repo.split("/", 1)
     
-    miner = GitHubMiner(token, owner, name)
+    miner = GitHubMiner(token, owner, name, prescreen=not args.no_prescreen)
     print(f"Mining {args.repo} for up to {args.limit} PRs...")
     
-    miner.mine(args.limit, args.output, args.state)
+    catalog = PipelineCatalog(args.catalog) if args.catalog else None
+    if args.sharded:
+        since = date.fromisoformat(args.since) if args.since else None
+        miner.mine_sharded(args.limit, args.output, args.state, catalog=catalog, workers=args.workers,
+                           since=since, max_window_prs=args.max_window_prs)
+    else:
+        miner.mine(args.limit, args.output, args.state, catalog=catalog)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({"prs_scanned": miner.prs_scanned}, f)
     print("Mining complete.")
 
 if __name__ == "__main__":
@@ -0,0 +1,266 @@
+"""
+Lease-based mining of many repositories on several nodes.
+
+Repositories become work units in a shared lease queue (lease_queue.py). Any
+number of worker processes, on any number of machines, claim one repository
+at a time, mine it and release it:
+
+- `fixes` units run GitHubMiner (mine_fixes.py). After every saved batch of
+  PRs the worker checkpoints the GraphQL cursor and the number of PRs scanned
+  into the unit, which also renews its lease. A worker that is killed loses at
+  most one batch: the next worker resumes from the checkpoint, and pairs of
+  the replayed batch are deduplicated on their good commit. That holds across
+  nodes only with --catalog; without it, every node writes its own
+  --results-dir, and pairs replayed on another node end up in both.
+  A miner that stops before its limit and before the last PR (GraphQL errors
+  such as rate limits, an empty page) gives the unit back with its cursor;
+  the worker waits a poll interval before claiming the next one. When the run
+  budget is exhausted, the unit is given back without counting the attempt
+  and the worker stops.
+- `swe_bench` units run GradlePRMiner.process_repository
+  (swe-bench-mining/mine_gradle_prs.py) and store a repository's entries in
+  one catalog transaction, so they need --catalog.
+
+Nodes can be added or stopped at any time; a unit is only ever leased to one
+worker, and expired leases are handed out again.
+
+    python mining_coordinator.py add repos.txt --queue-db mining_queue.db --limit 500
+    python mining_coordinator.py work --queue-db mining_queue.db --catalog catalog.db --workers 4
+    python mining_coordinator.py stats --queue-db mining_queue.db
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from budget import BudgetExhausted
+from catalog import PipelineCatalog
+from lease_queue import DONE, FAILED, LeaseQueue, default_worker_id
+from mine_fixes import GitHubMiner, load_env
+
+KINDS = ("fixes", "swe_bench")
+
+
+def load_repos(repo_or_file: str) -> List[str]:
+    """One repo, a text file with one repo per line (run_pipeline.py) or a JSON list (dataset_repos.json)."""
+    if not os.path.isfile(repo_or_file):
+        return [repo_or_file]
+    with open(repo_or_file, 'r') as f:
+        if repo_or_file.endswith(".json"):
+            return json.load(f)
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def encode_progress(cursor: Optional[str], prs: int) -> str:
+    return json.dumps({"cursor": cursor, "prs": prs})
+
+
+def decode_progress(text: Optional[str]) -> Tuple[Optional[str], int]:
+    """(GraphQL cursor, PRs scanned so far) of a unit's checkpoint."""
+    if not text:
+        return None, 0
+    progress = json.loads(text)
+    return progress.get("cursor"), progress.get("prs", 0)
+
+
+def add_repos(lease_queue: LeaseQueue, repos: List[str], kind: str, limit: int, priority: float = 0) -> int:
+    added = 0
+    for repo in repos:
+        if "/" not in repo:
+            print(f"Skipping invalid repo format: {repo}")
+            continue
+        added += lease_queue.add(kind, repo, {"limit": limit}, priority=priority)
+    return added
+
+
+class MiningWorker:
+    def __init__(self, lease_queue: LeaseQueue, token: str, owner: str, lease_seconds: float,
+                 catalog: Optional[PipelineCatalog] = None, results_dir: str = "results",
+                 git_cache: Optional[str] = None, max_attempts: int = 3):
+        self.lease_queue = lease_queue
+        self.token = token
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.catalog = catalog
+        self.results_dir = results_dir
+        self.git_cache = git_cache
+        self.max_attempts = max_attempts
+        # Whether the last unit was given back after an error (run() backs off)
+        self.failed_last = False
+
+    def _mine_fixes(self, unit: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        repo = unit["key"]
+        owner, name = repo.split("/", 1)
+        limit = (unit["payload"] or {}).get("limit", 100)
+        cursor, scanned = decode_progress(unit["cursor"])
+        if scanned >= limit:
+            return {"prs": scanned}
+        if cursor:
+            print(f"[{repo}] Resuming at {scanned} PRs scanned")
+
+        output_dir = os.path.join(self.results_dir, f"{owner}_{name}")
+        os.makedirs(output_dir, exist_ok=True)
+        lost = []
+
+        def checkpoint(batch_cursor: str, batch_scanned: int) -> bool:
+            if not self.lease_queue.checkpoint("fixes", repo, self.owner,
+                                               encode_progress(batch_cursor, scanned + batch_scanned),
+                                               self.lease_seconds):
+                lost.append(batch_cursor)
+                return False
+            return True
+
+        miner = GitHubMiner(self.token, owner, name)
+        pairs = miner.mine(limit - scanned, os.path.join(output_dir, "mining_results.json"),
+                           os.path.join(output_dir, "mining_state.json"), catalog=self.catalog,
+                           cursor=cursor, checkpoint=checkpoint)
+        if lost:
+            return None
+        _, scanned = decode_progress(self.lease_queue.get("fixes", repo)["cursor"])
+        if not miner.finished:
+            resource = miner.budget.exhausted() if miner.budget is not None else None
+            if resource:
+                raise BudgetExhausted(resource)
+            raise RuntimeError(f"mining stopped early after {scanned} of {limit} PRs")
+        return {"prs": scanned, "pairs": len(pairs)}
+
+    def _mine_swe_bench(self, unit: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-mining"))
+        from mine_gradle_prs import GradlePRMiner
+
+        repo = unit["key"]
+        entries = GradlePRMiner(self.token, git_cache=self.git_cache).process_repository(repo)
+        self.catalog.add_swe_bench_repo_results(repo, entries)
+        return {"entries": len(entries)}
+
+    def run_one(self, kind: str) -> bool:
+        """Claim and mine one repository; False if nothing was claimable."""
+        units = self.lease_queue.claim(kind, self.owner, self.lease_seconds, max_attempts=self.max_attempts)
+        if not units:
+            return False
+        unit = units[0]
+        repo = unit["key"]
+        print(f"[{repo}] Claimed by {self.owner} (attempt {unit['attempts']})")
+        self.failed_last = False
+        try:
+            with self.lease_queue.keep_alive(kind, repo, self.owner, self.lease_seconds):
+                result = self._mine_fixes(unit) if kind == "fixes" else self._mine_swe_bench(unit)
+        except BudgetExhausted:
+            print(f"[{repo}] Stopped: budget exhausted; the next run resumes from the last checkpoint")
+            self.lease_queue.release(kind, repo, self.owner, count_attempt=False)
+            raise
+        except Exception as e:
+            print(f"[{repo}] Failed: {e}")
+            self.lease_queue.release(kind, repo, self.owner, error=str(e))
+            self.failed_last = True
+            return True
+        if result is None:
+            print(f"[{repo}] Lease lost; another worker continues from the last checkpoint")
+        elif self.lease_queue.complete(kind, repo, self.owner, result):
+            print(f"[{repo}] Done: {result}")
+        return True
+
+    def run(self, kind: str, poll_interval: float = 10.0) -> None:
+        """Mine repositories until no unit is pending or leased, or the run budget is exhausted."""
+        while True:
+            try:
+                claimed = self.run_one(kind)
+            except BudgetExhausted:
+                return
+            if claimed:
+                if self.failed_last:
+                    # E.g. a rate limit: give it time before the next claim
+                    time.sleep(poll_interval)
+                continue
+            if self.lease_queue.unfinished(kind) == 0:
+                return
+            # Other workers still hold leases that may expire
+            time.sleep(poll_interval)
+
+
+def print_stats(lease_queue: LeaseQueue, kind: str, verbose: bool = False) -> None:
+    counts = lease_queue.counts(kind)
+    print(f"{kind}: " + (", ".join(f"{status} {n}" for status, n in sorted(counts.items())) or "empty"))
+    if not verbose:
+        return
+    for unit in lease_queue.iter_units(kind):
+        _, scanned = decode_progress(unit["cursor"])
+        owner = f" ({unit['owner']})" if unit["owner"] else ""
+        detail = unit["error"] if unit["status"] == FAILED else (unit["result"] if unit["status"] == DONE else
+                                                                 f"{scanned} PRs scanned")
+        print(f"  {unit['status']:<8} {unit['key']}{owner}: {detail}")
+
+
+def main():
+    load_env()
+
+    parser = argparse.ArgumentParser(description="Coordinate mining of many repositories across worker nodes")
+    parser.add_argument("command", choices=["add", "work", "stats"])
+    parser.add_argument("repos", nargs="?", help="add: repository (owner/name), text file or JSON list of repos")
+    parser.add_argument("--queue-db", default="mining_queue.db", help="Shared lease queue database")
+    parser.add_argument("--kind", choices=KINDS, default="fixes",
+                        help="fixes: mine_fixes.py pairs; swe_bench: mine_gradle_prs.py instances (default: fixes)")
+    parser.add_argument("--limit", type=int, default=100, help="add: number of PRs to scan per repo (fixes)")
+    parser.add_argument("--priority", type=float, default=0, help="add: priority of the added repos (higher first)")
+    parser.add_argument("--catalog", help="Pipeline catalog (SQLite) for the mined results (required for swe_bench)")
+    parser.add_argument("--results-dir", default="results",
+                        help="work: per-repo JSON results without a catalog (default: results/<owner>_<name>)")
+    parser.add_argument("--git-cache", default=None, help="work: local git object cache (swe_bench)")
+    parser.add_argument("--workers", type=int, default=1, help="work: repositories mined at once by this node")
+    parser.add_argument("--worker-id", default=None, help="work: name of this worker (default: <host>:<pid>)")
+    parser.add_argument("--lease-seconds", type=float, default=600,
+                        help="work: lease duration; a dead worker's repo is re-claimed after it expires (default: 600)")
+    parser.add_argument("--max-attempts", type=int, default=3, help="work: leases per repo before it is marked failed")
+    parser.add_argument("--verbose", action="store_true", help="stats: list every work unit")
+
+    args = parser.parse_args()
+    lease_queue = LeaseQueue(args.queue_db)
+
+    if args.command == "stats":
+        print_stats(lease_queue, args.kind, args.verbose)
+        return
+
+    if args.command == "add":
+        if not args.repos:
+            print("Error: add needs a repository or a file with repositories.")
+            return
+        repos = load_repos(args.repos)
+        added = add_repos(lease_queue, repos, args.kind, args.limit, args.priority)
+        print(f"Added {added} of {len(repos)} repositories to the {args.kind} queue in {args.queue_db}")
+        return
+
+    token = os.environ.get("GITHUB_TOKEN")
+    if not token:
+        print("Error: No GitHub token provided. Set GITHUB_TOKEN.")
+        return
+    if args.kind == "swe_bench" and not args.catalog:
+        print("Error: --catalog is required for swe_bench units.")
+        return
+
+    catalog = PipelineCatalog(args.catalog) if args.catalog else None
+    if catalog is None:
+        print(f"Warning: No --catalog; pairs go to {args.results_dir}/ on this node only, so pairs replayed "
+              "on another node after a lost lease are not deduplicated against them.")
+    owner = args.worker_id or default_worker_id()
+    print(f"Worker {owner}: mining {args.kind} units from {args.queue_db} with {args.workers} thread(s)")
+
+    threads = []
+    for i in range(max(1, args.workers)):
+        worker = MiningWorker(lease_queue, token, f"{owner}/{i}", args.lease_seconds, catalog=catalog,
+                              results_dir=args.results_dir, git_cache=args.git_cache,
+                              max_attempts=args.max_attempts)
+        thread = threading.Thread(target=worker.run, args=(args.kind,))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    print_stats(lease_queue, args.kind)
+    print("Mining complete.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Yield-based ordering of repositories for mining.
+
+Repositories differ by orders of magnitude in how many pairs they yield: some
+have no CI statuses at all, others produce a pair every few PRs. Instead of
+giving every repository the same --limit in file order, the scheduler:
+
+1. probes each repository with a few random pages of merged PRs (one
+   pre-screen search per random merged-date window, build states only) and
+   counts the PRs with any status and the Failure -> Success transitions
+2. estimates pairs per PR from the probe plus the PRs and pairs of previous
+   runs (kept in the state file), smoothed towards a small prior so that a
+   short probe does not decide alone
+3. hands out the PR budget left after probing in order of expected yield,
+   at most --limit PRs per repository and never more than it has left
+
+Repositories whose probe saw PRs but no statuses, and that never yielded a
+pair, are skipped. A probe whose windows held no PRs at all proves nothing,
+so the prior applies. Probes are reused for --probe-max-age days.
+
+    python repo_scheduler.py repos.txt --budget 5000 --limit 1000
+    python run_pipeline.py repos.txt --budget 5000 --limit 1000
+"""
+
+import argparse
+import json
+import os
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from mine_fixes import GitHubMiner, load_env
+
+# Smoothing: an unprobed repository counts as PRIOR_PRS PRs with PRIOR_RATE pairs per PR
+PRIOR_PRS = 20
+PRIOR_RATE = 0.01
+
+
+def count_transitions(miner: GitHubMiner, commit_nodes: List[Dict[str, Any]]) -> int:
+    """Failure -> Success transitions in a PR's build states (find_pairs without oids)."""
+    transitions = 0
+    seen_failure = False
+    for node in commit_nodes:
+        if miner.is_build_failed(node):
+            seen_failure = True
+        elif seen_failure and miner.is_build_successful(node):
+            transitions += 1
+            seen_failure = False
+    return transitions
+
+
+def has_status(commit_nodes: List[Dict[str, Any]]) -> bool:
+    return any(node["commit"].get("statusCheckRollup") or node["commit"].get("status") for node in commit_nodes)
+
+
+class RepoScheduler:
+    def __init__(self, token: str, state_file: str = "schedule_state.json", samples: int = 3,
+                 page_size: int = 20, window_days: int = 30, probe_max_age: int = 30, seed: Optional[int] = None):
+        self.token = token
+        self.state_file = state_file
+        self.samples = samples
+        self.page_size = page_size
+        self.window_days = window_days
+        self.probe_max_age = probe_max_age
+        self.random = random.Random(seed)
+        self.state = self.load_state()
+
+    def load_state(self) -> Dict[str, Any]:
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not load scheduler state: {e}")
+        return {"repos": {}}
+
+    def save_state(self):
+        with open(self.state_file, 'w') as f:
+            json.dump(self.state, f, indent=2)
+
+    def _repo_state(self, repo: str) -> Dict[str, Any]:
+        return self.state["repos"].setdefault(repo, {"history": {"prs": 0, "pairs": 0}})
+
+    def probe(self, repo: str) -> Dict[str, Any]:
+        """Samples random merged-date windows of the repository (build states of the PRs' last commits only)."""
+        owner, name = repo.split("/", 1)
+        miner = GitHubMiner(self.token, owner, name)
+        today = date.today()
+        created = miner.repo_created_date()
+        merged_prs = miner.count_window(created, today)
+        span = max(0, (today - created).days - self.window_days)
+
+        prs = with_status = transitions = 0
+        seen = set()
+        for _ in range(self.samples if merged_prs else 0):
+            start = created + timedelta(days=self.random.randint(0, span))
+            for pr in miner.prescreen_window(start, start + timedelta(days=self.window_days), self.page_size):
+                if pr["number"] in seen:
+                    continue
+                seen.add(pr["number"])
+                nodes = pr["commits"]["nodes"]
+                prs += 1
+                with_status += has_status(nodes)
+                transitions += count_transitions(miner, nodes)
+
+        result = {"merged_prs": merged_prs, "prs": prs, "with_status": with_status, "pairs": transitions,
+                  "probed_at": datetime.now(timezone.utc).isoformat()}
+        print(f"[{repo}] Probe: {prs} PRs, {with_status} with statuses, {transitions} pair(s); "
+              f"{merged_prs} merged PRs")
+        self._repo_state(repo)["probe"] = result
+        self.save_state()
+        return result
+
+    def _fresh_probe(self, repo: str) -> Optional[Dict[str, Any]]:
+        probe = self._repo_state(repo).get("probe")
+        if not probe:
+            return None
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(probe["probed_at"])
+        return probe if age <= timedelta(days=self.probe_max_age) else None
+
+    def estimate(self, repo: str) -> Dict[str, Any]:
+        """Expected pairs per PR and PRs left to mine, probing the repository if needed."""
+        repo_state = self._repo_state(repo)
+        probe = self._fresh_probe(repo)
+        probed_now = probe is None
+        if probed_now:
+            probe = self.probe(repo)
+        history = repo_state["history"]
+
+        prs = probe["prs"] + history["prs"]
+        pairs = probe["pairs"] + history["pairs"]
+        if probe["prs"] and probe["with_status"] == 0 and history["pairs"] == 0:
+            rate = 0.0
+        else:
+            rate = (pairs + PRIOR_RATE * PRIOR_PRS) / (prs + PRIOR_PRS)
+        return {
+            "repo": repo,
+            "rate": rate,
+            "coverage": probe["with_status"] / probe["prs"] if probe["prs"] else 0.0,
+            "remaining": max(0, probe["merged_prs"] - history["prs"]),
+            "probe_prs": probe["prs"] if probed_now else 0,
+        }
+
+    def plan(self, repos: List[str], budget: int, max_per_repo: int,
+             min_rate: float = 0.0) -> List[Tuple[str, int, float]]:
+        """
+        (repo, PRs to scan, expected pairs per PR), highest yield first.
+
+        PRs scanned by this call's probes count against the budget.
+        """
+        estimates = []
+        for repo in repos:
+            if "/" not in repo:
+                print(f"Skipping invalid repo format: {repo}")
+                continue
+            try:
+                estimates.append(self.estimate(repo))
+            except Exception as e:
+                print(f"[{repo}] Probe failed: {e}")
+
+        left = budget - sum(e["probe_prs"] for e in estimates)
+        plan = []
+        for e in sorted(estimates, key=lambda e: e["rate"], reverse=True):
+            if e["rate"] <= min_rate:
+                print(f"[{e['repo']}] Skipped: expected {e['rate']:.3f} pairs/PR, "
+                      f"{e['coverage']:.0%} of probed PRs with statuses")
+                continue
+            limit = min(max_per_repo, e["remaining"], left)
+            if limit <= 0:
+                continue
+            plan.append((e["repo"], limit, e["rate"]))
+            left -= limit
+        return plan
+
+    def record_run(self, repo: str, prs: int, pairs: int):
+        """Adds a mining run's PRs scanned and pairs found to the repository's history."""
+        history = self._repo_state(repo)["history"]
+        history["prs"] += prs
+        history["pairs"] += pairs
+        self.save_state()
+
+
+def print_plan(plan: List[Tuple[str, int, float]]):
+    print(f"\n{'repo':<45} {'PRs':>7} {'pairs/PR':>9} {'expected':>9}")
+    for repo, limit, rate in plan:
+        print(f"{repo:<45} {limit:>7} {rate:>9.3f} {limit * rate:>9.1f}")
+
+
+def main():
+    load_env()
+
+    parser = argparse.ArgumentParser(description="Probe repositories and order them by expected pair yield")
+    parser.add_argument("repo_or_file", help="GitHub repository (owner/name) OR path to a text file with a list of repos")
+    parser.add_argument("--budget", type=int, required=True, help="Total PRs to scan, probes included")
+    parser.add_argument("--limit", type=int, default=1000, help="Maximum PRs to scan per repo")
+    parser.add_argument("--min-yield", type=float, default=0.0, help="Skip repos with fewer expected pairs per PR")
+    parser.add_argument("--state", default="schedule_state.json", help="Probes and per-repo history of previous runs")
+    parser.add_argument("--samples", type=int, default=3, help="Random PR pages per probe")
+    parser.add_argument("--probe-max-age", type=int, default=30, help="Days before a repo is probed again")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for the probe windows")
+
+    args = parser.parse_args()
+
+    token = os.environ.get("GITHUB_TOKEN")
+    if not token:
+        print("Error: No GitHub token provided. Set GITHUB_TOKEN.")
+        return
+
+    if os.path.isfile(args.repo_or_file):
+        with open(args.repo_or_file, 'r') as f:
+            repos = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        repos = [args.repo_or_file]
+
+    scheduler = RepoScheduler(token, args.state, samples=args.samples, probe_max_age=args.probe_max_age,
+                              seed=args.seed)
+    print_plan(scheduler.plan(repos, args.budget, args.limit, args.min_yield))
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import argparse
+import json
 import subprocess
 import sys
 import os
 
+from budget import add_budget_arguments, budget_from_args
+
 def run_step(command, description):
     print(f"\n{'='*60}")
     print(f"STEP: {description}")
@@ -15,7 +18,28 @@ def run_step(command, description):
         print(f"Error during '{description}': {e}")
         sys.exit(1)
 
-def process_repo(repo, limit, clean):
+def export_catalog(catalog, repo, outputs):
+    """Writes the legacy per-stage JSON files for a repo from the catalog."""
+    for stage, path in outputs:
+        run_step(
+            ["python3", "catalog.py", "export", "--db", catalog, "--stage", stage, "--repo", repo, "--file", path],
+            f"Exporting {stage} results for {repo}"
+        )
+
+def count_pairs(repo, catalog=None):
+    """Mined pairs of a repo so far (catalog or results/<owner>_<name>/mining_results.json)."""
+    if catalog:
+        from catalog import PipelineCatalog
+        return sum(1 for _ in PipelineCatalog(catalog).iter_pairs(repo))
+    owner, name = repo.split("/", 1)
+    path = os.path.join("results", f"{owner}_{name}", "mining_results.json")
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r') as f:
+        return len(json.load(f))
+
+def process_repo(repo, limit, clean, catalog=None):
+    """Runs all stages for a repo; returns the number of PRs the mining step scanned."""
     print(f"\n{'#'*60}")
     print(f"PROCESSING REPO: {repo}")
     print(f"{'#'*60}\n")
@@ -31,9 +55,14 @@ def process_repo(repo, limit, clean):
     # Define filenames within the repo-specific directory
     mining_output = os.path.join(output_dir, "mining_results.json")
     mining_state = os.path.join(output_dir, "mining_state.json")
+    mining_report = os.path.join(output_dir, "mining_report.json")
     analyzed_output = os.path.join(output_dir, "analyzed_results.json")
     ai_output = os.path.join(output_dir, "ai_classified_results.json")
     
+    # With a catalog, every stage reads and writes the catalog and the JSON
+    # files are exported at the end for compatibility.
+    catalog_args = ["--catalog", catalog] if catalog else []
+    
     # Clean if requested
     if clean:
         print(f"Cleaning up previous results in {output_dir}...")
@@ -44,27 +73,44 @@ def process_repo(repo, limit, clean):
     
     # Step 1: Mine Fixes
     run_step(
-        ["python3", "mine_fixes.py", repo, "--limit", str(limit), "--output", mining_output, "--state", mining_state],
+        ["python3", "mine_fixes.py", repo, "--limit", str(limit), "--output", mining_output, "--state", mining_state,
+         "--report", mining_report] + catalog_args,
         f"Mining 'Bad -> Good' Pairs for {repo}"
     )
     
     # Step 2: Heuristic Analysis
     run_step(
-        ["python3", "analyze_pairs.py", repo, "--input", mining_output, "--output", analyzed_output],
+        ["python3", "analyze_pairs.py", repo, "--input", mining_output, "--output", analyzed_output] + catalog_args,
         f"Running Heuristic Analysis for {repo}"
     )
     
     # Step 3: AI Classification
     run_step(
-        ["python3", "gemini_classifier.py", repo, "--input", analyzed_output, "--output", ai_output],
+        ["python3", "gemini_classifier.py", repo, "--input", analyzed_output, "--output", ai_output] + catalog_args,
         f"Running AI Classification (Gemini) for {repo}"
     )
 
+    if catalog:
+        export_catalog(catalog, repo, [("mining", mining_output), ("analyzed", analyzed_output), ("ai", ai_output)])
+
+    with open(mining_report, 'r') as f:
+        return json.load(f)["prs_scanned"]
+
 def main():
     parser = argparse.ArgumentParser(description="Run the full Task Mining Pipeline")
     parser.add_argument("repo_or_file", help="GitHub repository (owner/name) OR path to a text file with a list of repos")
     parser.add_argument("--limit", type=int, default=100, help="Limit for mining PRs per repo")
     parser.add_argument("--clean", action="store_true", help="Clean previous results/state before running")
+    parser.add_argument("--catalog", help="Pipeline catalog (SQLite) shared by all stages; JSON files are exported from it")
+    parser.add_argument("--budget", type=int, default=None,
+                        help="Total PRs to mine across all repos; probes repos and mines them by expected yield "
+                             "(repo_scheduler.py), at most --limit PRs each")
+    parser.add_argument("--min-yield", type=float, default=0.0,
+                        help="With --budget: skip repos with fewer expected pairs per PR")
+    parser.add_argument("--schedule-state", default="schedule_state.json",
+                        help="With --budget: probes and per-repo history of previous runs")
+    # Run budget (budget.py): every stage stops at its next checkpoint once a limit is reached
+    add_budget_arguments(parser)
     
     args = parser.parse_args()
     
@@ -76,13 +122,38 @@ def main():
     else:
         repos = [args.repo_or_file]
         
-    for repo in repos:
+    run_budget = budget_from_args(args)
+    scheduler = None
+    plan = [(repo, args.limit) for repo in repos]
+    if args.budget is not None:
+        from mine_fixes import load_env
+        from repo_scheduler import RepoScheduler, print_plan
+        load_env()
+        token = os.environ.get("GITHUB_TOKEN")
+        if not token:
+            print("Error: --budget needs a GitHub token to probe repos. Set GITHUB_TOKEN.")
+            sys.exit(1)
+        scheduler = RepoScheduler(token, args.schedule_state)
+        schedule = scheduler.plan(repos, args.budget, args.limit, args.min_yield)
+        print_plan(schedule)
+        plan = [(repo, limit) for repo, limit, _ in schedule]
+
+    for repo, limit in plan:
+        if run_budget is not None and run_budget.exhausted():
+            print(f"\nStopping: {run_budget.exhausted()} budget exhausted; "
+                  "the next run resumes from the last checkpoints.")
+            break
         try:
-            process_repo(repo, args.limit, args.clean)
+            before = count_pairs(repo, args.catalog) if scheduler and not args.clean else 0
+            scanned = process_repo(repo, limit, args.clean, args.catalog)
+            if scheduler and scanned is not None:
+                scheduler.record_run(repo, scanned, count_pairs(repo, args.catalog) - before)
         except Exception as e:
             print(f"Failed to process {repo}: {e}")
             # Continue to next repo
             
+    if run_budget is not None:
+        print(f"\nBudget used: {run_budget.summary()}")
     print("\nPipeline Complete!")
 
 
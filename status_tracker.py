@@ -0,0 +1,280 @@
+"""
+Incremental per-PR build status tracking from GitHub webhook payloads.
+
+Instead of re-scanning merged PRs through the API, the tracker follows PRs as
+their events arrive:
+
+- pull_request (opened/reopened/synchronize): the PR's new head commit is
+  appended to its commit sequence
+- status: one CI context's state for a commit
+- check_suite (completed): one app's conclusion for a commit
+- pull_request (closed, merged): the sequence is turned into Bad -> Good
+  pairs with GitHubMiner's is_build_failed/is_build_successful logic
+- a state reported after the merge (a build still running when the PR was
+  merged) re-evaluates the merged PRs of that commit
+
+Each pair is emitted once per PR, however often it is found again.
+
+Each head commit gets a combined state like GitHub's rollup: FAILURE if any
+context failed, SUCCESS if all contexts succeeded, PENDING otherwise. Events
+may arrive in any order; everything is kept in SQLite (WAL, one IMMEDIATE
+transaction per event), so the tracker survives restarts.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from mine_fixes import GitHubMiner
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracked_prs (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    url TEXT,
+    merged_at TEXT,
+    emitted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (repo, number)
+);
+
+CREATE TABLE IF NOT EXISTS pr_heads (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    sha TEXT NOT NULL,
+    PRIMARY KEY (repo, number, sha)
+);
+
+CREATE TABLE IF NOT EXISTS commit_states (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    context TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated_at TEXT,
+    PRIMARY KEY (repo, sha, context)
+);
+
+CREATE TABLE IF NOT EXISTS emitted_pairs (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    good_commit TEXT NOT NULL,
+    PRIMARY KEY (repo, number, good_commit)
+);
+
+CREATE TABLE IF NOT EXISTS commit_messages (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (repo, sha)
+);
+"""
+
+# Status states and check suite conclusions, mapped to rollup states
+STATUS_STATES = {"success": "SUCCESS", "failure": "FAILURE", "error": "ERROR", "pending": "PENDING"}
+CHECK_CONCLUSIONS = {
+    "success": "SUCCESS", "neutral": "SUCCESS", "skipped": "SUCCESS",
+    "failure": "FAILURE", "timed_out": "FAILURE", "startup_failure": "FAILURE",
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _field(payload: Dict[str, Any], *path: str) -> Any:
+    """payload[path[0]][path[1]]..., raising ValueError if a field is missing."""
+    value: Any = payload
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    if value is None:
+        raise ValueError(f"payload without {'.'.join(path)}")
+    return value
+
+
+def combined_state(states: List[str]) -> Optional[str]:
+    """Rollup of all contexts of one commit (None without any context)."""
+    if not states:
+        return None
+    if any(state in ("FAILURE", "ERROR") for state in states):
+        return "FAILURE"
+    if all(state == "SUCCESS" for state in states):
+        return "SUCCESS"
+    return "PENDING"
+
+
+class StatusTracker:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        # Autocommit mode: transactions are opened explicitly in transaction()
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Only the status predicates and find_pairs are used, no API calls
+        self._miner = GitHubMiner("", "", "")
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Runs a block in one IMMEDIATE write transaction."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    # -- recording ---------------------------------------------------------------
+
+    def _add_head(self, conn: sqlite3.Connection, repo: str, number: int, sha: str, url: Optional[str]) -> None:
+        conn.execute("INSERT OR IGNORE INTO tracked_prs (repo, number, url) VALUES (?, ?, ?)", (repo, number, url))
+        seq = conn.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM pr_heads WHERE repo = ? AND number = ?",
+                           (repo, number)).fetchone()[0]
+        conn.execute("INSERT OR IGNORE INTO pr_heads (repo, number, seq, sha) VALUES (?, ?, ?, ?)",
+                     (repo, number, seq, sha))
+
+    def record_head(self, repo: str, number: int, sha: str, url: Optional[str] = None) -> None:
+        with self.transaction() as conn:
+            self._add_head(conn, repo, number, sha, url)
+
+    def record_state(self, repo: str, sha: str, context: str, state: str,
+                     message: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Records one context's state.
+
+        Returns:
+            New pairs of already merged PRs with this commit (a late state)
+        """
+        with self.transaction() as conn:
+            conn.execute(
+                """INSERT INTO commit_states (repo, sha, context, state, updated_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (repo, sha, context) DO UPDATE SET state = excluded.state,
+                       updated_at = excluded.updated_at""",
+                (repo, sha, context, state, _now()),
+            )
+            if message:
+                conn.execute("INSERT OR IGNORE INTO commit_messages (repo, sha, message) VALUES (?, ?, ?)",
+                             (repo, sha, message))
+            merged = conn.execute(
+                """SELECT tracked_prs.number, tracked_prs.url FROM tracked_prs
+                   JOIN pr_heads ON pr_heads.repo = tracked_prs.repo AND pr_heads.number = tracked_prs.number
+                   WHERE tracked_prs.repo = ? AND pr_heads.sha = ? AND tracked_prs.emitted = 1""",
+                (repo, sha),
+            ).fetchall()
+            pairs = []
+            for row in merged:
+                pairs.extend(self._emit(conn, repo, row["number"], row["url"]))
+        return pairs
+
+    def commit_nodes(self, repo: str, number: int) -> List[Dict[str, Any]]:
+        """The PR's head commits in order, shaped like PR_QUERY commit nodes."""
+        with self._lock:
+            rows = self.conn.execute(
+                """SELECT pr_heads.sha, commit_messages.message FROM pr_heads
+                   LEFT JOIN commit_messages ON commit_messages.repo = pr_heads.repo
+                       AND commit_messages.sha = pr_heads.sha
+                   WHERE pr_heads.repo = ? AND pr_heads.number = ? ORDER BY pr_heads.seq""",
+                (repo, number),
+            ).fetchall()
+            nodes = []
+            for row in rows:
+                states = [r[0] for r in self.conn.execute(
+                    "SELECT state FROM commit_states WHERE repo = ? AND sha = ?", (repo, row["sha"]))]
+                state = combined_state(states)
+                nodes.append({"commit": {
+                    "oid": row["sha"],
+                    "message": row["message"] or "",
+                    "status": {"state": state} if state else None,
+                }})
+        return nodes
+
+    def is_merged(self, repo: str, number: int) -> bool:
+        """True once merge() was called for the PR."""
+        with self._lock:
+            row = self.conn.execute("SELECT emitted FROM tracked_prs WHERE repo = ? AND number = ?",
+                                    (repo, number)).fetchone()
+        return bool(row and row[0])
+
+    def merge(self, repo: str, number: int, head_sha: Optional[str] = None,
+              url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Marks the PR as merged and returns its new pairs (mining_results.json schema).
+
+        Pairs already returned for the PR are not returned again, so
+        redelivered events do not emit duplicates.
+        """
+        with self.transaction() as conn:
+            if head_sha:
+                self._add_head(conn, repo, number, head_sha, url)
+            conn.execute("INSERT OR IGNORE INTO tracked_prs (repo, number, url) VALUES (?, ?, ?)", (repo, number, url))
+            conn.execute("""UPDATE tracked_prs SET merged_at = COALESCE(merged_at, ?), emitted = 1,
+                                url = COALESCE(?, url)
+                            WHERE repo = ? AND number = ?""", (_now(), url, repo, number))
+            url = conn.execute("SELECT url FROM tracked_prs WHERE repo = ? AND number = ?",
+                               (repo, number)).fetchone()[0]
+            return self._emit(conn, repo, number, url)
+
+    def _emit(self, conn: sqlite3.Connection, repo: str, number: int, url: Optional[str]) -> List[Dict[str, Any]]:
+        """Pairs of a merged PR that were not emitted before (inside a transaction)."""
+        pr_node = {"number": number, "url": url or f"https://github.com/{repo}/pull/{number}"}
+        pairs = []
+        for pair in self._miner.find_pairs(pr_node, self.commit_nodes(repo, number)):
+            cursor = conn.execute("INSERT OR IGNORE INTO emitted_pairs (repo, number, good_commit) VALUES (?, ?, ?)",
+                                  (repo, number, pair["good_commit"]))
+            if cursor.rowcount:
+                pairs.append(pair)
+        return pairs
+
+    # -- webhook payloads --------------------------------------------------------
+
+    def handle_event(self, event: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Applies one webhook delivery.
+
+        Returns:
+            Pairs of the PR merged by this event, or of merged PRs completed by a
+            late state (mining_results.json schema plus "repo")
+
+        Raises:
+            ValueError: if the payload lacks a field the event needs
+        """
+        if not isinstance(payload, dict):
+            raise ValueError("payload is not a JSON object")
+        repo = (payload.get("repository") or {}).get("full_name")
+        if not repo:
+            return []
+
+        pairs: List[Dict[str, Any]] = []
+        if event == "pull_request":
+            number = _field(payload, "pull_request", "number")
+            head_sha = _field(payload, "pull_request", "head", "sha")
+            pr = payload["pull_request"]
+            url = pr.get("html_url")
+            action = payload.get("action")
+            if action in ("opened", "reopened", "synchronize"):
+                self.record_head(repo, number, payload.get("after") or head_sha, url)
+            elif action == "closed" and pr.get("merged"):
+                pairs = self.merge(repo, number, head_sha, url)
+        elif event == "status":
+            state = STATUS_STATES.get(payload.get("state"))
+            if state:
+                message = ((payload.get("commit") or {}).get("commit") or {}).get("message")
+                pairs = self.record_state(repo, _field(payload, "sha"), f"status:{payload.get('context', 'default')}",
+                                          state, message)
+        elif event == "check_suite":
+            suite = _field(payload, "check_suite")
+            state = CHECK_CONCLUSIONS.get(suite.get("conclusion"))
+            if payload.get("action") == "completed" and state:
+                app = (suite.get("app") or {}).get("slug") or str((suite.get("app") or {}).get("id", "app"))
+                message = (suite.get("head_commit") or {}).get("message")
+                pairs = self.record_state(repo, _field(payload, "check_suite", "head_sha"), f"check_suite:{app}",
+                                          state, message)
+        return [dict(pair, repo=repo) for pair in pairs]
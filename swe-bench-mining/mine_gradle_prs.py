@@ -12,6 +12,7 @@ This script:
 import argparse
 import json
 import os
+import sys
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
@@ -20,10 +21,16 @@ from typing import List, Dict, Any, Optional
 import requests
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from build_files import classify_build_files, is_build_file
+from catalog import PipelineCatalog
+from git_objects import GitError, open_repo
+
 
 class GradlePRMiner:
-    def __init__(self, token: str):
+    def __init__(self, token: str, git_cache: Optional[str] = None):
         self.token = token
+        self.git_cache = git_cache
         self.headers = {
             "Authorization": f"Bearer {token}",
             "Accept": "application/vnd.github.v3+json"
@@ -83,13 +90,7 @@ class GradlePRMiner:
             return None
 
     def has_gradle_changes(self, files: List[Dict[str, Any]]) -> bool:
-        for file in files:
-            filename = file.get('filename', '')
-            if ("libs.versions.toml" in filename or
-                    filename.endswith("build.gradle") or
-                    filename.endswith("build.gradle.kts")):
-                return True
-        return False
+        return bool(classify_build_files(file.get('filename', '') for file in files))
 
     def get_base_commit(self, owner: str, repo: str, pr_number: int) -> Optional[str]:
         commits = self.get_pr_commits(owner, repo, pr_number)
@@ -98,6 +99,13 @@ class GradlePRMiner:
 
         first_commit_sha = commits[0]['sha']
 
+        local_repo = open_repo(owner, repo, self.git_cache)
+        if local_repo is not None:
+            try:
+                return local_repo.parent(first_commit_sha)
+            except GitError as e:
+                print(f"Local git lookup failed for {owner}/{repo}@{first_commit_sha}, falling back to API: {e}")
+
         commit_details = self.get_commit_details(owner, repo, first_commit_sha)
         if not commit_details:
             return None
@@ -108,7 +116,15 @@ class GradlePRMiner:
 
         return None
 
-    def get_pr_patch(self, owner: str, repo: str, pr_number: int) -> str:
+    def get_pr_patch(self, owner: str, repo: str, pr_number: int, base_commit: Optional[str] = None) -> str:
+        local_repo = open_repo(owner, repo, self.git_cache)
+        if local_repo is not None and base_commit:
+            try:
+                head = local_repo.fetch_pr_head(pr_number)
+                return local_repo.diff(base_commit, head)
+            except GitError as e:
+                print(f"Local git diff failed for {owner}/{repo}#{pr_number}, falling back to API: {e}")
+
         url = f"{self.api_url}/repos/{owner}/{repo}/pulls/{pr_number}"
         headers = {**self.headers, "Accept": "application/vnd.github.v3.diff"}
         try:
@@ -148,9 +164,7 @@ class GradlePRMiner:
                 if len(parts) >= 4:
                     # Format: diff --git a/path/to/file b/path/to/file
                     filename = parts[2][2:]  # Remove 'a/' prefix
-                    if ("libs.versions.toml" in filename or
-                            filename.endswith("build.gradle") or
-                            filename.endswith("build.gradle.kts")):
+                    if is_build_file(filename):
                         include_current_file = True
             else:
                 file_header_lines.append(line)
@@ -177,7 +191,7 @@ class GradlePRMiner:
             print(f"Warning: Could not determine base commit for {owner}/{repo}#{pr_number}")
             return None
 
-        patch = self.get_pr_patch(owner, repo, pr_number)
+        patch = self.get_pr_patch(owner, repo, pr_number, base_commit)
         patch = self.filter_gradle_patch(patch)
 
         instance_id = f"{owner}__{repo.replace('/', '_')}-{pr_number}"
@@ -266,13 +280,21 @@ class GradlePRMiner:
 
         return self.search_gradle_prs(owner, repo)
 
-    def mine_all_repos(self, repos: List[str], output_file: str, max_workers: int = 3):
+    def mine_all_repos(self, repos: List[str], output_file: str, max_workers: int = 3,
+                       catalog: Optional[PipelineCatalog] = None):
         file_lock = threading.Lock()
 
         existing_results = []
         processed_repos = set()
 
-        if os.path.exists(output_file):
+        if catalog is not None:
+            # Each repo's results are committed in one transaction, so any repo
+            # marked as mined is complete and can be skipped. Like the JSON
+            # mode, repos without results are retried on the next run.
+            processed_repos = set(catalog.swe_bench_repos())
+            if processed_repos:
+                print(f"Skipping already processed repositories: {sorted(processed_repos)}")
+        elif os.path.exists(output_file):
             try:
                 with open(output_file, 'r') as f:
                     existing_results = json.load(f)
@@ -294,7 +316,7 @@ class GradlePRMiner:
             print("All repositories have already been processed!")
             return
 
-        if not existing_results:
+        if catalog is None and not existing_results:
             with open(output_file, 'w') as f:
                 json.dump([], f)
 
@@ -313,7 +335,10 @@ class GradlePRMiner:
                 try:
                     results = future.result()
 
-                    if results:
+                    if results and catalog is not None:
+                        catalog.add_swe_bench_repo_results(repo, results)
+                        total_count += len(results)
+                    elif results:
                         with file_lock:
                             with open(output_file, 'r') as f:
                                 all_results = json.load(f)
@@ -332,7 +357,7 @@ class GradlePRMiner:
         print(f"\n{'=' * 60}")
         print(f"Mining complete!")
         print(f"Total PRs with gradle changes: {total_count}")
-        print(f"Results saved to: {output_file}")
+        print(f"Results saved to: {catalog.path if catalog is not None else output_file}")
         print(f"{'=' * 60}")
 
 
@@ -352,6 +377,16 @@ def main():
         default="gradle_prs_swe_bench.json",
         help="Output file for SWE-bench format results (default: gradle_prs_swe_bench.json)"
     )
+    parser.add_argument(
+        "--catalog",
+        default=None,
+        help="Pipeline catalog (SQLite) to write results to instead of --output"
+    )
+    parser.add_argument(
+        "--git-cache",
+        default=None,
+        help="Directory for local blobless clones used for base commits and patches (default: GIT_OBJECT_CACHE env var)"
+    )
     parser.add_argument(
         "--max-workers",
         type=int,
@@ -378,8 +413,9 @@ def main():
         print("Error: No repositories found in the input file.")
         return
 
-    miner = GradlePRMiner(token)
-    miner.mine_all_repos(repos, args.output, args.max_workers)
+    miner = GradlePRMiner(token, git_cache=args.git_cache)
+    catalog = PipelineCatalog(args.catalog) if args.catalog else None
+    miner.mine_all_repos(repos, args.output, args.max_workers, catalog=catalog)
 
 
 if __name__ == "__main__":
@@ -1,30 +1,180 @@
+"""
+Script to trim a SWE-bench format dataset down to a small, reproducible sample.
+
+This script:
+1. Streams one or more input shards (JSONL, gzipped JSONL or a legacy JSON array)
+2. Keeps up to K instances per repository using reservoir sampling
+3. Optionally stratifies each repository by created_at time window
+4. Writes the sample as JSON (or JSONL if the output ends with .jsonl)
+
+Sampling is a single pass with memory bounded by repos x strata x K. Each
+instance gets a priority derived from a hash of the seed and its instance_id,
+and each reservoir keeps the K lowest priorities (bottom-k sampling). The
+sample is therefore uniform within each stratum, reproducible for a given
+seed, and independent of shard order or how the input is split.
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import heapq
 import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+
+def iter_instances(path: str) -> Iterator[Dict[str, Any]]:
+    if path.endswith('.json'):
+        # Legacy format: a single JSON array, which has to be loaded whole
+        with open(path, 'r') as f:
+            yield from json.load(f)
+        return
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    return paths
+
+
+def instance_priority(instance: Dict[str, Any], seed: int) -> int:
+    instance_id = instance.get('instance_id') or f"{instance.get('repo')}-{instance.get('issue_id')}"
+    digest = hashlib.blake2b(f"{seed}:{instance_id}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def stratum_of(instance: Dict[str, Any], stratify_by: Optional[str], window_days: int) -> str:
+    if stratify_by == 'window':
+        created_at = instance.get('created_at')
+        if not created_at:
+            return 'unknown'
+        created = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        window = created.toordinal() // window_days
+        start = datetime.fromordinal(window * window_days).date()
+        return f"{start.isoformat()}+{window_days}d"
+    return ''
+
+
+class StratifiedReservoir:
+    """Keeps the K lowest-priority instances per (repo, stratum)."""
+
+    def __init__(self, per_repo: int, seed: int, stratify_by: Optional[str] = None, window_days: int = 90):
+        self.per_repo = per_repo
+        self.seed = seed
+        self.stratify_by = stratify_by
+        self.window_days = window_days
+        self.seen = 0
+        # (repo, stratum) -> max-heap of (-priority, instance_id, instance)
+        self.reservoirs: Dict[Tuple[str, str], List[Tuple[int, str, Dict[str, Any]]]] = {}
+        # (repo, stratum) -> (-priority, instance_id) of the entries in its heap
+        self.kept: Dict[Tuple[str, str], Set[Tuple[int, str]]] = {}
+
+    def add(self, instance: Dict[str, Any]):
+        self.seen += 1
+        key = (instance['repo'], stratum_of(instance, self.stratify_by, self.window_days))
+        entry = (-instance_priority(instance, self.seed), instance.get('instance_id', ''), instance)
+
+        heap = self.reservoirs.setdefault(key, [])
+        kept = self.kept.setdefault(key, set())
+        if entry[:2] in kept:
+            return  # Same instance seen again (e.g. duplicated across shards)
+        if len(heap) < self.per_repo:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            kept.discard(heapq.heapreplace(heap, entry)[:2])
+        else:
+            return
+        kept.add(entry[:2])
+
+    def sample(self) -> List[Dict[str, Any]]:
+        trimmed = []
+        for key in sorted(self.reservoirs):
+            entries = sorted(self.reservoirs[key], key=lambda e: e[:2], reverse=True)
+            trimmed.extend(instance for _, _, instance in entries)
+        return trimmed
+
+
+def write_output(instances: List[Dict[str, Any]], output_file: str):
+    with open(output_file, 'w') as f:
+        if output_file.endswith('.jsonl'):
+            for instance in instances:
+                f.write(json.dumps(instance) + '\n')
+        else:
+            json.dump(instances, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Trim a SWE-bench format dataset to K instances per repository"
+    )
+    parser.add_argument(
+        "--input",
+        nargs="+",
+        default=["gradle_prs_swe_bench.json"],
+        help="Input shards or glob patterns (.jsonl, .jsonl.gz or .json; default: gradle_prs_swe_bench.json)"
+    )
+    parser.add_argument(
+        "--output",
+        default="gradle_prs_swe_bench_trimmed.json",
+        help="Output file, JSONL if it ends with .jsonl (default: gradle_prs_swe_bench_trimmed.json)"
+    )
+    parser.add_argument(
+        "--per-repo",
+        type=int,
+        default=1,
+        help="Instances to keep per repository, or per stratum with --stratify-by (default: 1)"
+    )
+    parser.add_argument(
+        "--stratify-by",
+        choices=["window"],
+        default=None,
+        help="Stratify each repository by created_at time window"
+    )
+    parser.add_argument(
+        "--window-days",
+        type=int,
+        default=90,
+        help="Size of the time windows for --stratify-by window (default: 90)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Sampling seed (default: 0)"
+    )
+
+    args = parser.parse_args()
 
-# Load the JSON file
-with open('gradle_prs_swe_bench.json', 'r') as f:
-    data = json.load(f)
+    reservoir = StratifiedReservoir(args.per_repo, args.seed, args.stratify_by, args.window_days)
+    for path in expand_inputs(args.input):
+        print(f"Reading {path}...")
+        for instance in iter_instances(path):
+            reservoir.add(instance)
 
-print(f"Total instances: {len(data)}")
+    print(f"Total instances: {reservoir.seen}")
 
-# Get unique repositories and keep first instance per repo
-repos = {}
-for instance in data:
-    repo = instance['repo']
-    if repo not in repos:
-        repos[repo] = instance
+    repos = sorted({repo for repo, _ in reservoir.reservoirs})
+    print(f"Unique repositories: {len(repos)}")
+    print("\nRepositories found:")
+    for repo in repos:
+        print(f"  - {repo}")
 
-print(f"Unique repositories: {len(repos)}")
-print("\nRepositories found:")
-for repo in sorted(repos.keys()):
-    print(f"  - {repo}")
+    trimmed_data = reservoir.sample()
+    write_output(trimmed_data, args.output)
 
-# Create trimmed dataset with one instance per repo
-trimmed_data = [repos[repo] for repo in sorted(repos.keys())]
+    print(f"\nTrimmed dataset saved to: {args.output}")
+    print(f"Trimmed dataset size: {len(trimmed_data)} instances")
 
-# Save to new file
-output_file = 'gradle_prs_swe_bench_trimmed.json'
-with open(output_file, 'w') as f:
-    json.dump(trimmed_data, f, indent=2)
 
-print(f"\nTrimmed dataset saved to: {output_file}")
-print(f"Trimmed dataset size: {len(trimmed_data)} instances")
+if __name__ == "__main__":
+    main()
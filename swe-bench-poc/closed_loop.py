@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Closed-loop sample generation: generate -> verify -> repair.
+
+Each freshly generated sample is verified right away. If its test ran but
+did not fail on the Original (O) and pass on the Modified (M) build script,
+the captured Gradle output is fed back to the LLM, which repairs the test, and
+the sample is verified again, up to --max-repairs times. Verifications in
+which Gradle failed before any test ran are not repaired, and errors of a
+verification or of a repair (an LLM timeout or rate limit) are no verdict
+either: in all these cases the sample is left unverified for the next run.
+Only a test that ran and got the wrong verdict counts as a failure.
+
+Generation/repair (LLM and GitHub bound) and verification (Gradle bound) run
+as two concurrent stages with their own thread pools, so new samples keep
+being generated while earlier ones are verified.
+
+The outcome of each sample is written to `verification_result.json` in its
+directory. Re-running resumes: finished samples are skipped and samples that
+were generated but not verified yet go straight to verification.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR / 'generator'))
+sys.path.insert(0, str(SCRIPT_DIR / 'runner'))
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+import test_generator as generator
+from budget import BudgetExhausted, budget_from_args
+from catalog import PipelineCatalog
+from llm_cache import LLMResponseCache, UsageLog
+from verify_sample import TestKitPool, WorkspacePool, is_verdict, verify_sample
+
+RESULT_FILE = 'verification_result.json'
+
+GENERATE = 'generate'
+VERIFY = 'verify'
+REPAIR = 'repair'
+
+
+def read_result(sample_dir):
+    path = Path(sample_dir) / RESULT_FILE
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_result(sample_dir, success, repairs):
+    path = Path(sample_dir) / RESULT_FILE
+    with open(path, 'w') as f:
+        json.dump({'success': success, 'repairs': repairs}, f, indent=2)
+
+
+class ClosedLoop:
+    def __init__(self, args, framework_src, catalog=None, blob_fetcher=None, pool=None, testkit_pool=None):
+        self.args = args
+        self.framework_src = framework_src
+        self.pool = pool
+        self.testkit_pool = testkit_pool
+        self.catalog = catalog
+        self.blob_fetcher = blob_fetcher
+        self.use_llm = not args.no_llm
+        self.llm_cache = LLMResponseCache(args.llm_cache) if self.use_llm else None
+        self.usage_log = UsageLog(args.usage_log) if self.use_llm else None
+        self.print_lock = threading.Lock()
+        self.results = {}
+        self.repaired = 0
+        self.unverified = 0
+
+    def log(self, msg):
+        with self.print_lock:
+            print(msg)
+
+    def _generate(self, candidate):
+        return generator.generate_sample(
+            candidate, self.args.output, use_llm=self.use_llm, blob_fetcher=self.blob_fetcher,
+            llm_cache=self.llm_cache, usage_log=self.usage_log, token_budget=self.args.token_budget,
+            prompt_cache=not self.args.no_prompt_cache
+        )
+
+    def _verify(self, sample_dir):
+        return verify_sample(sample_dir, self.framework_src, verbose=False, pool=self.pool,
+                             testkit_pool=self.testkit_pool)
+
+    def _repair(self, sample_dir, output, attempt):
+        return generator.repair_sample_test(
+            sample_dir, output, attempt, cache=self.llm_cache, usage_log=self.usage_log,
+            token_budget=self.args.token_budget, prompt_cache=not self.args.no_prompt_cache
+        )
+
+    def _record(self, sample_dir, status, candidate=None, details=None):
+        if self.catalog is None:
+            return
+        repo = '/'.join(candidate['pr_url'].split('/')[3:5]) if candidate else None
+        self.catalog.record_sample(sample_dir.name, path=str(sample_dir), status=status,
+                                   pair=candidate, repo=repo, details=details)
+
+    def _finish(self, sample_dir, success, repairs):
+        write_result(sample_dir, success, repairs)
+        self.results[sample_dir.name] = success
+        if success and repairs:
+            self.repaired += 1
+        self._record(sample_dir, 'verified' if success else 'failed',
+                     details={'success': success, 'repairs': repairs})
+        mark = '✓' if success else '✗'
+        suffix = f" after {repairs} repair(s)" if repairs else ""
+        self.log(f"{mark} {sample_dir.name}: {'verified' if success else 'failed'}{suffix}")
+
+    def run(self, candidates, unverified):
+        """
+        Args:
+            candidates: Candidates to generate samples for
+            unverified: Existing sample directories that still need verification
+        """
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.args.workers)) as gen_pool, \
+                ThreadPoolExecutor(max_workers=max(1, self.args.verify_workers)) as verify_pool:
+            for candidate in candidates:
+                pending[gen_pool.submit(self._generate, candidate)] = (GENERATE, candidate, 0)
+            for sample_dir in unverified:
+                pending[verify_pool.submit(self._verify, sample_dir)] = (VERIFY, sample_dir, 0)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, context, attempt = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except BudgetExhausted as e:
+                        # Not a verdict: generated samples stay unverified and are picked up next run
+                        self.log(f"⚠ {stage} skipped for {context if stage != GENERATE else context['pr_id']}: {e}")
+                        continue
+                    except Exception as e:
+                        self.log(f"✗ {stage} failed for {context if stage != GENERATE else context['pr_id']}: {e}")
+                        if stage != GENERATE:
+                            # Not a verdict: the sample stays unverified for the next run
+                            self.unverified += 1
+                        continue
+
+                    if stage == GENERATE:
+                        sample_dir = result
+                        self._record(sample_dir, 'generated', candidate=context)
+                        self.log(f"Generated {sample_dir.name}, verifying...")
+                        pending[verify_pool.submit(self._verify, sample_dir)] = (VERIFY, sample_dir, 0)
+
+                    elif stage == VERIFY:
+                        success, output = result
+                        if not is_verdict(success, output):
+                            # No test ran (Gradle or infrastructure failure): nothing to repair.
+                            # The sample stays unverified and is verified again by the next run.
+                            self.unverified += 1
+                            self.log(f"⚠ {context.name}: no verdict, Gradle failed before running tests; "
+                                     "left unverified")
+                            continue
+                        if success or not self.use_llm or attempt >= self.args.max_repairs:
+                            self._finish(context, success, attempt)
+                            continue
+                        self.log(f"Verification failed for {context.name}, repair attempt {attempt + 1}...")
+                        pending[gen_pool.submit(self._repair, context, output, attempt + 1)] = \
+                            (REPAIR, context, attempt + 1)
+
+                    elif stage == REPAIR:
+                        if result:
+                            pending[verify_pool.submit(self._verify, context)] = (VERIFY, context, attempt)
+                        else:
+                            # Usually an LLM error (call_llm returns None): not a verdict on the sample
+                            self.log(f"Repair attempt {attempt} produced no test for {context.name}; left unverified")
+                            self.unverified += 1
+
+        return self.results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate samples, verify them right away and let the LLM repair failing tests'
+    )
+    generator.add_generation_arguments(parser)
+    parser.add_argument(
+        '--verify-workers',
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 2),
+        help='Number of samples verified concurrently (each runs a Gradle build)'
+    )
+    parser.add_argument(
+        '--fast',
+        action='store_true',
+        help='Verify in reusable workspaces backed by warm Gradle daemons (one per verify worker)'
+    )
+    parser.add_argument(
+        '--max-repairs',
+        type=int,
+        default=2,
+        help='Maximum number of LLM repair attempts per sample'
+    )
+    args = parser.parse_args()
+
+    if args.git_cache:
+        os.environ['GIT_OBJECT_CACHE'] = args.git_cache
+    budget_from_args(args)
+
+    framework_src = SCRIPT_DIR / 'gradle-testkit-framework'
+    output_dir = Path(args.output)
+    catalog = PipelineCatalog(args.catalog) if args.catalog else None
+    selected = generator.load_selected_candidates(args, catalog)
+
+    # Resume: skip verified samples, verify generated-but-unverified ones
+    generator.remove_partial_samples(output_dir)
+    to_generate, unverified, done = [], [], 0
+    for candidate in selected:
+        sample_dir = output_dir / generator.sample_name_for(candidate)
+        if args.force or not sample_dir.exists():
+            to_generate.append(candidate)
+        elif read_result(sample_dir) is None:
+            unverified.append(sample_dir)
+        else:
+            done += 1
+    if done:
+        print(f"Skipping {done} already verified samples (use --force to regenerate)")
+
+    blob_fetcher = generator.create_blob_fetcher(args, to_generate)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    pool = testkit_pool = None
+    if args.fast:
+        print(f"Warming up {args.verify_workers} Gradle workspace(s)...")
+        pool = WorkspacePool(framework_src, SCRIPT_DIR / 'data' / 'workspaces', slots=args.verify_workers)
+    else:
+        print(f"Preparing {args.verify_workers} shared TestKit director(ies)...")
+        testkit_pool = TestKitPool(SCRIPT_DIR / 'data' / 'testkit', slots=args.verify_workers)
+        testkit_pool.prewarm(framework_src)
+
+    loop = ClosedLoop(args, framework_src, catalog=catalog, blob_fetcher=blob_fetcher, pool=pool,
+                      testkit_pool=testkit_pool)
+    results = loop.run(to_generate, unverified)
+
+    verified = sum(1 for success in results.values() if success)
+    print("\n" + "=" * 80)
+    print("CLOSED LOOP SUMMARY")
+    print("=" * 80)
+    print(f"Samples processed: {len(results)}")
+    print(f"Verified:          {verified} ✓ ({loop.repaired} after repair)")
+    print(f"Failed:            {len(results) - verified} ✗")
+    if loop.unverified:
+        print(f"No verdict:        {loop.unverified} (no test results, or a verification or repair error; "
+              "verified again next run)")
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nInterrupted by user", file=sys.stderr)
+        sys.exit(130)
@@ -7,38 +7,92 @@ This script filters the mining results to find pairs where build scripts
 These pairs are candidates for SWE-bench-like sample generation.
 """
 
+import heapq
 import json
 import argparse
 import sys
+import tempfile
 from pathlib import Path
 
-
-BUILD_SCRIPT_PATTERNS = [
-    'build.gradle',
-    'build.gradle.kts',
-    'settings.gradle',
-    'settings.gradle.kts',
-    'libs.versions.toml',
-    'gradle.properties',
-    'gradle-wrapper.properties',
-]
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from build_files import classify_build_files, is_build_file
+from catalog import PipelineCatalog
 
 
 def is_build_script_file(filename):
     """Check if a file is a build script."""
-    filename_lower = filename.lower()
-    
-    # Check exact matches
-    for pattern in BUILD_SCRIPT_PATTERNS:
-        if filename_lower.endswith(pattern):
-            return True
-    
-    # Check for build-logic or buildSrc directories
-    if 'build-logic' in filename or 'buildsrc' in filename_lower:
-        if filename.endswith('.kt') or filename.endswith('.kts') or filename.endswith('.gradle'):
-            return True
-    
-    return False
+    return is_build_file(filename)
+
+
+def _pair_key(item):
+    return (item['pr_id'], item['bad_commit'], item['good_commit'])
+
+
+def _build_candidate(item, analyzed_item):
+    """
+    Build a candidate entry for a mined pair.
+
+    Returns None when analyzed data shows no build script was changed.
+    """
+    if analyzed_item is None:
+        # No analyzed data, include all pairs (will need manual filtering)
+        return {
+            'pr_id': item['pr_id'],
+            'pr_url': item['pr_url'],
+            'bad_commit': item['bad_commit'],
+            'bad_msg': item['bad_msg'],
+            'good_commit': item['good_commit'],
+            'good_msg': item['good_msg'],
+            'build_files_changed': None,  # Unknown
+            'all_files_changed': None,
+            'category': 'Unknown'
+        }
+
+    files_changed = analyzed_item.get('files_changed', [])
+
+    # Check if any build script was changed
+    build_files = list(classify_build_files(files_changed))
+    if not build_files:
+        return None
+
+    return {
+        'pr_id': item['pr_id'],
+        'pr_url': item['pr_url'],
+        'bad_commit': item['bad_commit'],
+        'bad_msg': item['bad_msg'],
+        'good_commit': item['good_commit'],
+        'good_msg': item['good_msg'],
+        'build_files_changed': build_files,
+        'all_files_changed': files_changed,
+        'category': analyzed_item.get('category', 'Unknown')
+    }
+
+
+class CandidateStats:
+    """Running statistics over the candidates written so far."""
+
+    def __init__(self):
+        self.total = 0
+        self.with_build_files = 0
+        self.file_types = {}
+
+    def add(self, candidate):
+        self.total += 1
+        if candidate['build_files_changed']:
+            self.with_build_files += 1
+            for f in candidate['build_files_changed']:
+                name = Path(f).name
+                self.file_types[name] = self.file_types.get(name, 0) + 1
+
+    def report(self, output_file):
+        print(f"Total pairs extracted: {self.total}")
+        print(f"Pairs with confirmed build script changes: {self.with_build_files}")
+        print(f"Output saved to: {output_file}")
+
+        if self.with_build_files > 0:
+            print("\nBuild file types found:")
+            for file_type, count in sorted(self.file_types.items(), key=lambda x: x[1], reverse=True):
+                print(f"  {file_type}: {count}")
 
 
 def extract_build_changes(input_file, output_file, analyzed_file=None):
@@ -60,76 +114,157 @@ def extract_build_changes(input_file, output_file, analyzed_file=None):
         with open(analyzed_file, 'r') as f:
             analyzed_results = json.load(f)
             for item in analyzed_results:
-                key = (item['pr_id'], item['bad_commit'], item['good_commit'])
-                analyzed_map[key] = item
+                analyzed_map[_pair_key(item)] = item
     
     candidates = []
+    stats = CandidateStats()
     
     for item in mining_results:
-        pr_id = item['pr_id']
-        bad_commit = item['bad_commit']
-        good_commit = item['good_commit']
-        
-        # Check if we have analyzed data with file changes
-        key = (pr_id, bad_commit, good_commit)
-        if key in analyzed_map:
-            analyzed_item = analyzed_map[key]
-            files_changed = analyzed_item.get('files_changed', [])
-            
-            # Check if any build script was changed
-            build_files = [f for f in files_changed if is_build_script_file(f)]
-            
-            if build_files:
-                candidate = {
-                    'pr_id': pr_id,
-                    'pr_url': item['pr_url'],
-                    'bad_commit': bad_commit,
-                    'bad_msg': item['bad_msg'],
-                    'good_commit': good_commit,
-                    'good_msg': item['good_msg'],
-                    'build_files_changed': build_files,
-                    'all_files_changed': files_changed,
-                    'category': analyzed_item.get('category', 'Unknown')
-                }
-                candidates.append(candidate)
-        else:
-            # No analyzed data, include all pairs (will need manual filtering)
-            candidate = {
-                'pr_id': pr_id,
-                'pr_url': item['pr_url'],
-                'bad_commit': bad_commit,
-                'bad_msg': item['bad_msg'],
-                'good_commit': good_commit,
-                'good_msg': item['good_msg'],
-                'build_files_changed': None,  # Unknown
-                'all_files_changed': None,
-                'category': 'Unknown'
-            }
+        candidate = _build_candidate(item, analyzed_map.get(_pair_key(item)))
+        if candidate:
             candidates.append(candidate)
+            stats.add(candidate)
     
     # Save candidates
     with open(output_file, 'w') as f:
         json.dump(candidates, f, indent=2)
     
-    # Print statistics
-    total = len(candidates)
-    with_build_files = len([c for c in candidates if c['build_files_changed']])
-    
-    print(f"Total pairs extracted: {total}")
-    print(f"Pairs with confirmed build script changes: {with_build_files}")
-    print(f"Output saved to: {output_file}")
-    
-    if with_build_files > 0:
-        print("\nBuild file types found:")
-        file_types = {}
-        for candidate in candidates:
-            if candidate['build_files_changed']:
-                for f in candidate['build_files_changed']:
-                    ext = Path(f).name
-                    file_types[ext] = file_types.get(ext, 0) + 1
-        
-        for file_type, count in sorted(file_types.items(), key=lambda x: x[1], reverse=True):
-            print(f"  {file_type}: {count}")
+    stats.report(output_file)
+
+
+def iter_jsonl(path):
+    """Yield one record per non-empty line of a JSONL file."""
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _sorted_by_key(records, tmp_dir, chunk_size):
+    """
+    Yield `records` sorted by pair key using an external merge sort.
+
+    At most `chunk_size` records are held in memory at a time; sorted runs are
+    spilled to JSONL files in `tmp_dir` and merged lazily.
+    """
+    run_paths = []
+    chunk = []
+
+    def spill():
+        chunk.sort(key=_pair_key)
+        run_path = Path(tmp_dir) / f"run_{len(run_paths):05d}.jsonl"
+        with open(run_path, 'w') as f:
+            for record in chunk:
+                f.write(json.dumps(record) + '\n')
+        run_paths.append(run_path)
+        chunk.clear()
+
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            spill()
+
+    if not run_paths:
+        # Everything fit in one chunk, no need to touch the disk
+        chunk.sort(key=_pair_key)
+        yield from chunk
+        return
+
+    if chunk:
+        spill()
+    yield from heapq.merge(*(iter_jsonl(p) for p in run_paths), key=_pair_key)
+
+
+def extract_build_changes_streaming(input_file, output_file, analyzed_file=None,
+                                    chunk_size=100000, tmp_dir=None):
+    """
+    Streaming variant of extract_build_changes with flat peak memory.
+
+    Both inputs are JSONL (one pair per line). Each side is sorted by
+    (pr_id, bad_commit, good_commit) with an external merge sort and the two
+    sorted streams are merge-joined, so no more than `chunk_size` records per
+    input are in memory at once. Candidates are written as JSONL in key order
+    (pr_id, then bad_commit, then good_commit), not in input order; pairs with
+    the same key keep their input order.
+
+    Args:
+        input_file: Path to mining_results.jsonl
+        output_file: Path to output candidates.jsonl
+        analyzed_file: Optional path to analyzed_results.jsonl for file change info
+        chunk_size: Records per in-memory sort run
+        tmp_dir: Directory for sort runs (default: system temp dir)
+    """
+    stats = CandidateStats()
+
+    with tempfile.TemporaryDirectory(prefix='extract_build_changes_', dir=tmp_dir) as tmp:
+        mining_dir = Path(tmp) / 'mining'
+        analyzed_dir = Path(tmp) / 'analyzed'
+        mining_dir.mkdir()
+        analyzed_dir.mkdir()
+
+        mining_sorted = _sorted_by_key(iter_jsonl(input_file), mining_dir, chunk_size)
+        if analyzed_file and Path(analyzed_file).exists():
+            analyzed_sorted = _sorted_by_key(iter_jsonl(analyzed_file), analyzed_dir, chunk_size)
+        else:
+            analyzed_sorted = iter(())
+
+        analyzed_item = next(analyzed_sorted, None)
+        current_key, current_match = None, None
+
+        with open(output_file, 'w') as out:
+            for item in mining_sorted:
+                key = _pair_key(item)
+
+                if key != current_key:
+                    # Advance the analyzed side up to this key. When a key appears
+                    # more than once, the last record wins, as in the in-memory join.
+                    current_key, current_match = key, None
+                    while analyzed_item is not None and _pair_key(analyzed_item) <= key:
+                        if _pair_key(analyzed_item) == key:
+                            current_match = analyzed_item
+                        analyzed_item = next(analyzed_sorted, None)
+
+                candidate = _build_candidate(item, current_match)
+                if candidate:
+                    out.write(json.dumps(candidate) + '\n')
+                    stats.add(candidate)
+                    if stats.total % 100000 == 0:
+                        print(f"  ... {stats.total} candidates written "
+                              f"({stats.with_build_files} with build script changes)")
+
+    stats.report(output_file)
+
+
+def extract_build_changes_from_catalog(catalog_path, output_file, repo=None):
+    """
+    Extract candidates from a pipeline catalog.
+
+    The join between mined and analyzed pairs is done by SQLite over indexed
+    tables instead of in Python dicts.
+
+    Args:
+        catalog_path: Path to the pipeline catalog database
+        output_file: Path to output candidates.json (JSONL if it ends with .jsonl)
+        repo: Optional owner/name to restrict to one repository
+    """
+    catalog = PipelineCatalog(catalog_path)
+    stats = CandidateStats()
+    jsonl = str(output_file).endswith('.jsonl')
+
+    with open(output_file, 'w') as out:
+        if not jsonl:
+            out.write('[')
+        for candidate in catalog.iter_candidates(repo):
+            if jsonl:
+                out.write(json.dumps(candidate) + '\n')
+            else:
+                out.write((',\n' if stats.total else '\n') + json.dumps(candidate, indent=2))
+            stats.add(candidate)
+        if not jsonl:
+            out.write('\n]\n' if stats.total else ']\n')
+
+    stats.report(output_file)
 
 
 def main():
@@ -151,14 +286,48 @@ def main():
         default='candidates.json',
         help='Output file for candidates (default: candidates.json)'
     )
+    parser.add_argument(
+        '--catalog',
+        default=None,
+        help='Read pairs from this pipeline catalog instead of --input/--analyzed'
+    )
+    parser.add_argument(
+        '--repo',
+        default=None,
+        help='Restrict --catalog extraction to one repository (owner/name)'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Read JSONL inputs and write JSONL candidates with flat memory usage'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=100000,
+        help='Records per in-memory sort run in --stream mode (default: 100000)'
+    )
+    parser.add_argument(
+        '--tmp-dir',
+        default=None,
+        help='Directory for sort runs in --stream mode (default: system temp dir)'
+    )
     
     args = parser.parse_args()
+
+    if args.catalog:
+        extract_build_changes_from_catalog(args.catalog, args.output, args.repo)
+        return
     
     if not Path(args.input).exists():
         print(f"Error: Input file not found: {args.input}", file=sys.stderr)
         sys.exit(1)
     
-    extract_build_changes(args.input, args.output, args.analyzed)
+    if args.stream:
+        extract_build_changes_streaming(args.input, args.output, args.analyzed,
+                                        chunk_size=args.chunk_size, tmp_dir=args.tmp_dir)
+    else:
+        extract_build_changes(args.input, args.output, args.analyzed)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Batched GraphQL fetcher for build script contents.
+
+Instead of one REST contents request (plus base64 decoding) per file per
+commit, file versions are fetched many at a time with aliased GraphQL
+lookups, one request per batch:
+
+    r0: repository(owner: "...", name: "...") {
+        f0: object(expression: "<sha>:<path>") { ... on Blob { oid text isBinary isTruncated } }
+        ...
+    }
+
+Each "<sha>:<path>" expression is recorded with its blob oid in an index
+(cached forever since commits are immutable), and the text is stored in a
+content-addressed cache by that oid, so a build file that is identical across
+commits or candidates is stored once and never requested again.
+"""
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+import requests
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+
+def _literal(value):
+    """Quote a string for inline use in a GraphQL document."""
+    return json.dumps(value)
+
+
+class BlobFetcher:
+    def __init__(self, cache_dir, token=None, batch_size=50, budget=None):
+        """
+        Args:
+            cache_dir: Directory for the blob cache and the expression index
+            token: GitHub token (GraphQL requires authentication)
+            batch_size: Maximum number of aliased lookups per request
+            budget: Optional run budget (budget.py) charged per request
+        """
+        self.cache_dir = Path(cache_dir)
+        self.blob_dir = self.cache_dir / 'blobs'
+        self.index_path = self.cache_dir / 'index.json'
+        self.token = token or os.environ.get('GITHUB_TOKEN')
+        self.batch_size = batch_size
+        self.budget = budget
+        self._lock = threading.RLock()
+
+        # "owner/repo@sha:path" -> blob oid, or None if the file does not exist
+        self.index = {}
+        if self.index_path.exists():
+            with open(self.index_path, 'r') as f:
+                self.index = json.load(f)
+
+    @staticmethod
+    def _key(owner, repo, sha, path):
+        return f"{owner}/{repo}@{sha}:{path}"
+
+    def _blob_path(self, oid):
+        return self.blob_dir / oid[:2] / oid[2:]
+
+    def _query(self, query):
+        response = requests.post(
+            GRAPHQL_URL,
+            json={'query': query},
+            headers={'Authorization': f'Bearer {self.token}'},
+            timeout=60
+        )
+        if self.budget is not None:
+            self.budget.charge('graphql_points')
+        response.raise_for_status()
+        data = response.json()
+        errors = data.get('errors') or []
+        if errors:
+            print(f"GraphQL errors while fetching blobs: {errors}", file=sys.stderr)
+        return data.get('data') or {}, errors
+
+    def _batched_query(self, items, field_for):
+        """
+        Run aliased lookups for `items` ((owner, repo, arg) tuples) in batches.
+
+        Yields (item, object) for each lookup, where object is the GraphQL
+        result for `field_for(arg)` (or None). Lookups that failed (an error
+        for their alias in a partial response) are not yielded.
+        """
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+
+            by_repo = {}
+            for i, (owner, repo, arg) in enumerate(batch):
+                by_repo.setdefault((owner, repo), []).append((i, arg))
+
+            parts = []
+            repo_aliases = {}
+            for r, ((owner, repo), lookups) in enumerate(by_repo.items()):
+                repo_aliases[f"r{r}"] = lookups
+                fields = ' '.join(f"f{i}: {field_for(arg)}" for i, arg in lookups)
+                parts.append(f"r{r}: repository(owner: {_literal(owner)}, name: {_literal(repo)}) {{ {fields} }}")
+
+            data, errors = self._query("query { " + ' '.join(parts) + " }")
+            failed = {tuple(error['path'][:2]) for error in errors if len(error.get('path') or []) >= 2}
+            for alias, lookups in repo_aliases.items():
+                repo_data = data.get(alias)
+                if repo_data is None:
+                    # Repository lookup failed, leave these unresolved
+                    continue
+                for i, _ in lookups:
+                    # A null next to an error is a failed lookup, not a missing file
+                    if (alias, f"f{i}") not in failed:
+                        yield batch[i], repo_data.get(f"f{i}")
+
+    def prefetch(self, files):
+        """
+        Fetch many file versions in as few requests as possible.
+
+        Args:
+            files: Iterable of (owner, repo, commit_sha, path) tuples
+        """
+        if not self.token:
+            return
+
+        files = list(files)
+        with self._lock:
+            self._prefetch(files)
+
+    def _prefetch(self, files):
+        # Expressions never resolved, or resolved to a blob whose text is not cached
+        wanted = []
+        seen = set()
+        for owner, repo, sha, path in files:
+            key = self._key(owner, repo, sha, path)
+            if key in seen or (key in self.index and self._cached(self.index[key])):
+                continue
+            seen.add(key)
+            wanted.append((owner, repo, (sha, path)))
+
+        if not wanted:
+            return
+
+        field = lambda arg: (f"object(expression: {_literal(arg[0] + ':' + arg[1])}) "
+                             "{ ... on Blob { oid text isBinary isTruncated } }")
+        try:
+            for (owner, repo, (sha, path)), obj in self._batched_query(wanted, field):
+                oid = obj.get('oid') if obj else None
+                self.index[self._key(owner, repo, sha, path)] = oid
+                if oid and obj.get('text') is not None and not obj.get('isTruncated') and not self._cached(oid):
+                    self._store_blob(oid, obj['text'])
+        except requests.RequestException as e:
+            print(f"Error fetching blobs via GraphQL: {e}", file=sys.stderr)
+        self._save_index()
+
+    def _cached(self, oid):
+        """True if there is nothing left to fetch for an index entry."""
+        return oid is None or self._blob_path(oid).exists()
+
+    def get(self, owner, repo, sha, path):
+        """
+        Return the content of `path` at `sha`, fetching it if needed.
+
+        Returns None if the file does not exist or could not be fetched (for
+        example binary or truncated blobs), so callers can fall back to REST.
+        """
+        key = self._key(owner, repo, sha, path)
+        if key not in self.index:
+            self.prefetch([(owner, repo, sha, path)])
+
+        oid = self.index.get(key)
+        if not oid:
+            return None
+        blob_path = self._blob_path(oid)
+        if not blob_path.exists():
+            return None
+        return blob_path.read_text(encoding='utf-8')
+
+    def _store_blob(self, oid, text):
+        blob_path = self._blob_path(oid)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = blob_path.with_name(f"{blob_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(text, encoding='utf-8')
+        os.replace(tmp_path, blob_path)
+
+    def _save_index(self):
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_name(f"index.json.{os.getpid()}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(self.index, f)
+            os.replace(tmp_path, self.index_path)
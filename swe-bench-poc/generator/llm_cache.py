@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Persistent cache and usage log for LLM responses.
+
+Responses are stored one JSON file per key under the cache directory, where
+the key is a hash of the model, the prompt template version and the rendered
+prompt. A prompt that was answered once is never sent again, across runs and
+across the worker threads of one run: concurrent callers asking for the same
+key wait for the first one instead of issuing a duplicate request.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+
+def prompt_key(prompt, model, template_version):
+    """Cache key for one completion request."""
+    h = hashlib.sha256()
+    for part in (model, template_version, prompt):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, cache_dir):
+        """
+        Args:
+            cache_dir: Directory holding one <key>.json file per cached response
+        """
+        self.cache_dir = Path(cache_dir)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key[2:]}.json"
+
+    def _lock_for(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key):
+        """Return the cached response text for `key`, or None."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)['response']
+
+    def put(self, key, response, model=None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({'model': model, 'response': response}, f)
+        os.replace(tmp_path, path)
+
+    def get_or_compute(self, key, compute, model=None):
+        """
+        Return the cached response for `key`, calling `compute()` on a miss.
+
+        Failed calls (compute returning None) are not cached, so they are
+        retried on the next run.
+        """
+        with self._lock_for(key):
+            response = self.get(key)
+            if response is not None:
+                return response
+            response = compute()
+            if response is not None:
+                self.put(key, response, model=model)
+            return response
+
+
+class UsageLog:
+    """Appends one JSON line of token usage per LLM call."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(self, entry):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
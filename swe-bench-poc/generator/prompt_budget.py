@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Token budgeting for the variable part of test generation prompts.
+
+The static instruction block of the prompt is sent as a cacheable prefix; only
+the task description and the build script diff vary per sample. Those are
+trimmed here to a token budget. Diffs are reduced in a build-file-aware way:
+first unchanged context far away from any change is dropped (keeping the
+enclosing block headers such as `dependencies {` so the model still sees where
+a change lives), then whole hunks are dropped starting with the ones that
+touch the fewest build-relevant lines.
+
+Token counts are estimated (about four characters per token), which is close
+enough for budgeting and needs no tokenizer download.
+"""
+
+import re
+
+CHARS_PER_TOKEN = 4
+
+# Lines that carry build semantics; hunks touching them are kept first
+BUILD_KEYWORDS = re.compile(
+    r'\b(plugins|dependencies|implementation|api|compileOnly|runtimeOnly|testImplementation|'
+    r'kapt|ksp|classpath|id|version|versions|libraries|bundles|android|kotlin|java|'
+    r'toolchain|jvmTarget|sourceCompatibility|targetCompatibility|compileSdk|minSdk|targetSdk|'
+    r'tasks|register|repositories|maven|alias|libs|include|distributionUrl)\b'
+)
+# Lines that open a block, e.g. `dependencies {` or `[versions]`
+BLOCK_HEADER = re.compile(r'^[ +-]?\s*(\S.*\{\s*$|\[[\w.-]+\]\s*$)')
+
+
+def estimate_tokens(text):
+    """Rough token count of `text`."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text, budget, marker='\n[... truncated ...]\n'):
+    """Cut `text` to roughly `budget` tokens, keeping the beginning."""
+    if estimate_tokens(text) <= budget:
+        return text
+    keep = max(0, budget * CHARS_PER_TOKEN - len(marker))
+    return text[:keep] + marker
+
+
+# Lines of Gradle/JUnit output worth showing to the model when a test failed
+BUILD_OUTPUT_SIGNAL = re.compile(
+    r'(FAILED|PASSED|Exception|Error|error:|^e: |What went wrong|expected|but was|assert|'
+    r'Could not|Cannot|Unresolved|not found|BUILD |Original|Modified|Verification|> Task :test|'
+    r'BuildScriptTest)'
+)
+
+
+def summarize_build_output(output, budget):
+    """
+    Reduce Gradle/JUnit output to about `budget` tokens.
+
+    Keeps the lines that carry failure information (assertion messages,
+    exceptions, "What went wrong", test results) plus the line after each
+    of them, and drops progress noise and stack frames of the build tool.
+    """
+    if estimate_tokens(output) <= budget:
+        return output
+    lines = output.splitlines()
+    keep = set()
+    for i, line in enumerate(lines):
+        if BUILD_OUTPUT_SIGNAL.search(line) and not line.lstrip().startswith('at org.gradle.'):
+            keep.update((i, i + 1))
+    summary = '\n'.join(lines[i] for i in sorted(keep) if i < len(lines))
+    return truncate_to_tokens(summary, budget)
+
+
+def split_hunks(diff):
+    """Split a unified diff into (header_lines, [hunk_lines, ...])."""
+    header, hunks = [], []
+    for line in diff.splitlines():
+        if line.startswith('@@'):
+            hunks.append([line])
+        elif hunks:
+            hunks[-1].append(line)
+        else:
+            header.append(line)
+    return header, hunks
+
+
+def _is_change(line):
+    return line[:1] in ('+', '-') and not line.startswith(('+++', '---'))
+
+
+def _trim_context(hunk, context):
+    """
+    Drop context lines further than `context` lines from any change, but keep
+    unchanged block headers that enclose a change.
+    """
+    body = hunk[1:]
+    changed = [i for i, line in enumerate(body) if _is_change(line)]
+    keep = set()
+    for i in changed:
+        keep.update(range(max(0, i - context), min(len(body), i + context + 1)))
+
+    # Keep the nearest open block header above each group of changes
+    for i in changed:
+        for j in range(i - 1, -1, -1):
+            if j in keep:
+                continue
+            if not _is_change(body[j]) and BLOCK_HEADER.match(body[j]):
+                keep.add(j)
+                break
+
+    result = [hunk[0]]
+    skipped = False
+    for i, line in enumerate(body):
+        if i in keep:
+            result.append(line)
+            skipped = False
+        elif not skipped:
+            result.append(' ...')
+            skipped = True
+    return result
+
+
+def _hunk_relevance(hunk):
+    return sum(1 for line in hunk[1:] if _is_change(line) and BUILD_KEYWORDS.search(line))
+
+
+def _omitted_note(count):
+    return f'[... {count} less relevant hunk(s) omitted ...]'
+
+
+def reduce_diff(diff, budget, context=3):
+    """
+    Reduce a unified diff (or a GitHub `patch` field) to about `budget` tokens.
+
+    Returns the diff unchanged if it already fits.
+    """
+    if estimate_tokens(diff) <= budget:
+        return diff
+
+    header, hunks = split_hunks(diff)
+    if not hunks:
+        return truncate_to_tokens(diff, budget)
+
+    # 1. Shrink context, progressively
+    for ctx in sorted({context, 1, 0}, reverse=True):
+        trimmed = [_trim_context(hunk, ctx) for hunk in hunks]
+        text = '\n'.join(header + [line for hunk in trimmed for line in hunk])
+        if estimate_tokens(text) <= budget:
+            return text
+
+    # 2. Keep the most build-relevant hunks that fit, in their original order
+    order = sorted(range(len(trimmed)), key=lambda i: (-_hunk_relevance(trimmed[i]), i))
+    # Reserve room for the "hunks omitted" note
+    used = estimate_tokens('\n'.join(header)) + estimate_tokens(_omitted_note(len(trimmed))) + 1
+    selected = set()
+    for i in order:
+        cost = estimate_tokens('\n'.join(trimmed[i])) + 1
+        if used + cost <= budget:
+            selected.add(i)
+            used += cost
+
+    if not selected:
+        # Not even one hunk fits: hard-truncate the most relevant one
+        return truncate_to_tokens('\n'.join(header + trimmed[order[0]]), budget)
+
+    omitted = len(trimmed) - len(selected)
+    lines = list(header)
+    for i in sorted(selected):
+        lines.extend(trimmed[i])
+    if omitted:
+        lines.append(_omitted_note(omitted))
+    return '\n'.join(lines)
@@ -8,21 +8,120 @@ that fail on O and pass on M.
 
 import json
 import argparse
+import hashlib
+import shutil
 import sys
 import os
-from cmath import inf
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 import requests
 from litellm import completion
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from budget import Budget, BudgetExhausted, add_budget_arguments, budget_from_args
+from catalog import PipelineCatalog
+from git_objects import GitError, open_repo
+from blob_fetcher import BlobFetcher
+from llm_cache import LLMResponseCache, UsageLog, prompt_key
+from prompt_budget import estimate_tokens, reduce_diff, summarize_build_output, truncate_to_tokens
 
-def load_prompt_template():
-    """Load the LLM prompt template."""
-    prompt_path = Path(__file__).parent / 'prompts' / 'gradle_test_generation.txt'
+# Heading that starts the per-sample part of the prompt template; everything
+# before it is static and sent as a cacheable prefix.
+TASK_SECTION = '## Task Description'
+
+# Default token budget for the per-sample part (task description + diff)
+DEFAULT_TOKEN_BUDGET = 6000
+
+
+@lru_cache(maxsize=None)
+def load_prompt_template(name='gradle_test_generation.txt'):
+    """Load an LLM prompt template (read from disk once per process)."""
+    prompt_path = Path(__file__).parent / 'prompts' / name
     with open(prompt_path, 'r') as f:
         return f.read()
 
 
+def split_prompt_template(template):
+    """Split the template into its static prefix and the per-sample part."""
+    index = template.find(TASK_SECTION)
+    if index == -1:
+        return '', template
+    return template[:index].rstrip() + '\n', template[index:]
+
+
+def build_messages(task_description, diff, token_budget=DEFAULT_TOKEN_BUDGET, prompt_cache=True, repair=None):
+    """
+    Build the chat messages for one sample.
+
+    The static instructions go into a system message marked with
+    `cache_control` so providers that support prompt caching (Anthropic via
+    litellm; OpenAI caches identical prefixes automatically) only process them
+    once. The task description and diff are trimmed to `token_budget` tokens
+    and sent as the user message.
+
+    For a repair request, `repair` is a dict with `previous_test`,
+    `verification_output` and `attempt`; the user message then comes from the
+    repair template and includes a summary of the failed verification run.
+    """
+    static_prefix, task_template = split_prompt_template(load_prompt_template())
+
+    # The task description is short; give the diff whatever it leaves over
+    task_description = truncate_to_tokens(task_description, token_budget // 4)
+    diff_budget = max(1, token_budget - estimate_tokens(task_description))
+
+    if repair is not None:
+        task_template = load_prompt_template('gradle_test_repair.txt')
+        verification_output = summarize_build_output(repair['verification_output'], token_budget // 4)
+        diff_budget = max(1, diff_budget - estimate_tokens(verification_output))
+        task_template = (task_template
+                         .replace('{attempt}', str(repair['attempt']))
+                         .replace('{previous_test}', repair['previous_test'])
+                         .replace('{verification_output}', verification_output))
+
+    diff = reduce_diff(diff, diff_budget)
+
+    user_content = task_template.replace('{task_description}', task_description).replace('{diff}', diff)
+    messages = [{'role': 'user', 'content': user_content}]
+    if static_prefix:
+        system_block = {'type': 'text', 'text': static_prefix}
+        if prompt_cache:
+            system_block['cache_control'] = {'type': 'ephemeral'}
+        messages.insert(0, {'role': 'system', 'content': [system_block]})
+    return messages
+
+
+def _usage_entry(usage):
+    """Token counts from a litellm usage object, including prompt cache hits."""
+    if usage is None:
+        return {}
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+        'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+        'completion_tokens': getattr(usage, 'completion_tokens', None),
+        'cached_tokens': getattr(details, 'cached_tokens', None) if details else None,
+        'cache_creation_input_tokens': getattr(usage, 'cache_creation_input_tokens', None),
+        'cache_read_input_tokens': getattr(usage, 'cache_read_input_tokens', None),
+    }
+
+
+def _charge(resource, amount=1):
+    """Account consumption against the run budget, if one is set (budget.py)."""
+    budget = Budget.from_env()
+    if budget is not None:
+        budget.charge(resource, amount)
+
+
+def template_version(template=None):
+    """Short hash of the prompt templates, part of the LLM cache key."""
+    if template is None:
+        template = load_prompt_template() + load_prompt_template('gradle_test_repair.txt')
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:12]
+
+
 def get_commit_diff(repo_url, bad_commit, good_commit, file_path):
     """
     Fetch the diff for a specific file between two commits.
@@ -39,6 +138,14 @@ def get_commit_diff(repo_url, bad_commit, good_commit, file_path):
     parts = repo_url.rstrip('/').split('/')
     owner, repo = parts[-2], parts[-1]
 
+    # Prefer the local git object cache when one is configured
+    local_repo = open_repo(owner, repo)
+    if local_repo is not None:
+        try:
+            return local_repo.file_patch(bad_commit, good_commit, file_path)
+        except GitError as e:
+            print(f"Local git diff failed, falling back to GitHub API: {e}", file=sys.stderr)
+
     # GitHub API endpoint for comparing commits
     api_url = f"https://api.github.com/repos/{owner}/{repo}/compare/{bad_commit}...{good_commit}"
 
@@ -49,6 +156,7 @@ def get_commit_diff(repo_url, bad_commit, good_commit, file_path):
 
     try:
         response = requests.get(api_url, headers=headers)
+        _charge('rest_calls')
         response.raise_for_status()
         data = response.json()
 
@@ -78,6 +186,14 @@ def get_file_content(repo_url, commit_sha, file_path):
     parts = repo_url.rstrip('/').split('/')
     owner, repo = parts[-2], parts[-1]
 
+    # Prefer the local git object cache when one is configured
+    local_repo = open_repo(owner, repo)
+    if local_repo is not None:
+        try:
+            return local_repo.file_at(commit_sha, file_path)
+        except GitError as e:
+            print(f"Local git read failed, falling back to GitHub API: {e}", file=sys.stderr)
+
     # GitHub API endpoint for file content at specific commit
     api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{file_path}?ref={commit_sha}"
 
@@ -88,6 +204,7 @@ def get_file_content(repo_url, commit_sha, file_path):
 
     try:
         response = requests.get(api_url, headers=headers)
+        _charge('rest_calls')
         response.raise_for_status()
         data = response.json()
 
@@ -100,7 +217,57 @@ def get_file_content(repo_url, commit_sha, file_path):
         return None
 
 
-def generate_test_with_llm(task_description, diff, api_key=None):
+def _split_repo_url(repo_url):
+    parts = repo_url.rstrip('/').split('/')
+    return parts[-2], parts[-1]
+
+
+def read_build_file(repo_url, commit_sha, file_path, blob_fetcher=None):
+    """
+    Read a build file at a commit, preferring the batched GraphQL blob cache.
+
+    Falls back to get_file_content (local git objects or the REST contents
+    API) when no fetcher is given or the blob could not be fetched.
+    """
+    if blob_fetcher is not None:
+        owner, repo = _split_repo_url(repo_url)
+        content = blob_fetcher.get(owner, repo, commit_sha, file_path)
+        if content is not None:
+            return content
+    return get_file_content(repo_url, commit_sha, file_path)
+
+
+def prefetch_build_files(candidates, blob_fetcher):
+    """
+    Fetch the O and M versions of every changed build file of `candidates`
+    with batched GraphQL requests.
+    """
+    files = []
+    for candidate in candidates:
+        owner, repo = _split_repo_url('/'.join(candidate['pr_url'].split('/')[:5]))
+        for build_file in candidate.get('build_files_changed') or []:
+            files.append((owner, repo, candidate['bad_commit'], build_file))
+            files.append((owner, repo, candidate['good_commit'], build_file))
+    print(f"Prefetching {len(files)} build file versions via GraphQL...")
+    blob_fetcher.prefetch(files)
+
+
+def extract_code(text):
+    """Extract Java code from a markdown LLM response."""
+    if '```java' in text:
+        start = text.find('```java') + 7
+        end = text.find('```', start)
+        return text[start:end].strip()
+    elif '```' in text:
+        start = text.find('```') + 3
+        end = text.find('```', start)
+        return text[start:end].strip()
+    else:
+        return text.strip()
+
+
+def generate_test_with_llm(task_description, diff, api_key=None, cache=None, usage_log=None,
+                           token_budget=DEFAULT_TOKEN_BUDGET, prompt_cache=True, label=None, repair=None):
     """
     Generate test using LLM via litellm.
     
@@ -108,6 +275,13 @@ def generate_test_with_llm(task_description, diff, api_key=None):
         task_description: Description of the task/fix
         diff: The build script diff
         api_key: Litellm API key (optional, can use LITELLM_API_KEY env var)
+        cache: Optional LLMResponseCache; identical prompts are only sent once
+        usage_log: Optional UsageLog receiving token usage of each call
+        token_budget: Token budget for the task description and diff
+        prompt_cache: Mark the static prompt prefix for provider-side caching
+        label: Name recorded with the usage entry (e.g. the sample name)
+        repair: Optional repair context for build_messages (previous test and
+            verification output), to fix a test that failed verification
     
     Returns:
         Generated test code or None
@@ -121,41 +295,89 @@ def generate_test_with_llm(task_description, diff, api_key=None):
 
     litellm_base_url = os.environ.get('LITE_LLM_URL') or os.environ.get('LITELLM_BASE_URL')
 
-    prompt_template = load_prompt_template()
-    prompt = prompt_template.replace('{task_description}', task_description).replace('{diff}', diff)
+    messages = build_messages(task_description, diff, token_budget=token_budget, prompt_cache=prompt_cache,
+                              repair=repair)
+    model = os.environ.get('LLM_MODEL', 'anthropic/claude-sonnet-4-5')
+
+    def call_llm():
+        try:
+            # Prepare completion arguments
+            completion_args = {
+                'model': model,
+                'messages': messages
+            }
+
+            # Add base_url and api_key if custom URL is provided
+            if litellm_base_url:
+                completion_args['base_url'] = litellm_base_url
+                completion_args['api_key'] = os.environ.get('LITELLM_API_KEY')
+
+            started = time.time()
+            response = completion(**completion_args)
+            usage = _usage_entry(getattr(response, 'usage', None))
+            _charge('llm_tokens', (usage.get('prompt_tokens') or 0) + (usage.get('completion_tokens') or 0))
+            if usage_log is not None:
+                entry = {'sample': label, 'model': model, 'seconds': round(time.time() - started, 3)}
+                entry.update(usage)
+                usage_log.record(entry)
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"Error calling LLM via litellm: {e}", file=sys.stderr)
+            return None
+
+    if cache is not None:
+        prompt = '\0'.join(json.dumps(m['content'], sort_keys=True) for m in messages)
+        key = prompt_key(prompt, model, template_version())
+        text = cache.get_or_compute(key, call_llm, model=model)
+    else:
+        text = call_llm()
 
-    try:
-        model = os.environ.get('LLM_MODEL', 'anthropic/claude-sonnet-4-5')
+    if text is None:
+        return None
+    return extract_code(text)
 
-        # Prepare completion arguments
-        completion_args = {
-            'model': model,
-            'messages': [{"role": "user", "content": prompt}]
-        }
 
-        # Add base_url and api_key if custom URL is provided
-        if litellm_base_url:
-            completion_args['base_url'] = litellm_base_url
-            completion_args['api_key'] = os.environ.get('LITELLM_API_KEY')
-
-        response = completion(**completion_args)
-        text = response.choices[0].message.content
-
-        # Extract Java code from markdown if present
-        if '```java' in text:
-            start = text.find('```java') + 7
-            end = text.find('```', start)
-            return text[start:end].strip()
-        elif '```' in text:
-            start = text.find('```') + 3
-            end = text.find('```', start)
-            return text[start:end].strip()
-        else:
-            return text.strip()
+def repair_sample_test(sample_dir, verification_output, attempt, cache=None, usage_log=None,
+                       token_budget=DEFAULT_TOKEN_BUDGET, prompt_cache=True):
+    """
+    Ask the LLM to fix the verification test of a sample that failed verification.
 
-    except Exception as e:
-        print(f"Error calling LLM via litellm: {e}", file=sys.stderr)
-        return None
+    The previous test and the verification output are kept under
+    `attempts/` in the sample directory, and the repaired test replaces
+    `verification/BuildScriptTest.java`.
+
+    Returns:
+        True if a repaired test was written
+    """
+    sample_dir = Path(sample_dir)
+    test_path = sample_dir / 'verification' / 'BuildScriptTest.java'
+    diff_path = sample_dir / 'change.diff'
+    if not test_path.exists() or not diff_path.exists():
+        return False
+    budget = Budget.from_env()
+    if budget is not None:
+        budget.check()
+
+    previous_test = test_path.read_text()
+    attempts_dir = sample_dir / 'attempts'
+    attempts_dir.mkdir(exist_ok=True)
+    (attempts_dir / f'attempt_{attempt}.java').write_text(previous_test)
+    (attempts_dir / f'attempt_{attempt}.log').write_text(verification_output)
+
+    test_code = generate_test_with_llm(
+        (sample_dir / 'task_description.md').read_text(),
+        diff_path.read_text(),
+        cache=cache, usage_log=usage_log, token_budget=token_budget, prompt_cache=prompt_cache,
+        label=sample_dir.name,
+        repair={'previous_test': previous_test, 'verification_output': verification_output, 'attempt': attempt}
+    )
+    if not test_code:
+        return False
+
+    tmp_path = test_path.with_suffix('.java.tmp')
+    tmp_path.write_text(test_code)
+    os.replace(tmp_path, test_path)
+    return True
 
 
 def generate_test_from_template(change_type, diff):
@@ -215,18 +437,67 @@ public class BuildScriptVerificationTest {
     return template
 
 
-def generate_sample(candidate, output_dir, use_llm=True):
+def sample_name_for(candidate):
+    return f"{candidate['pr_id']}_{candidate['bad_commit'][:7]}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def remove_partial_samples(output_dir):
+    """
+    Delete temporary sample directories left behind by an interrupted run.
+
+    Directories of processes that are still running (another generator or
+    closed_loop.py writing to the same output directory) are kept.
+    """
+    output_dir = Path(output_dir)
+    if not output_dir.is_dir():
+        return
+    for item in output_dir.glob('.*.tmp-*'):
+        match = re.search(r'\.tmp-(\d+)-\d+$', item.name)
+        if match and _pid_alive(int(match.group(1))):
+            continue
+        if item.is_dir():
+            shutil.rmtree(item, ignore_errors=True)
+
+
+def generate_sample(candidate, output_dir, use_llm=True, blob_fetcher=None, llm_cache=None,
+                    usage_log=None, token_budget=DEFAULT_TOKEN_BUDGET, prompt_cache=True):
     """
     Generate a complete sample for a candidate.
+
+    The sample is written to a temporary directory next to its final location
+    and renamed into place once complete, so an interrupted run never leaves a
+    half-written sample behind.
     
     Args:
         candidate: Candidate dict with PR and commit info
         output_dir: Output directory for the samples
         use_llm: Whether to use LLM for test generation
+        blob_fetcher: Optional BlobFetcher used to read build file contents
+        llm_cache: Optional LLMResponseCache for LLM responses
+        usage_log: Optional UsageLog for per-call token usage
+        token_budget: Token budget for the task description and diff in the prompt
+        prompt_cache: Mark the static prompt prefix for provider-side caching
     """
-    pr_id = candidate['pr_id']
-    sample_name = f"{pr_id}_{candidate['bad_commit'][:7]}"
-    sample_dir = Path(output_dir) / sample_name
+    # Checkpoint: samples not started once the run budget is used up wait for the next run
+    budget = Budget.from_env()
+    if budget is not None:
+        budget.check()
+
+    sample_name = sample_name_for(candidate)
+    final_dir = Path(output_dir) / sample_name
+    sample_dir = Path(output_dir) / f".{sample_name}.tmp-{os.getpid()}-{threading.get_ident()}"
+    if sample_dir.exists():
+        shutil.rmtree(sample_dir)
 
     # Create directory structure
     (sample_dir / 'original').mkdir(parents=True, exist_ok=True)
@@ -275,9 +546,16 @@ Fix the build script issue identified in the bad commit.
             build_file
         )
 
+        if diff:
+            # Kept for repairs of the verification test
+            with open(sample_dir / 'change.diff', 'w') as f:
+                f.write(diff)
+
         if diff and use_llm:
             # Generate test with LLM
-            test_code = generate_test_with_llm(task_desc, diff)
+            test_code = generate_test_with_llm(task_desc, diff, cache=llm_cache, usage_log=usage_log,
+                                               token_budget=token_budget, prompt_cache=prompt_cache,
+                                               label=sample_name)
 
             if test_code:
                 with open(sample_dir / 'verification' / 'BuildScriptTest.java', 'w') as f:
@@ -302,7 +580,7 @@ Fix the build script issue identified in the bad commit.
         repo_url = '/'.join(candidate['pr_url'].split('/')[:5])
         
         # Fetch original (bad) build script
-        original_content = get_file_content(repo_url, candidate['bad_commit'], build_file)
+        original_content = read_build_file(repo_url, candidate['bad_commit'], build_file, blob_fetcher)
         with open(sample_dir / 'original' / 'build.gradle.kts', 'w') as f:
             if original_content:
                 f.write(original_content)
@@ -311,13 +589,22 @@ Fix the build script issue identified in the bad commit.
                 f.write(f"// Failed to fetch content from GitHub for {build_file}\n")
         
         # Fetch modified (good) build script
-        modified_content = get_file_content(repo_url, candidate['good_commit'], build_file)
+        modified_content = read_build_file(repo_url, candidate['good_commit'], build_file, blob_fetcher)
         with open(sample_dir / 'modified' / 'build.gradle.kts', 'w') as f:
             if modified_content:
                 f.write(modified_content)
             else:
                 f.write(f"// Modified build script from commit {candidate['good_commit']}\n")
                 f.write(f"// Failed to fetch content from GitHub for {build_file}\n")
+
+        # Keep the other changed build files for context, under files/<path>
+        for other_file in candidate['build_files_changed'][1:]:
+            for variant, commit in (('original', candidate['bad_commit']), ('modified', candidate['good_commit'])):
+                content = read_build_file(repo_url, commit, other_file, blob_fetcher)
+                if content is not None:
+                    dest = sample_dir / variant / 'files' / other_file
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    dest.write_text(content)
     else:
         # No build files changed - write placeholders
         with open(sample_dir / 'original' / 'build.gradle.kts', 'w') as f:
@@ -328,13 +615,14 @@ Fix the build script issue identified in the bad commit.
             f.write(f"// Modified build script from commit {candidate['good_commit']}\n")
             f.write("// No build files changed in this candidate\n")
 
-    return sample_dir
+    if final_dir.exists():
+        shutil.rmtree(final_dir)
+    os.rename(sample_dir, final_dir)
+    return final_dir
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description='Generate verification tests for build script changes'
-    )
+def add_generation_arguments(parser):
+    """Add the options shared by test_generator.py and closed_loop.py."""
     parser.add_argument(
         '--candidates',
         default='swe-bench-poc/data/candidates.json',
@@ -348,25 +636,81 @@ def main():
     parser.add_argument(
         '--limit',
         type=int,
-        default=+inf,
-        help='Maximum number of samples to generate'
+        default=None,
+        help='Maximum number of samples to generate (default: all)'
+    )
+    parser.add_argument(
+        '--catalog',
+        default=None,
+        help='Read candidates from this pipeline catalog and record generated samples in it'
+    )
+    parser.add_argument(
+        '--git-cache',
+        default=None,
+        help='Directory for local blobless clones; diffs and file contents are read from them '
+             '(default: GIT_OBJECT_CACHE env var, or the GitHub API if unset)'
+    )
+    parser.add_argument(
+        '--blob-cache',
+        default='swe-bench-poc/data/blob_cache',
+        help='Content-addressed cache for build files fetched via batched GraphQL'
+    )
+    parser.add_argument(
+        '--no-graphql',
+        action='store_true',
+        help='Fetch build files one by one via the REST contents API instead of batched GraphQL'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Number of samples generated concurrently'
+    )
+    parser.add_argument(
+        '--llm-cache',
+        default='swe-bench-poc/data/llm_cache',
+        help='Directory for cached LLM responses (keyed by prompt, model and template version)'
+    )
+    parser.add_argument(
+        '--token-budget',
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help='Token budget for the per-sample part of the prompt (task description and diff)'
+    )
+    parser.add_argument(
+        '--usage-log',
+        default='swe-bench-poc/data/llm_usage.jsonl',
+        help='JSONL file receiving the token usage of each LLM call'
+    )
+    parser.add_argument(
+        '--no-prompt-cache',
+        action='store_true',
+        help='Do not mark the static prompt prefix for provider-side prompt caching'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Regenerate samples that already exist in the output directory'
     )
     parser.add_argument(
         '--no-llm',
         action='store_true',
         help='Disable LLM-based generation, use templates only'
     )
+    add_budget_arguments(parser)
 
-    args = parser.parse_args()
 
-    # Load candidates
-    if not Path(args.candidates).exists():
+def load_selected_candidates(args, catalog=None):
+    """Load candidates with build file changes, up to --limit; exits if there are none."""
+    if catalog is not None:
+        candidates = list(catalog.iter_candidates())
+    elif not Path(args.candidates).exists():
         print(f"Error: Candidates file not found: {args.candidates}", file=sys.stderr)
         print("Run extract_build_changes.py first to generate candidates.", file=sys.stderr)
         sys.exit(1)
-
-    with open(args.candidates, 'r') as f:
-        candidates = json.load(f)
+    else:
+        with open(args.candidates, 'r') as f:
+            candidates = json.load(f)
 
     # Filter candidates with build file changes
     valid_candidates = [c for c in candidates if c.get('build_files_changed')]
@@ -376,13 +720,85 @@ def main():
         sys.exit(1)
 
     print(f"Found {len(valid_candidates)} valid candidates")
-    print(f"Generating up to {args.limit} samples...")
+    print(f"Generating up to {len(valid_candidates) if args.limit is None else args.limit} samples...")
+
+    return valid_candidates[:args.limit]
+
+
+def create_blob_fetcher(args, candidates):
+    """Batched GraphQL fetcher for `candidates`, or None if not applicable."""
+    # Batched GraphQL needs a token; local git objects make it unnecessary
+    if args.no_graphql or not os.environ.get('GITHUB_TOKEN') or os.environ.get('GIT_OBJECT_CACHE'):
+        return None
+    blob_fetcher = BlobFetcher(args.blob_cache, budget=Budget.from_env())
+    prefetch_build_files(candidates, blob_fetcher)
+    return blob_fetcher
 
-    # Generate samples
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate verification tests for build script changes'
+    )
+    add_generation_arguments(parser)
+    args = parser.parse_args()
+
+    if args.git_cache:
+        os.environ['GIT_OBJECT_CACHE'] = args.git_cache
+    budget = budget_from_args(args)
+
+    # Load candidates
+    catalog = PipelineCatalog(args.catalog) if args.catalog else None
+    selected = load_selected_candidates(args, catalog)
+
+    # Resume: skip samples that were completed by an earlier run
+    remove_partial_samples(args.output)
+    if not args.force:
+        pending = [c for c in selected if not (Path(args.output) / sample_name_for(c)).exists()]
+        if len(pending) < len(selected):
+            print(f"Skipping {len(selected) - len(pending)} existing samples (use --force to regenerate)")
+        selected = pending
+
+    blob_fetcher = create_blob_fetcher(args, selected)
+
+    # Generate samples concurrently; LLM and GitHub calls dominate, so threads suffice
     use_llm = not args.no_llm
-    for i, candidate in enumerate(valid_candidates[:args.limit]):
-        print(f"\n[{i + 1}/{min(args.limit, len(valid_candidates))}] Processing PR #{candidate['pr_id']}...")
-        generate_sample(candidate, args.output, use_llm=use_llm)
+    llm_cache = LLMResponseCache(args.llm_cache) if use_llm else None
+    usage_log = UsageLog(args.usage_log) if use_llm else None
+    Path(args.output).mkdir(parents=True, exist_ok=True)
+    completed = 0
+    failed = 0
+    skipped = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {
+            executor.submit(generate_sample, candidate, args.output, use_llm=use_llm,
+                            blob_fetcher=blob_fetcher, llm_cache=llm_cache, usage_log=usage_log,
+                            token_budget=args.token_budget,
+                            prompt_cache=not args.no_prompt_cache): candidate
+            for candidate in selected
+        }
+        for future in as_completed(futures):
+            candidate = futures[future]
+            completed += 1
+            try:
+                sample_dir = future.result()
+            except BudgetExhausted:
+                skipped += 1
+                continue
+            except Exception as e:
+                failed += 1
+                print(f"[{completed}/{len(selected)}] ✗ PR #{candidate['pr_id']} failed: {e}", file=sys.stderr)
+                continue
+            print(f"[{completed}/{len(selected)}] Done PR #{candidate['pr_id']} -> {sample_dir.name}")
+            if catalog is not None:
+                repo = '/'.join(candidate['pr_url'].split('/')[3:5])
+                catalog.record_sample(sample_dir.name, path=str(sample_dir), status='generated',
+                                      pair=candidate, repo=repo)
+
+    if failed:
+        print(f"\n{failed} sample(s) failed and will be retried on the next run.")
+    if skipped:
+        print(f"\nStopped: {budget.exhausted()} budget exhausted; {skipped} sample(s) left for the next run.")
 
     print(f"\n✓ Sample generation complete!")
     print(f"Output directory: {args.output}")
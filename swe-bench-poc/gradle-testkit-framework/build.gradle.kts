@@ -3,7 +3,14 @@ plugins {
 }
 
 repositories {
-    mavenCentral()
+    // File-based mirror written by runner/offline_mirror.py, set through the
+    // gradle.properties of the offline GRADLE_USER_HOME
+    val offlineRepo = System.getProperty("sample.offlineRepo")
+    if (offlineRepo != null) {
+        maven { url = uri(offlineRepo) }
+    } else {
+        mavenCentral()
+    }
 }
 
 java {
@@ -33,4 +40,20 @@ tasks.test {
             systemProperty(key, value)
         }
     }
+
+    // Shared TestKit directory of this worker (see verify_sample.py): nested
+    // builds of all samples run by the worker reuse its unpacked distribution
+    // and script/dependency caches instead of bootstrapping them again.
+    // GradleRunner picks it up when the test does not call withTestKitDir().
+    System.getProperty("sample.testKitDir")?.let { systemProperty("org.gradle.testkit.dir", it) }
+
+    // Heap of the test JVM, set by the memory-aware scheduler in verify.py
+    System.getProperty("sample.testMaxHeap")?.let { maxHeapSize = it }
+
+    // Workspaces are reused across samples (verify_sample --fast), and a
+    // repaired sample keeps its build file path: track the file's content so
+    // the task never reports UP-TO-DATE for a changed build script.
+    System.getProperty("sample.buildFile")?.let { path ->
+        inputs.file(path).withPropertyName("sampleBuildFile").withPathSensitivity(PathSensitivity.NONE)
+    }
 }
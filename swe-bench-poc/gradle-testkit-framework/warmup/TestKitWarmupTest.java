@@ -0,0 +1,27 @@
+import org.gradle.testkit.runner.GradleRunner;
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.io.TempDir;
+
+import java.io.IOException;
+import java.nio.file.Files;
+import java.nio.file.Path;
+
+/**
+ * Runs one trivial nested build so that the TestKit directory given by
+ * -Dsample.testKitDir holds an unpacked distribution and warm script caches
+ * before the first sample is verified.
+ */
+public class TestKitWarmupTest {
+    @TempDir
+    Path projectDir;
+
+    @Test
+    public void warmUp() throws IOException {
+        Files.writeString(projectDir.resolve("settings.gradle.kts"), "rootProject.name = \"warmup\"\n");
+        Files.writeString(projectDir.resolve("build.gradle.kts"), "plugins {\n    java\n}\n");
+        GradleRunner.create()
+                .withProjectDir(projectDir.toFile())
+                .withArguments("help", "-q")
+                .build();
+    }
+}
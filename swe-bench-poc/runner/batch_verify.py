@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Verify many samples with a single Gradle invocation.
+
+verify.py runs two Gradle builds per sample because the build file under test
+is passed through the `sample.buildFile` system property. Here every sample's
+verification tests are staged into one framework project instead:
+
+- each sample gets its own package (`samples.<sample>.o` / `samples.<sample>.m`),
+  so identical class names such as `BuildScriptTest` do not clash;
+- the O and M variants are two copies of the test class in which
+  `System.getProperty("sample.buildFile" | "sample.variant" | "sample.name")`
+  is replaced by the variant's literal value, so both variants run in the same
+  test JVM;
+- JUnit 5 parallel execution is enabled for the staged project.
+
+The project is compiled once. Samples whose tests do not compile are reported
+as failed and removed, and compilation is retried with the rest. After the test
+run, the JUnit XML reports are mapped back to (sample, variant) results. A
+sample with a variant that has no report, or only skipped tests, gets no
+verdict (an ERROR result, like verify_sample.py).
+"""
+
+import argparse
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from offline_mirror import activate, offline_args
+from test_results import ResultLog, parse_test_results
+from verify import find_samples
+from verify_sample import FRAMEWORK_FILES, _link, is_verdict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from catalog import PipelineCatalog
+
+VARIANTS = (("O", "o", "original"), ("M", "m", "modified"))
+
+PACKAGE_RE = re.compile(r"^\s*package\s+[\w.]+\s*;", re.MULTILINE)
+SAMPLE_PROPERTY_RE = re.compile(r'System\.getProperty\(\s*"sample\.(buildFile|variant|name)"\s*(?:,[^)]*)?\)')
+COMPILE_ERROR_RE = re.compile(r"(/\S+?/src/test/java/samples/(\w+)/[om]/\S+?\.java):\d+: error:")
+
+
+def package_for(sample_name: str) -> str:
+    """Java package segment for a sample name (e.g. 1913_149a345 -> s_1913_149a345)."""
+    return "s_" + re.sub(r"\W", "_", sample_name)
+
+
+def rewrite_test_source(source: str, package: str, values: Dict[str, str]) -> str:
+    """
+    Put a test class into `package` and inline the sample.* system properties.
+
+    Args:
+        source: Java source of a verification test
+        package: Fully qualified package name
+        values: Replacement values for buildFile, variant and name
+    """
+    source = SAMPLE_PROPERTY_RE.sub(lambda m: json.dumps(values[m.group(1)]), source)
+    declaration = f"package {package};"
+    if PACKAGE_RE.search(source):
+        return PACKAGE_RE.sub(declaration, source, count=1)
+    return f"{declaration}\n\n{source}"
+
+
+def stage_samples(samples: List[Path], project_dir: Path) -> Dict[str, Path]:
+    """
+    Write the O and M copies of every sample's tests into project_dir.
+
+    Returns:
+        Mapping of package segment -> sample directory
+    """
+    tests_root = project_dir / "src" / "test" / "java" / "samples"
+    packages = {}
+    for sample_dir in samples:
+        segment = package_for(sample_dir.name)
+        packages[segment] = sample_dir
+        test_files = sorted(p for p in (sample_dir / "verification").glob("*.java") if p.is_file())
+        for variant, subpackage, build_dir in VARIANTS:
+            values = {
+                "buildFile": str((sample_dir / build_dir / "build.gradle.kts").resolve()),
+                "variant": variant,
+                "name": sample_dir.name,
+            }
+            dest_dir = tests_root / segment / subpackage
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            for test_file in test_files:
+                source = test_file.read_text(encoding="utf-8")
+                m = re.search(r"\bpublic\s+class\s+([A-Za-z_][A-Za-z0-9_]*)\b", source)
+                dest_name = f"{m.group(1)}.java" if m else test_file.name
+                rewritten = rewrite_test_source(source, f"samples.{segment}.{subpackage}", values)
+                (dest_dir / dest_name).write_text(rewritten, encoding="utf-8")
+    return packages
+
+
+def write_junit_config(project_dir: Path, parallelism: int) -> None:
+    resources = project_dir / "src" / "test" / "resources"
+    resources.mkdir(parents=True, exist_ok=True)
+    (resources / "junit-platform.properties").write_text(
+        "junit.jupiter.execution.parallel.enabled=true\n"
+        "junit.jupiter.execution.parallel.mode.default=concurrent\n"
+        "junit.jupiter.execution.parallel.mode.classes.default=concurrent\n"
+        "junit.jupiter.execution.parallel.config.strategy=fixed\n"
+        f"junit.jupiter.execution.parallel.config.fixed.parallelism={parallelism}\n"
+    )
+
+
+def failing_packages(compile_output: str) -> Dict[str, List[str]]:
+    """Package segments with compilation errors, with their error lines."""
+    errors = {}
+    for line in compile_output.splitlines():
+        m = COMPILE_ERROR_RE.search(line)
+        if m:
+            errors.setdefault(m.group(2), []).append(line.strip())
+    return errors
+
+
+def parse_junit_reports(results_dir: Path, records: Optional[List[Dict]] = None) -> Dict[Tuple[str, str], Dict]:
+    """
+    Aggregate JUnit XML reports per (package segment, variant).
+
+    Args:
+        results_dir: Gradle's test-results directory
+        records: Optional list to which the per-test records of the staged
+            samples are appended, with "segment" and "variant" keys added
+
+    Returns:
+        {(segment, "O"|"M"): {"tests": n, "failures": [messages], "skipped": n}}
+    """
+    results = {}
+    variant_by_subpackage = {subpackage: variant for variant, subpackage, _ in VARIANTS}
+    for record in parse_test_results(results_dir):
+        parts = record["class"].split(".")
+        if len(parts) < 4 or parts[0] != "samples" or parts[2] not in variant_by_subpackage:
+            continue
+        segment, variant = parts[1], variant_by_subpackage[parts[2]]
+        entry = results.setdefault((segment, variant), {"tests": 0, "failures": [], "skipped": 0})
+        entry["tests"] += 1
+        if record["status"] == "skipped":
+            entry["skipped"] += 1
+        elif record["status"] != "passed":
+            entry["failures"].append(f"{record['test']}: {record['message']}")
+        if records is not None:
+            records.append(dict(record, segment=segment, variant=variant))
+    return results
+
+
+def _gradle(project_dir: Path, *args: str) -> Tuple[bool, str]:
+    proc = subprocess.run(
+        [str(project_dir / "gradlew"), "--no-daemon", *args, *offline_args()],
+        cwd=str(project_dir),
+        text=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    return proc.returncode == 0, proc.stdout
+
+
+def _variant_ran(entry: Optional[Dict]) -> bool:
+    """False without a report (e.g. the test JVM died) or when every test was skipped: no verdict."""
+    return entry is not None and entry["tests"] > entry["skipped"]
+
+
+def _variant_passed(entry: Optional[Dict]) -> bool:
+    return _variant_ran(entry) and not entry["failures"]
+
+
+def _log_batch_records(result_log: ResultLog, packages: Dict[str, Path], records: List[Dict]) -> None:
+    grouped: Dict[Tuple[str, str], List[Dict]] = {}
+    for record in records:
+        if record["segment"] in packages:
+            grouped.setdefault((record.pop("segment"), record["variant"]), []).append(record)
+    for (segment, variant), variant_records in grouped.items():
+        sample_name = packages[segment].name
+        result_log.tests(sample_name, variant, variant_records)
+        result_log.phase(sample_name, variant, "tests", sum(r["seconds"] for r in variant_records))
+
+
+def batch_verify(samples: List[Path], framework_src: Path, parallelism: int = 4,
+                 max_compile_attempts: int = 5, result_log: ResultLog = None) -> Dict[str, Tuple[bool, str]]:
+    """
+    Verify `samples` in one framework project.
+
+    With a result_log, the per-test records and the time spent in each
+    variant's tests are logged per sample; compilation and the Gradle test
+    run are logged once for the whole batch (sample None).
+
+    Returns:
+        {sample name: (success, output)}
+    """
+    outcomes: Dict[str, Tuple[bool, str]] = {}
+
+    with tempfile.TemporaryDirectory(prefix="swe_bench_poc_batch_") as tmp:
+        project_dir = Path(tmp) / "framework"
+        project_dir.mkdir()
+        for name in FRAMEWORK_FILES:
+            if (framework_src / name).exists():
+                _link(framework_src / name, project_dir / name)
+        write_junit_config(project_dir, parallelism)
+        packages = stage_samples(samples, project_dir)
+        tests_root = project_dir / "src" / "test" / "java" / "samples"
+
+        # Compile once; drop samples that do not compile and retry with the rest
+        print(f"Compiling tests of {len(packages)} sample(s)...")
+        started = time.time()
+        for _ in range(max_compile_attempts):
+            ok, output = _gradle(project_dir, "compileTestJava")
+            if ok or not packages:
+                break
+            broken = failing_packages(output)
+            if not broken:
+                # Not attributable to a sample (e.g. framework or network problem)
+                for segment, sample_dir in packages.items():
+                    outcomes[sample_dir.name] = (False, f"ERROR: test compilation failed\n{output}")
+                return outcomes
+            for segment, errors in broken.items():
+                sample_dir = packages.pop(segment, None)
+                if sample_dir is None:
+                    continue
+                shutil.rmtree(tests_root / segment, ignore_errors=True)
+                outcomes[sample_dir.name] = (False, "Verification: FAILED (tests do not compile)\n" + "\n".join(errors))
+            print(f"  Excluded {len(broken)} sample(s) with compilation errors, retrying...")
+
+        if result_log is not None:
+            result_log.phase(None, None, "compile", time.time() - started)
+        if not packages:
+            return outcomes
+
+        print(f"Running O and M variants of {len(packages)} sample(s) in one test run...")
+        started = time.time()
+        _, test_output = _gradle(project_dir, "test", "--continue")
+        records: List[Dict] = []
+        results = parse_junit_reports(project_dir / "build" / "test-results" / "test", records)
+        if result_log is not None:
+            result_log.phase(None, None, "gradle", time.time() - started)
+            _log_batch_records(result_log, packages, records)
+
+        for segment, sample_dir in packages.items():
+            original = results.get((segment, "O"))
+            modified = results.get((segment, "M"))
+            missing = [f"{build_dir} ({variant})" for (variant, _, build_dir), entry
+                       in zip(VARIANTS, (original, modified)) if not _variant_ran(entry)]
+            if missing:
+                outcomes[sample_dir.name] = (
+                    False, f"ERROR: no test results for {sample_dir.name}: {', '.join(missing)}\n{test_output}")
+                continue
+            ok_original = _variant_passed(original)
+            ok_modified = _variant_passed(modified)
+            success = (not ok_original) and ok_modified
+            lines = [
+                f"Original (O): {'PASS ✗' if ok_original else 'FAIL ✓'}",
+                f"Modified (M): {'PASS ✓' if ok_modified else 'FAIL ✗'}",
+                f"Verification: {'SUCCESS' if success else 'FAILED'}",
+            ]
+            if not success:
+                for label, entry in (("Original", original), ("Modified", modified)):
+                    for failure in (entry or {}).get("failures", []):
+                        lines.append(f"  {label}: {failure}")
+            outcomes[sample_dir.name] = (success, "\n".join(lines))
+
+    return outcomes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Verify all samples with one Gradle invocation (O and M variants in one test JVM)."
+    )
+    parser.add_argument(
+        "--samples-dir",
+        type=str,
+        default=None,
+        help="Path to samples directory (default: ../data/samples relative to this script)"
+    )
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=4,
+        help="Number of test classes JUnit runs concurrently"
+    )
+    parser.add_argument(
+        "--catalog",
+        type=str,
+        default=None,
+        help="Pipeline catalog (SQLite) to record verification results in"
+    )
+    parser.add_argument(
+        "--results-log",
+        type=str,
+        default=None,
+        help="JSONL file for per-test results and timings (default: ../data/verify_results.jsonl; see timing_report.py)"
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Resolve everything from the mirror built by offline_mirror.py, without network access"
+    )
+    parser.add_argument(
+        "--offline-dir",
+        type=str,
+        default=None,
+        help="Offline mirror directory (default: ../data/offline)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show detailed output for each sample"
+    )
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+    samples_dir = Path(args.samples_dir).resolve() if args.samples_dir else (
+            script_dir.parent / "data" / "samples").resolve()
+    framework_src = (script_dir.parent / "gradle-testkit-framework").resolve()
+    if args.offline:
+        activate(Path(args.offline_dir) if args.offline_dir else script_dir.parent / "data" / "offline")
+
+    samples = find_samples(samples_dir)
+    if not samples:
+        print(f"No valid samples found in: {samples_dir}")
+        return 0
+    print(f"Found {len(samples)} valid sample(s)\n")
+
+    results_log = args.results_log or str(script_dir.parent / "data" / "verify_results.jsonl")
+    outcomes = batch_verify(samples, framework_src, parallelism=args.parallelism,
+                            result_log=ResultLog(results_log))
+    catalog = PipelineCatalog(args.catalog) if args.catalog else None
+
+    print("\n" + "=" * 80)
+    print("VERIFICATION SUMMARY")
+    print("=" * 80)
+    successful = unverified = 0
+    for sample_name, (success, output) in sorted(outcomes.items()):
+        verdict = is_verdict(success, output)
+        successful += success
+        unverified += not verdict
+        print(f"  {'✓ PASS' if success else '✗ FAIL' if verdict else '⚠ NO VERDICT'}  {sample_name}")
+        if args.verbose or not success:
+            print("    " + output.replace("\n", "\n    "))
+        if catalog is not None and verdict:
+            catalog.record_sample(sample_name, path=str(samples_dir / sample_name),
+                                  status="verified" if success else "failed",
+                                  details={"success": success})
+
+    failed = len(outcomes) - successful - unverified
+    print(f"\nTotal samples: {len(outcomes)}")
+    print(f"Successful:    {successful} ✓")
+    print(f"Failed:        {failed} ✗")
+    if unverified:
+        print(f"No verdict:    {unverified} (no test results; not recorded)")
+    return 1 if failed or unverified else 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\nInterrupted by user", file=sys.stderr)
+        sys.exit(130)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Offline bootstrap for the gradle-testkit-framework.
+
+A cold verification downloads the Gradle distribution (wrapper) and resolves
+JUnit and its platform launcher from Maven Central; on air-gapped nodes it
+fails. `bootstrap` performs one online build of the framework with a dedicated
+GRADLE_USER_HOME and turns what it downloaded into a self-contained offline
+directory (default: ../data/offline):
+
+    gradle-home/   GRADLE_USER_HOME with the unpacked distribution in
+                   wrapper/dists and a gradle.properties that points the
+                   framework to the mirror (sample.offlineRepo)
+    maven/         file-based Maven repository with every module the build
+                   resolved, copied out of caches/modules-2
+
+The directory can be copied to other machines as is. `activate` makes all
+Gradle runs of this process use it, and verify_sample then passes --offline.
+Resolution from a file repository needs no network and no cache lookups.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Set by activate(); verify_sample adds --offline to its Gradle runs when present
+OFFLINE_ENV = "SAMPLE_GRADLE_OFFLINE"
+
+
+def gradle_home(offline_dir: Path) -> Path:
+    return Path(offline_dir) / "gradle-home"
+
+
+def maven_repo(offline_dir: Path) -> Path:
+    return Path(offline_dir) / "maven"
+
+
+def offline_args() -> list[str]:
+    """Extra Gradle arguments for the current process (["--offline"] once activated)."""
+    return ["--offline"] if os.environ.get(OFFLINE_ENV) else []
+
+
+def mirror_modules(modules_dir: Path, repo_dir: Path) -> int:
+    """
+    Copy Gradle's module cache into a Maven repository layout.
+
+    caches/modules-2/files-2.1/<group>/<module>/<version>/<sha1>/<file> becomes
+    <repo>/<group as path>/<module>/<version>/<file> (jars, POMs and Gradle
+    module metadata alike).
+
+    Returns:
+        Number of files copied
+    """
+    files_dir = Path(modules_dir) / "files-2.1"
+    copied = 0
+    if not files_dir.is_dir():
+        return copied
+    for path in sorted(files_dir.glob("*/*/*/*/*")):
+        if not path.is_file():
+            continue
+        version_dir = path.parent.parent
+        module_dir = version_dir.parent
+        group = module_dir.parent.name
+        dest = Path(repo_dir).joinpath(*group.split("."), module_dir.name, version_dir.name, path.name)
+        if not dest.exists():
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, dest)
+            copied += 1
+    return copied
+
+
+def _warmup_build(framework_src: Path, home: Path, offline: bool) -> subprocess.CompletedProcess:
+    """Run the framework's TestKit warmup test in a temporary copy of the framework."""
+    env = os.environ.copy()
+    env["GRADLE_USER_HOME"] = str(home)
+    with tempfile.TemporaryDirectory(prefix="swe_bench_poc_offline_") as tmp:
+        framework_dir = Path(tmp) / "framework"
+        shutil.copytree(framework_src, framework_dir)
+        tests_dir = framework_dir / "src" / "test" / "java"
+        tests_dir.mkdir(parents=True)
+        shutil.copy2(framework_src / "warmup" / "TestKitWarmupTest.java", tests_dir)
+        cmd = [str(framework_dir / "gradlew"), "--no-daemon", "test", "--tests=TestKitWarmupTest",
+               f"-Dsample.testKitDir={Path(tmp) / 'testkit'}"] + (["--offline"] if offline else [])
+        return subprocess.run(cmd, cwd=str(framework_dir), env=env, text=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+
+def bootstrap(framework_src: Path, offline_dir: Path) -> bool:
+    """Populate offline_dir (needs network once) and check that an offline build succeeds."""
+    home = gradle_home(offline_dir)
+    repo = maven_repo(offline_dir)
+    home.mkdir(parents=True, exist_ok=True)
+    properties = home / "gradle.properties"
+    if properties.exists():
+        # Resolve online for this run, not from a previous (maybe incomplete) mirror
+        properties.unlink()
+
+    print(f"Downloading the distribution and dependencies into: {home}")
+    proc = _warmup_build(framework_src, home, offline=False)
+    if proc.returncode != 0:
+        print(proc.stdout)
+        print("ERROR: Online bootstrap build failed", file=sys.stderr)
+        return False
+
+    copied = mirror_modules(home / "caches" / "modules-2", repo)
+    print(f"Mirrored {copied} new file(s) into: {repo}")
+    properties.write_text(f"systemProp.sample.offlineRepo={repo.resolve().as_uri()}\n")
+
+    print("Checking an offline build against the mirror...")
+    proc = _warmup_build(framework_src, home, offline=True)
+    if proc.returncode != 0:
+        print(proc.stdout)
+        print("ERROR: Offline build failed; the mirror is incomplete", file=sys.stderr)
+        return False
+    return True
+
+
+def activate(offline_dir: Path) -> None:
+    """Use the offline directory for all Gradle runs started by this process."""
+    home = gradle_home(offline_dir)
+    if not (home / "gradle.properties").exists() or not maven_repo(offline_dir).is_dir():
+        raise FileNotFoundError(f"No offline mirror in {offline_dir}; run offline_mirror.py first")
+    os.environ["GRADLE_USER_HOME"] = str(home.resolve())
+    os.environ[OFFLINE_ENV] = "1"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Build the offline Maven mirror and distribution cache used by verify.py --offline."
+    )
+    parser.add_argument(
+        "--offline-dir",
+        type=str,
+        default=None,
+        help="Offline directory to populate (default: ../data/offline relative to this script)"
+    )
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).resolve().parent
+    framework_src = (script_dir.parent / "gradle-testkit-framework").resolve()
+    offline_dir = Path(args.offline_dir).resolve() if args.offline_dir else (script_dir.parent / "data" / "offline")
+
+    if not bootstrap(framework_src, offline_dir):
+        return 1
+    print(f"\nOffline mirror ready: {offline_dir}")
+    print("Verify with: python swe-bench-poc/runner/verify.py --offline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Memory-aware scheduling of concurrent Gradle verifications.
+
+Every sample verification starts several JVMs at once: the Gradle build, the
+test worker and the nested TestKit build the test itself launches. Running one
+verification per CPU oversubscribes memory long before it saturates the CPUs,
+so concurrency is derived from the memory that is actually available:
+
+    concurrency = min(max_jvms, MemAvailable / mem_per_jvm) / jvms_per_verification
+
+Before each verification starts, the scheduler also checks that enough memory
+is still free (other processes may have grown) and waits for running
+verifications to finish if not.
+
+Samples are started longest-first based on timings recorded by earlier runs,
+so one slow sample does not end up running alone at the end of the run.
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Gradle build JVM, test worker JVM and the nested TestKit build
+JVMS_PER_VERIFICATION = 3
+
+
+def available_memory_mb() -> Optional[int]:
+    """MemAvailable from /proc/meminfo (Linux), or free physical memory elsewhere."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class TimingHistory:
+    """Per-sample verification durations from earlier runs, stored as JSON."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = Path(path) if path else None
+        self.timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            with open(self.path, "r") as f:
+                self.timings = json.load(f)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            previous = self.timings.get(name)
+            # Smooth out one-off slow runs
+            self.timings[name] = seconds if previous is None else 0.5 * previous + 0.5 * seconds
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.timings, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def longest_first(self, names: Iterable[str]) -> List[str]:
+        """Order names by expected duration, descending; unknown ones count as the median."""
+        names = list(names)
+        known = [self.timings[n] for n in names if n in self.timings]
+        default = statistics.median(known) if known else 0.0
+        return sorted(names, key=lambda n: self.timings.get(n, default), reverse=True)
+
+
+class JVMScheduler:
+    def __init__(self, max_jvms: Optional[int] = None, mem_per_jvm_mb: int = 1024,
+                 jvms_per_task: int = JVMS_PER_VERIFICATION, poll_interval: float = 2.0):
+        """
+        Args:
+            max_jvms: Upper bound on concurrently running JVMs (default: CPU count)
+            mem_per_jvm_mb: Memory budget per JVM (heap plus overhead)
+            jvms_per_task: JVMs one verification runs at the same time
+            poll_interval: Seconds between memory checks while waiting
+        """
+        self.max_jvms = max_jvms or os.cpu_count() or 2
+        self.mem_per_jvm_mb = mem_per_jvm_mb
+        self.jvms_per_task = max(1, jvms_per_task)
+        self.poll_interval = poll_interval
+        self._running = 0
+        self._cond = threading.Condition()
+
+    @property
+    def task_memory_mb(self) -> int:
+        return self.mem_per_jvm_mb * self.jvms_per_task
+
+    def concurrency(self) -> int:
+        """Number of verifications that fit into the JVM and memory limits."""
+        jvms = self.max_jvms
+        available = available_memory_mb()
+        if available is not None:
+            jvms = min(jvms, available // max(1, self.mem_per_jvm_mb))
+        return max(1, jvms // self.jvms_per_task)
+
+    def _admit(self) -> None:
+        # Always let one task run, so a small machine still makes progress
+        with self._cond:
+            while self._running > 0:
+                available = available_memory_mb()
+                if available is None or available >= self.task_memory_mb:
+                    break
+                self._cond.wait(self.poll_interval)
+            self._running += 1
+
+    def _release(self) -> None:
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def admitted(self) -> Iterator[None]:
+        """Runs a block as one task once enough memory is free (for callers with their own threads)."""
+        self._admit()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def run(self, items: List[Tuple[str, object]], fn: Callable,
+            history: Optional[TimingHistory] = None) -> Iterator[Tuple[str, object]]:
+        """
+        Run fn(item) for each (name, item), longest-first, yielding (name, result)
+        as they complete. Exceptions are yielded as results.
+        """
+        by_name = dict(items)
+        order = history.longest_first(by_name) if history else list(by_name)
+
+        def task(name):
+            with self.admitted():
+                started = time.time()
+                try:
+                    return fn(by_name[name])
+                finally:
+                    if history is not None:
+                        history.record(name, time.time() - started)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency()) as executor:
+            futures = {executor.submit(task, name): name for name in order}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                yield futures[future], result
+        if history is not None:
+            history.save()
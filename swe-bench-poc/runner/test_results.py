@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Structured verification results.
+
+Gradle writes one JUnit XML report per test class under
+build/test-results/test/. These are parsed into per-test records (status,
+duration, failure message) and appended, together with per-phase wall times
+of each verification, to a JSONL log that timing_report.py summarizes.
+
+Record types in the log:
+
+    {"type": "test", "run": ..., "sample": ..., "variant": "O"|"M", "class": ...,
+     "test": ..., "status": "passed"|"failed"|"error"|"skipped", "seconds": ..., "message": ...}
+    {"type": "phase", "run": ..., "sample": ..., "variant": ..., "phase": ..., "seconds": ...}
+"""
+
+import json
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+def read_junit_xml(report: Path) -> Iterator[Dict]:
+    """Yield one record per <testcase> of a JUnit XML report (nothing if unreadable)."""
+    try:
+        root = ET.parse(report).getroot()
+    except (ET.ParseError, OSError):
+        return
+    for case in root.iter("testcase"):
+        status, message = "passed", None
+        for tag in ("failure", "error"):
+            problem = case.find(tag)
+            if problem is not None:
+                status = "failed" if tag == "failure" else "error"
+                message = problem.get("message")
+                if not message:
+                    text = (problem.text or "").strip().splitlines()
+                    message = text[0] if text else tag
+                break
+        else:
+            if case.find("skipped") is not None:
+                status = "skipped"
+        try:
+            seconds = float(case.get("time") or 0)
+        except ValueError:
+            seconds = 0.0
+        yield {
+            "class": case.get("classname", ""),
+            "test": case.get("name", ""),
+            "status": status,
+            "seconds": seconds,
+            "message": message,
+        }
+
+
+def parse_test_results(results_dir: Path, classes: Optional[Iterable[str]] = None) -> List[Dict]:
+    """
+    Records of all JUnit XML reports in `results_dir`.
+
+    Args:
+        results_dir: Usually <project>/build/test-results/test
+        classes: Optional simple or qualified class names to keep
+    """
+    wanted = set(classes) if classes is not None else None
+    records = []
+    for report in sorted(Path(results_dir).glob("TEST-*.xml")):
+        for record in read_junit_xml(report):
+            simple_name = record["class"].rsplit(".", 1)[-1]
+            if wanted is None or record["class"] in wanted or simple_name in wanted:
+                records.append(record)
+    return records
+
+
+class ResultLog:
+    """Appends test and phase records of one verification run to a JSONL file."""
+
+    def __init__(self, path: str, run_id: Optional[str] = None):
+        self.path = Path(path)
+        self.run_id = run_id or time.strftime("%Y%m%dT%H%M%S")
+        self._lock = threading.Lock()
+
+    def _write(self, records: List[Dict]) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+
+    def tests(self, sample: str, variant: str, records: List[Dict]) -> None:
+        self._write([dict(record, type="test", run=self.run_id, sample=sample, variant=variant)
+                     for record in records])
+
+    def phase(self, sample: str, variant: Optional[str], phase: str, seconds: float) -> None:
+        self._write([{"type": "phase", "run": self.run_id, "sample": sample, "variant": variant,
+                      "phase": phase, "seconds": round(seconds, 3)}])
+
+
+def read_log(path: Path) -> Iterator[Dict]:
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
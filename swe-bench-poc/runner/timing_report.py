@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Where does verification wall time go?
+
+Summarizes the JSONL log written by verify.py / batch_verify.py (see
+test_results.py): the slowest samples, the time per phase (workspace setup,
+Gradle runs per variant, time spent inside the tests themselves, Gradle
+overhead around them) and the slowest individual tests.
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from test_results import read_log
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rank the slowest samples, phases and tests of verification runs.")
+    parser.add_argument(
+        "--log",
+        type=str,
+        default=None,
+        help="Results log (default: ../data/verify_results.jsonl relative to this script)"
+    )
+    parser.add_argument("--top", type=int, default=10, help="Number of entries per ranking")
+    parser.add_argument("--all-runs", action="store_true", help="Include all runs instead of only the latest one")
+    args = parser.parse_args()
+
+    log_path = Path(args.log) if args.log else Path(__file__).resolve().parent.parent / "data" / "verify_results.jsonl"
+    if not log_path.exists():
+        print(f"ERROR: Results log not found: {log_path}", file=sys.stderr)
+        return 1
+
+    records = list(read_log(log_path))
+    if not records:
+        print("Results log is empty.")
+        return 0
+    if not args.all_runs:
+        latest = max(r["run"] for r in records)
+        records = [r for r in records if r["run"] == latest]
+        print(f"Run: {latest}")
+
+    phases = [r for r in records if r["type"] == "phase"]
+    tests = [r for r in records if r["type"] == "test"]
+
+    per_sample = defaultdict(float)
+    per_phase = defaultdict(list)
+    for r in phases:
+        # Batch-wide phases (batch_verify.py) have no sample
+        if r["sample"] is not None:
+            per_sample[r["sample"]] += r["seconds"]
+        per_phase[r["phase"]].append(r["seconds"])
+
+    total = sum(r["seconds"] for r in phases)
+    print(f"Samples: {len(per_sample)}   Tests: {len(tests)}   Total time: {total:.1f}s\n")
+
+    print(f"Slowest samples (top {args.top})")
+    print("-" * 80)
+    for sample, seconds in sorted(per_sample.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {seconds:9.1f}s  {sample}")
+
+    print("\nTime per phase")
+    print("-" * 80)
+    print(f"  {'phase':<20} {'total':>10} {'share':>7} {'mean':>8} {'p95':>8} {'count':>6}")
+    for phase, values in sorted(per_phase.items(), key=lambda kv: sum(kv[1]), reverse=True):
+        share = sum(values) / total * 100 if total else 0.0
+        print(f"  {phase:<20} {sum(values):9.1f}s {share:6.1f}% {sum(values) / len(values):7.1f}s "
+              f"{percentile(values, 0.95):7.1f}s {len(values):6d}")
+
+    print(f"\nSlowest tests (top {args.top})")
+    print("-" * 80)
+    for r in sorted(tests, key=lambda r: r["seconds"], reverse=True)[:args.top]:
+        print(f"  {r['seconds']:9.1f}s  {r['sample']} [{r['variant']}] {r['class']}.{r['test']} ({r['status']})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
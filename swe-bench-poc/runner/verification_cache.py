@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of verification results, keyed by content hashes.
+
+A sample's key covers everything its result depends on:
+
+- original/build.gradle.kts and modified/build.gradle.kts
+- the verification/*.java tests
+- the framework's build files, including the Gradle wrapper properties
+  (and thus the Gradle version)
+- the JDK version
+
+Results are stored one JSON file per key, so a sample is re-verified only when
+one of its inputs (or the toolchain) changed, and identical samples share one
+entry. Only verdicts are cached: a run in which a variant produced no JUnit
+results (Gradle, network or JVM failure before any test ran) or that raised
+is reported with an "ERROR:" line by verify_sample and is verified again next
+time (see verify_sample.is_verdict).
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from verify_sample import is_verdict
+
+# Framework files whose content affects every verification result
+FRAMEWORK_INPUTS = (
+    "build.gradle.kts",
+    "settings.gradle.kts",
+    "gradle/wrapper/gradle-wrapper.properties",
+)
+
+# Keep cached outputs small; the summary lines come first anyway
+MAX_OUTPUT_CHARS = 20000
+
+
+def _hash_file(h, path: Path, label: str) -> None:
+    h.update(label.encode("utf-8") + b"\0")
+    if path.is_file():
+        h.update(path.read_bytes())
+    h.update(b"\0")
+
+
+def jdk_version() -> str:
+    """`java -version` of the JDK Gradle will use (JAVA_HOME, else PATH)."""
+    java_home = os.environ.get("JAVA_HOME")
+    java = str(Path(java_home) / "bin" / "java") if java_home else "java"
+    try:
+        proc = subprocess.run([java, "-version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, timeout=30)
+        return proc.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def environment_fingerprint(framework_src: Path) -> str:
+    """Hash of the framework build files and the JDK version."""
+    h = hashlib.sha256()
+    for name in FRAMEWORK_INPUTS:
+        _hash_file(h, Path(framework_src) / name, name)
+    h.update(jdk_version().encode("utf-8"))
+    return h.hexdigest()
+
+
+def sample_key(sample_dir: Path, environment: str) -> str:
+    """Content hash of a sample's verification inputs plus the environment fingerprint."""
+    sample_dir = Path(sample_dir)
+    h = hashlib.sha256(environment.encode("utf-8"))
+    _hash_file(h, sample_dir / "original" / "build.gradle.kts", "original")
+    _hash_file(h, sample_dir / "modified" / "build.gradle.kts", "modified")
+    for test_file in sorted((sample_dir / "verification").glob("*.java")):
+        _hash_file(h, test_file, f"verification/{test_file.name}")
+    return h.hexdigest()
+
+
+class VerificationCache:
+    def __init__(self, cache_dir: str, framework_src: Path):
+        """
+        Args:
+            cache_dir: Directory holding one <key>.json file per result
+            framework_src: Framework directory, part of every key
+        """
+        self.cache_dir = Path(cache_dir)
+        self.environment = environment_fingerprint(framework_src)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key[2:]}.json"
+
+    def key(self, sample_dir: Path) -> str:
+        return sample_key(sample_dir, self.environment)
+
+    def get(self, sample_dir: Path) -> Optional[Tuple[bool, str]]:
+        """Cached (success, output) for the sample's current inputs, or None."""
+        path = self._path(self.key(sample_dir))
+        if not path.exists():
+            return None
+        with open(path, "r") as f:
+            entry = json.load(f)
+        return entry["success"], entry["output"]
+
+    def put(self, sample_dir: Path, success: bool, output: str) -> None:
+        if not is_verdict(success, output):
+            # Infrastructure problem, not a property of the sample
+            return
+        path = self._path(self.key(sample_dir))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry: Dict = {
+            "sample": Path(sample_dir).name,
+            "success": success,
+            "output": output[:MAX_OUTPUT_CHARS],
+            "verified_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Which variant to run first, and when to stop.
+
+A sample is valid only if its tests FAIL on the Original (O) build script and
+PASS on the Modified (M) one, so either run alone can reject it: O passing or
+M failing decides the outcome, and the other Gradle run can be skipped.
+
+The policy keeps running statistics per variant (how often it decided the
+outcome on its own, and how long it took) and starts with the variant that
+rejects the most samples per second of Gradle time. Statistics can be
+persisted between runs. In full mode both variants always run, which is
+useful when debugging a test.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ORIGINAL = "O"
+MODIFIED = "M"
+
+
+def decides(variant: str, passed: bool) -> bool:
+    """True if this single result already makes the sample invalid."""
+    return passed if variant == ORIGINAL else not passed
+
+
+class VerificationPolicy:
+    def __init__(self, path: Optional[str] = None, full: bool = False):
+        """
+        Args:
+            path: Optional JSON file to load and save variant statistics
+            full: Always run both variants
+        """
+        self.path = Path(path) if path else None
+        self.full = full
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, float]] = {
+            variant: {"runs": 0, "decisive": 0, "seconds": 0.0} for variant in (ORIGINAL, MODIFIED)
+        }
+        self.skipped = 0
+        if self.path and self.path.exists():
+            with open(self.path, "r") as f:
+                self.stats.update(json.load(f))
+
+    def _score(self, variant: str) -> float:
+        s = self.stats[variant]
+        # Laplace-smoothed rejection rate per second of Gradle time
+        rate = (s["decisive"] + 1) / (s["runs"] + 2)
+        seconds = s["seconds"] / s["runs"] if s["runs"] else 1.0
+        return rate / max(seconds, 1e-3)
+
+    def order(self) -> List[str]:
+        """Variants in the order they should run (O first on ties)."""
+        with self._lock:
+            if self._score(MODIFIED) > self._score(ORIGINAL):
+                return [MODIFIED, ORIGINAL]
+            return [ORIGINAL, MODIFIED]
+
+    def record(self, variant: str, passed: bool, seconds: float) -> bool:
+        """
+        Record one Gradle run.
+
+        Returns:
+            True if the remaining variant still has to run
+        """
+        decisive = decides(variant, passed)
+        with self._lock:
+            s = self.stats[variant]
+            s["runs"] += 1
+            s["decisive"] += int(decisive)
+            s["seconds"] += seconds
+        return self.full or not decisive
+
+    def record_skip(self) -> None:
+        with self._lock:
+            self.skipped += 1
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.stats, f, indent=2)
+            os.replace(tmp_path, self.path)
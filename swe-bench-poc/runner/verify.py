@@ -2,12 +2,31 @@
 
 import argparse
 import sys
+import time
 from pathlib import Path
-from typing import List, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Queue
+from typing import Callable, Iterator, List, Tuple
 import threading
 
-from verify_sample import verify_sample
+from offline_mirror import activate
+from scheduler import JVMScheduler, TimingHistory
+from test_results import ResultLog
+from verification_cache import VerificationCache, sample_key
+from verification_policy import VerificationPolicy
+from verify_sample import TestKitPool, WorkspacePool, is_verdict, verify_sample
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from catalog import PipelineCatalog
+from lease_queue import DONE, LeaseQueue, default_worker_id
+
+# Queue name of sample verifications in a shared lease queue
+VERIFY_QUEUE = "verify"
+
+# Leases a sample may use before it is marked failed (crashes, infrastructure errors)
+MAX_ATTEMPTS = 3
+
+# Outputs stored in the queue are truncated like cached ones
+MAX_QUEUE_OUTPUT_CHARS = 20000
 
 
 def find_samples(samples_dir: Path) -> List[Path]:
@@ -17,7 +36,8 @@ def find_samples(samples_dir: Path) -> List[Path]:
 
     valid_samples = []
     for item in sorted(samples_dir.iterdir()):
-        if not item.is_dir():
+        # Skip files and temporary directories of in-progress generation
+        if not item.is_dir() or item.name.startswith('.'):
             continue
 
         # Check required files exist
@@ -32,6 +52,97 @@ def find_samples(samples_dir: Path) -> List[Path]:
     return valid_samples
 
 
+def enqueue_samples(lease_queue: LeaseQueue, samples: List[Path], history: TimingHistory) -> int:
+    """
+    Add samples to the verification queue, longest-first by recorded timings.
+
+    The payload holds a hash of the sample's files only, so an edited sample
+    is queued again even if it was already verified, while workers with a
+    different JDK or framework checkout agree on the key and never reset each
+    other's units.
+    """
+    added = 0
+    for sample_dir in samples:
+        added += lease_queue.add(VERIFY_QUEUE, sample_dir.name, {"key": sample_key(sample_dir, "")},
+                                 priority=history.timings.get(sample_dir.name, 0.0), reset_if_changed=True)
+    return added
+
+
+def run_queue_worker(lease_queue: LeaseQueue, worker_id: str, samples_dir: Path,
+                     verify_fn: Callable[[Path], Tuple[str, bool, str]], scheduler: JVMScheduler,
+                     lease_seconds: float) -> Iterator[Tuple[str, object]]:
+    """
+    Claim samples from the shared queue and verify them locally until the queue is drained.
+
+    Runs scheduler.concurrency() claim loops. Each loop waits for the
+    scheduler's memory admission before it claims a sample, so a worker never
+    holds a lease on a sample it has no memory for. Each lease is renewed
+    while its sample is being verified, so only samples of crashed or killed
+    workers expire and are claimed again. A loop that finds nothing to claim keeps polling while
+    other workers still hold leases. Yields (name, result) like
+    JVMScheduler.run; results without a verdict (infrastructure errors) are
+    released for another attempt instead of being stored or yielded.
+    """
+    done: Queue = Queue()
+    poll_interval = min(10.0, lease_seconds / 4)
+
+    def work() -> None:
+        try:
+            while True:
+                with scheduler.admitted():
+                    units = lease_queue.claim(VERIFY_QUEUE, worker_id, lease_seconds, max_attempts=MAX_ATTEMPTS)
+                    if units:
+                        name = units[0]["key"]
+                        try:
+                            with lease_queue.keep_alive(VERIFY_QUEUE, name, worker_id, lease_seconds):
+                                sample_name, success, output = verify_fn(samples_dir / name)
+                        except Exception as e:
+                            lease_queue.release(VERIFY_QUEUE, name, worker_id, error=str(e))
+                            done.put((name, e))
+                            continue
+                if not units:
+                    if lease_queue.unfinished(VERIFY_QUEUE) == 0:
+                        return
+                    time.sleep(poll_interval)
+                    continue
+                if not is_verdict(success, output):
+                    lease_queue.release(VERIFY_QUEUE, name, worker_id, error=output[-2000:])
+                    continue
+                if not lease_queue.complete(VERIFY_QUEUE, name, worker_id,
+                                              {"success": success, "output": output[:MAX_QUEUE_OUTPUT_CHARS],
+                                               "worker": worker_id}):
+                    # Our lease expired and another worker took the sample over
+                    continue
+                done.put((name, (sample_name, success, output)))
+        finally:
+            done.put(None)
+
+    threads = scheduler.concurrency()
+    for _ in range(threads):
+        threading.Thread(target=work, daemon=True).start()
+    running = threads
+    while running:
+        item = done.get()
+        if item is None:
+            running -= 1
+        else:
+            yield item
+
+
+def report_queue(lease_queue: LeaseQueue) -> int:
+    """Print the state of the verification queue and the results stored in it."""
+    counts = lease_queue.counts(VERIFY_QUEUE)
+    print("Queue: " + ", ".join(f"{status} {n}" for status, n in sorted(counts.items())))
+    for unit in lease_queue.iter_units(VERIFY_QUEUE):
+        if unit["status"] == DONE:
+            status = "✓ PASS" if unit["result"]["success"] else "✗ FAIL"
+            print(f"  {status}  {unit['key']}  ({unit['result'].get('worker')})")
+        else:
+            owner = f" ({unit['owner']})" if unit["owner"] else ""
+            print(f"  {unit['status']:<7} {unit['key']}{owner}")
+    return 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Verify all samples in the data/samples directory by running verification tests."
@@ -42,6 +153,121 @@ def main() -> int:
         default=None,
         help="Path to samples directory (default: ../data/samples relative to this script)"
     )
+    parser.add_argument(
+        "--catalog",
+        type=str,
+        default=None,
+        help="Pipeline catalog (SQLite) to record verification results in"
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Verify in reusable workspaces backed by warm Gradle daemons instead of fresh copies"
+    )
+    parser.add_argument(
+        "--slots",
+        type=int,
+        default=None,
+        help="Number of fast-mode workspaces (and Gradle daemons) used concurrently "
+             "(default: what --max-jvms/--mem-per-jvm allow)"
+    )
+    parser.add_argument(
+        "--max-jvms",
+        type=int,
+        default=None,
+        help="Maximum number of JVMs running at once; each verification runs about 3 (default: CPU count)"
+    )
+    parser.add_argument(
+        "--mem-per-jvm",
+        type=int,
+        default=1024,
+        help="Memory budget per JVM in MB; concurrency is capped by available memory divided by this, "
+             "and Gradle and test JVM heaps are set to 3/4 of it"
+    )
+    parser.add_argument(
+        "--timings",
+        type=str,
+        default=None,
+        help="JSON file with per-sample durations, used to start the slowest samples first "
+             "(default: ../data/verify_timings.json relative to this script)"
+    )
+    parser.add_argument(
+        "--workspace-dir",
+        type=str,
+        default=None,
+        help="Directory for fast-mode workspaces (default: ../data/workspaces relative to this script)"
+    )
+    parser.add_argument(
+        "--testkit-dir",
+        type=str,
+        default=None,
+        help="Directory for the shared, pre-warmed TestKit directories of the nested builds, one per "
+             "worker (default: ../data/testkit; fast-mode workspaces keep their own)"
+    )
+    parser.add_argument(
+        "--no-shared-testkit",
+        action="store_true",
+        help="Let every nested build bootstrap its own TestKit directory"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Always run both O and M, even when the first run already decides the outcome (for debugging)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Verification result cache, keyed by a hash of the sample, framework and JDK "
+             "(default: ../data/verify_cache relative to this script)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-verify every sample even if its inputs did not change (results are still stored)"
+    )
+    parser.add_argument(
+        "--results-log",
+        type=str,
+        default=None,
+        help="JSONL file for per-test results and per-phase timings "
+             "(default: ../data/verify_results.jsonl; summarize with timing_report.py)"
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Use the distribution and Maven mirror built by offline_mirror.py and never access the network"
+    )
+    parser.add_argument(
+        "--offline-dir",
+        type=str,
+        default=None,
+        help="Offline mirror directory (default: ../data/offline relative to this script)"
+    )
+    parser.add_argument(
+        "--queue",
+        type=str,
+        default=None,
+        help="Shared lease queue (SQLite) for distributed verification: adds all samples to it; without "
+             "--worker, only prints the queue's state and results"
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="With --queue: claim samples from the queue and verify them here until it is drained"
+    )
+    parser.add_argument(
+        "--worker-id",
+        type=str,
+        default=None,
+        help="Name of this worker in the queue (default: <hostname>:<pid>)"
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=900,
+        help="Lease duration; a crashed worker's samples are claimed again after it expires (default: 900)"
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -64,6 +290,15 @@ def main() -> int:
         print(f"ERROR: Samples directory not found: {samples_dir}", file=sys.stderr)
         return 1
 
+    if args.offline:
+        offline_dir = Path(args.offline_dir).resolve() if args.offline_dir else (script_dir.parent / "data" / "offline")
+        try:
+            activate(offline_dir)
+        except FileNotFoundError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+        print(f"Offline mode: using {offline_dir}")
+
     # Find all valid samples
     print(f"Scanning for samples in: {samples_dir}")
     samples = find_samples(samples_dir)
@@ -77,17 +312,78 @@ def main() -> int:
         return 0
 
     print(f"Found {len(samples)} valid sample(s)\n")
+
+    catalog = PipelineCatalog(args.catalog) if args.catalog else None
+    results = []
+    unverified: List[str] = []
+
+    cache = VerificationCache(args.cache_dir or str(script_dir.parent / "data" / "verify_cache"), framework_src)
+    history = TimingHistory(args.timings or str(script_dir.parent / "data" / "verify_timings.json"))
+
+    lease_queue = None
+    if args.queue:
+        lease_queue = LeaseQueue(args.queue)
+        added = enqueue_samples(lease_queue, samples, history)
+        print(f"Queued {added} new or changed sample(s) in: {args.queue}")
+        if not args.worker:
+            return report_queue(lease_queue)
+        worker_id = args.worker_id or default_worker_id()
+        print(f"Worker {worker_id}: claiming samples until the queue is drained\n")
+
+    # Report unchanged samples from the cache; only new or edited ones are verified
+    # (queue workers check the cache per claimed sample instead)
+    if not (args.no_cache or args.full) and lease_queue is None:
+        to_verify = []
+        for sample_dir in samples:
+            cached = cache.get(sample_dir)
+            if cached is None:
+                to_verify.append(sample_dir)
+                continue
+            success, output = cached
+            results.append((sample_dir.name, success, output))
+            if args.verbose:
+                print(f"[cached] {sample_dir.name}: {'SUCCESS' if success else 'FAILED'}")
+        if results:
+            print(f"{len(results)} sample(s) unchanged since their last verification (cached), "
+                  f"{len(to_verify)} to verify\n")
+        samples = to_verify
+    cached_count = len(results)
+
+    scheduler = JVMScheduler(max_jvms=args.max_jvms, mem_per_jvm_mb=args.mem_per_jvm)
+    jvm_heap_mb = args.mem_per_jvm * 3 // 4
+    policy = VerificationPolicy(str(script_dir.parent / "data" / "verify_policy.json"), full=args.full)
+    result_log = ResultLog(args.results_log or str(script_dir.parent / "data" / "verify_results.jsonl"))
+    print(f"Running up to {scheduler.concurrency()} verification(s) at once "
+          f"({args.mem_per_jvm} MB per JVM, {jvm_heap_mb} MB heap)")
+
+    pool = None
+    if args.fast and samples:
+        workspace_dir = Path(args.workspace_dir).resolve() if args.workspace_dir else (
+                script_dir.parent / "data" / "workspaces").resolve()
+        slots = args.slots or scheduler.concurrency()
+        print(f"Warming up {slots} Gradle workspace(s) in: {workspace_dir}")
+        pool = WorkspacePool(framework_src, workspace_dir, slots=slots)
+
+    testkit_pool = None
+    if not args.fast and not args.no_shared_testkit and samples:
+        testkit_dir = Path(args.testkit_dir).resolve() if args.testkit_dir else (
+                script_dir.parent / "data" / "testkit").resolve()
+        testkit_pool = TestKitPool(testkit_dir, slots=scheduler.concurrency())
+        print(f"Preparing {testkit_pool.slots} shared TestKit director(ies) in: {testkit_dir}")
+        testkit_pool.prewarm(framework_src)
+
     print("=" * 80)
 
     # Verify each sample in parallel
-    results = []
     print_lock = threading.Lock()
     completed = [0]
 
     def verify_and_report(sample_dir: Path) -> Tuple[str, bool, str]:
         sample_name = sample_dir.name
         try:
-            success, output = verify_sample(sample_dir, framework_src, verbose=False)
+            success, output = verify_sample(sample_dir, framework_src, verbose=False, pool=pool,
+                                            jvm_heap_mb=jvm_heap_mb, policy=policy, result_log=result_log,
+                                            testkit_pool=testkit_pool)
         except Exception as e:
             success, output = False, f"ERROR: {str(e)}"
 
@@ -107,13 +403,46 @@ def main() -> int:
 
         return sample_name, success, output
 
-    with ThreadPoolExecutor() as executor:
-        futures = [executor.submit(verify_and_report, s) for s in samples]
-        for future in as_completed(futures):
-            try:
-                results.append(future.result())
-            except Exception as e:
-                print(f"ERROR: Verification failed with exception: {e}", file=sys.stderr)
+    def verify_or_cached(sample_dir: Path) -> Tuple[str, bool, str]:
+        nonlocal cached_count
+        if not (args.no_cache or args.full):
+            cached = cache.get(sample_dir)
+            if cached is not None:
+                with print_lock:
+                    cached_count += 1
+                return (sample_dir.name,) + cached
+        started = time.time()
+        outcome = verify_and_report(sample_dir)
+        history.record(sample_dir.name, time.time() - started)
+        return outcome
+
+    if lease_queue is not None:
+        outcomes = run_queue_worker(lease_queue, worker_id, samples_dir, verify_or_cached,
+                                    scheduler, lease_seconds=args.lease_seconds)
+    else:
+        # Slowest samples first, as many at once as memory allows
+        outcomes = scheduler.run([(s.name, s) for s in samples], verify_and_report, history=history)
+    for _, result in outcomes:
+        if isinstance(result, Exception):
+            print(f"ERROR: Verification failed with exception: {result}", file=sys.stderr)
+            continue
+        sample_name, success, output = result
+        if not is_verdict(success, output):
+            # Gradle failed before any test ran: neither stored nor counted as a failure
+            unverified.append(sample_name)
+            continue
+        results.append((sample_name, success, output))
+        cache.put(samples_dir / sample_name, success, output)
+
+    if catalog is not None:
+        for sample_name, success, _ in results:
+            catalog.record_sample(sample_name, path=str(samples_dir / sample_name),
+                                  status="verified" if success else "failed",
+                                  details={"success": success})
+
+    policy.save()
+    if lease_queue is not None:
+        history.save()
 
     # Print summary
     print("\n" + "=" * 80)
@@ -126,14 +455,21 @@ def main() -> int:
     print(f"\nTotal samples: {len(results)}")
     print(f"Successful:    {successful} ✓")
     print(f"Failed:        {failed} ✗")
+    if unverified:
+        print(f"No verdict:    {len(unverified)} (no test results; verified again next run)")
+    print(f"From cache:    {cached_count}")
+    print(f"Gradle runs skipped (outcome already decided): {policy.skipped} of {2 * (len(results) - cached_count)}")
+    print(f"Per-test results and timings (run {result_log.run_id}): {result_log.path}")
     print()
 
     for sample_name, success, _ in results:
         status = "✓ PASS" if success else "✗ FAIL"
         print(f"  {status}  {sample_name}")
+    for sample_name in unverified:
+        print(f"  ⚠ NO VERDICT  {sample_name}")
 
-    if failed > 0:
-        print(f"\n{failed} sample(s) failed verification.")
+    if failed > 0 or unverified:
+        print(f"\n{failed} sample(s) failed verification, {len(unverified)} without a verdict.")
         return 1
 
     print("\nAll samples passed verification!")
@@ -7,7 +7,15 @@ import shutil
 import subprocess
 import sys
 import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
+from queue import Queue
+
+from offline_mirror import offline_args
+from test_results import ResultLog, parse_test_results
+from verification_policy import VerificationPolicy
 
 
 def _require_file(path: Path, description: str) -> None:
@@ -20,18 +28,216 @@ def _require_dir(path: Path, description: str) -> None:
         raise FileNotFoundError(f"Missing {description}: {path}")
 
 
-def _run_tests(framework_dir: Path, sample_name: str, variant_label: str, build_file: Path, test_classes: list[str]) -> tuple[bool, str]:
+# Framework files linked into each fast-mode workspace; everything else
+# (src/test/java, build/, .gradle/) is private to the workspace.
+FRAMEWORK_FILES = ("build.gradle.kts", "settings.gradle.kts", "gradlew", "gradle")
+
+# Test that runs one nested build to warm up a TestKit directory
+WARMUP_TEST = Path("warmup") / "TestKitWarmupTest.java"
+
+# TestKit directory of a fast-mode workspace slot
+SLOT_TESTKIT_DIR = ".testkit"
+
+# javac error in one of the sample's tests: the test is broken, which is a verdict on the sample
+TEST_COMPILE_ERROR_RE = re.compile(r"src/test/java/\S+\.java:\d+: error:")
+
+# Header in front of the Gradle output appended to failed verifications
+CAPTURED_OUTPUT = "--- Captured output"
+
+
+def is_verdict(success: bool, output: str) -> bool:
+    """
+    Whether a verification result says something about the sample.
+
+    Runs that ended before any test ran (network or dependency resolution
+    failures, a crashed daemon, an OOM kill, exceptions) are reported with an
+    "ERROR:" line; they say nothing about the sample and must not be cached,
+    stored or repaired. Only the summary is searched, not the Gradle output
+    appended after it.
+    """
+    if success:
+        return True
+    for line in output.splitlines():
+        if line.startswith(CAPTURED_OUTPUT):
+            break
+        if line.startswith("ERROR:"):
+            return False
+    return True
+
+
+def _link(src: Path, dest: Path) -> None:
+    """
+    Hardlink a file (symlink directories or across filesystems), never copy.
+
+    An existing link is kept only while it still points at `src`: git
+    checkouts and editors replace files with new inodes, and a stale hardlink
+    would keep running the old content.
+    """
+    if dest.is_symlink() or dest.exists():
+        try:
+            if os.path.samefile(src, dest):
+                return
+        except OSError:
+            pass  # Dangling symlink
+        if dest.is_dir() and not dest.is_symlink():
+            shutil.rmtree(dest)
+        else:
+            dest.unlink()
+    if src.is_dir():
+        dest.symlink_to(src, target_is_directory=True)
+        return
+    try:
+        os.link(src, dest)
+    except OSError:
+        dest.symlink_to(src)
+
+
+def _warm_up_testkit(framework_dir: Path, testkit_dir: Path, framework_src: Path, daemon: bool = False) -> bool:
+    """Run the warmup test in framework_dir so that testkit_dir holds the distribution and caches."""
+    tests_dir = framework_dir / "src" / "test" / "java"
+    if tests_dir.exists():
+        shutil.rmtree(tests_dir)
+    tests_dir.mkdir(parents=True)
+    shutil.copy2(framework_src / WARMUP_TEST, tests_dir / WARMUP_TEST.name)
+    proc = subprocess.run(
+        [str(framework_dir / "gradlew"), "--daemon" if daemon else "--no-daemon", "-q", "test",
+         f"-Dsample.testKitDir={testkit_dir}", f"--tests={WARMUP_TEST.stem}"] + offline_args(),
+        cwd=str(framework_dir), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return proc.returncode == 0
+
+
+class TestKitPool:
+    """
+    One persistent TestKit directory per concurrent worker.
+
+    GradleRunner uses the TestKit directory as the Gradle user home of its
+    nested builds: daemon registry, unpacked distribution, compiled script
+    and dependency caches. Without a shared directory every nested build in a
+    fresh workspace bootstraps these again; with a pool, all samples verified
+    by the same worker share one warm directory. Workers never share a directory, so
+    concurrent nested builds do not contend for its locks. Directories survive
+    between runs and are only warmed up once (marked by a `.warm` file).
+    """
+
+    def __init__(self, root_dir: Path, slots: int):
+        self.root_dir = Path(root_dir).resolve()
+        self.slots = max(1, slots)
+        self.dirs = [self.root_dir / f"worker_{i}" for i in range(self.slots)]
+        self._free: Queue = Queue()
+        for testkit_dir in self.dirs:
+            testkit_dir.mkdir(parents=True, exist_ok=True)
+            self._free.put(testkit_dir)
+
+    def prewarm(self, framework_src: Path) -> None:
+        """Warm up all directories that are not warm yet, in parallel."""
+        cold = [d for d in self.dirs if not (d / ".warm").exists()]
+
+        def warm(testkit_dir: Path) -> None:
+            with _temporary_framework(framework_src) as framework_dir:
+                if _warm_up_testkit(framework_dir, testkit_dir, framework_src):
+                    (testkit_dir / ".warm").touch()
+
+        threads = [threading.Thread(target=warm, args=(d,)) for d in cold]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a TestKit directory; blocks until one is free."""
+        testkit_dir = self._free.get()
+        try:
+            yield testkit_dir
+        finally:
+            self._free.put(testkit_dir)
+
+
+class WorkspacePool:
+    """
+    Pool of persistent framework workspaces, each served by a warm Gradle daemon.
+
+    Every slot is a directory whose framework files are links to the framework
+    sources, so creating it copies nothing. Slots are reused across samples,
+    which keeps their build/ directory: the framework's compiled classes,
+    resolved dependencies and incremental compilation state survive, and only
+    the sample's test class is recompiled. Builds run with the Gradle daemon,
+    so JVM startup and Gradle initialization are paid once per slot instead
+    of twice per sample. Each slot also owns a TestKit directory (see
+    TestKitPool), shared by the nested builds of all its samples.
+    """
+
+    def __init__(self, framework_src: Path, root_dir: Path, slots: int, prewarm: bool = True):
+        self.framework_src = Path(framework_src).resolve()
+        self.root_dir = Path(root_dir).resolve()
+        self.slots = max(1, slots)
+        self._free: Queue = Queue()
+        for i in range(self.slots):
+            self._free.put(self._create_slot(i))
+        if prewarm:
+            self.prewarm()
+
+    def _create_slot(self, index: int) -> Path:
+        slot_dir = self.root_dir / f"slot_{index}"
+        slot_dir.mkdir(parents=True, exist_ok=True)
+        self._link_framework(slot_dir)
+        return slot_dir
+
+    def _link_framework(self, slot_dir: Path) -> None:
+        """(Re-)link the framework files, so that slots from earlier runs pick up edits."""
+        for name in FRAMEWORK_FILES:
+            src = self.framework_src / name
+            if src.exists():
+                _link(src, slot_dir / name)
+
+    def prewarm(self) -> None:
+        """Start each slot's daemon, compile the framework and warm up its TestKit directory, in parallel."""
+        slots = [self._free.get() for _ in range(self.slots)]
+        try:
+            threads = [
+                threading.Thread(target=_warm_up_testkit,
+                                 args=(slot, slot / SLOT_TESTKIT_DIR, self.framework_src, True))
+                for slot in slots
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            for slot in slots:
+                self._free.put(slot)
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a workspace for one sample; blocks until a slot is free."""
+        slot = self._free.get()
+        try:
+            self._link_framework(slot)
+            yield slot
+        finally:
+            self._free.put(slot)
+
+
+def _run_tests(framework_dir: Path, sample_name: str, variant_label: str, build_file: Path, test_classes: list[str],
+               daemon: bool = False, jvm_heap_mb: int = None, testkit_dir: Path = None) -> tuple[bool, str]:
     gradle_cmd = framework_dir / "gradlew"
     env = os.environ.copy()
+    heap_args = []
+    if jvm_heap_mb:
+        heap_args = [f"-Dorg.gradle.jvmargs=-Xmx{jvm_heap_mb}m", f"-Dsample.testMaxHeap={jvm_heap_mb}m"]
     cmd = (
             [str(gradle_cmd)]
             + [
-                "--no-daemon",
+                "--daemon" if daemon else "--no-daemon",
                 "test",
                 f"-Dsample.name={sample_name}",
                 f"-Dsample.variant={variant_label}",
                 f"-Dsample.buildFile={str(build_file)}",
             ]
+            + heap_args
+            + offline_args()
+            + ([f"-Dsample.testKitDir={testkit_dir}"] if testkit_dir else [])
             + [f"--tests={test_class}" for test_class in test_classes]
     )
 
@@ -46,7 +252,60 @@ def _run_tests(framework_dir: Path, sample_name: str, variant_label: str, build_
     return proc.returncode == 0, proc.stdout
 
 
-def verify_sample(sample_dir: Path, framework_src: Path, verbose: bool = True) -> tuple[bool, str]:
+def _install_tests(framework_dir: Path, test_files: list[Path], log) -> list[str]:
+    """Copy the verification tests into the framework and return their class names."""
+    dest_tests_dir = framework_dir / "src" / "test" / "java"
+    if dest_tests_dir.exists():
+        # Reused workspace: drop the previous sample's tests
+        shutil.rmtree(dest_tests_dir)
+    dest_tests_dir.mkdir(parents=True, exist_ok=True)
+
+    log("Copying verification test(s)...")
+    test_classes = []
+    for test_file in test_files:
+        dest_name = test_file.name
+        class_name = None
+        try:
+            content = test_file.read_text(encoding="utf-8")
+            m = re.search(r"\bpublic\s+class\s+([A-Za-z_][A-Za-z0-9_]*)\b", content)
+            if m:
+                class_name = m.group(1)
+                expected_name = f"{class_name}.java"
+                if dest_name != expected_name:
+                    dest_name = expected_name
+        except Exception:
+            # Best-effort; if we can't parse, keep the original filename.
+            pass
+
+        shutil.copy2(test_file, dest_tests_dir / dest_name)
+        if dest_name == test_file.name:
+            log(f"  Copied test: {test_file.name}")
+        else:
+            log(f"  Copied test: {test_file.name} -> {dest_name}")
+
+        # Collect class name for targeted test execution
+        if class_name:
+            test_classes.append(class_name)
+        else:
+            # Fallback: derive class name from filename
+            test_classes.append(dest_name.replace(".java", ""))
+    log()
+    return test_classes
+
+
+@contextmanager
+def _temporary_framework(framework_src: Path):
+    """Fresh copy of the framework, removed afterwards."""
+    with tempfile.TemporaryDirectory(prefix="swe_bench_poc_verify_") as tmp:
+        framework_dir = Path(tmp) / "framework"
+        shutil.copytree(framework_src, framework_dir)
+        yield framework_dir
+
+
+def verify_sample(sample_dir: Path, framework_src: Path, verbose: bool = True,
+                  pool: WorkspacePool = None, jvm_heap_mb: int = None,
+                  policy: VerificationPolicy = None, result_log: ResultLog = None,
+                  testkit_pool: TestKitPool = None) -> tuple[bool, str]:
     """
     Core verification logic for a single sample.
     
@@ -54,12 +313,22 @@ def verify_sample(sample_dir: Path, framework_src: Path, verbose: bool = True) -
         sample_dir: Path to the sample directory
         framework_src: Path to the gradle-testkit-framework directory
         verbose: Whether to print progress messages
+        pool: Optional WorkspacePool; runs in a reused, daemon-backed workspace
+            instead of a fresh copy of the framework with --no-daemon
+        jvm_heap_mb: Optional max heap for the Gradle and test JVMs
+        policy: VerificationPolicy deciding which variant runs first and whether
+            the second run can be skipped (default: O first, short-circuit)
+        result_log: Optional ResultLog receiving the JUnit results of each
+            variant and the time spent in setup, Gradle and the tests
+        testkit_pool: Optional TestKitPool for nested builds when running without
+            a WorkspacePool (pool slots have their own TestKit directory)
     
     Returns:
         Tuple of (success: bool, output: str)
     """
     output_lines = []
-    
+    policy = policy or VerificationPolicy()
+
     def log(msg: str = "") -> None:
         """Helper to capture output."""
         if verbose:
@@ -86,78 +355,87 @@ def verify_sample(sample_dir: Path, framework_src: Path, verbose: bool = True) -
         log(f"Framework: {framework_src}")
         log()
 
-        with tempfile.TemporaryDirectory(prefix="swe_bench_poc_verify_") as tmp:
-            tmp_dir = Path(tmp)
-            framework_dir = tmp_dir / "framework"
-            shutil.copytree(framework_src, framework_dir)
-
-            dest_tests_dir = framework_dir / "src" / "test" / "java"
-            dest_tests_dir.mkdir(parents=True, exist_ok=True)
-
-            log("Copying verification test(s)...")
-            test_classes = []
-            for test_file in test_files:
-                dest_name = test_file.name
-                class_name = None
-                try:
-                    content = test_file.read_text(encoding="utf-8")
-                    m = re.search(r"\bpublic\s+class\s+([A-Za-z_][A-Za-z0-9_]*)\b", content)
-                    if m:
-                        class_name = m.group(1)
-                        expected_name = f"{class_name}.java"
-                        if dest_name != expected_name:
-                            dest_name = expected_name
-                except Exception:
-                    # Best-effort; if we can't parse, keep the original filename.
-                    pass
-
-                shutil.copy2(test_file, dest_tests_dir / dest_name)
-                if dest_name == test_file.name:
-                    log(f"  Copied test: {test_file.name}")
-                else:
-                    log(f"  Copied test: {test_file.name} -> {dest_name}")
-                
-                # Collect class name for targeted test execution
-                if class_name:
-                    test_classes.append(class_name)
-                else:
-                    # Fallback: derive class name from filename
-                    test_classes.append(dest_name.replace(".java", ""))
-            log()
-
-            log("Testing with Original (O) build script...")
-            log("=" * 60)
-            ok_original, out_original = _run_tests(framework_dir, sample_name, "O", original_build, test_classes)
-            if ok_original:
-                log("Original PASSED (unexpected)")
+        daemon = pool is not None
+        # Setup covers copying the framework (or borrowing a pool slot) and installing the tests
+        setup_started = time.time()
+        with ExitStack() as stack:
+            framework_dir = stack.enter_context(pool.acquire() if daemon else _temporary_framework(framework_src))
+            if daemon:
+                testkit_dir = framework_dir / SLOT_TESTKIT_DIR
+            elif testkit_pool is not None:
+                testkit_dir = stack.enter_context(testkit_pool.acquire())
             else:
-                log("Original FAILED (as expected)")
+                testkit_dir = None
+            test_classes = _install_tests(framework_dir, test_files, log)
+            if result_log is not None:
+                result_log.phase(sample_name, None, "setup", time.time() - setup_started)
+            results_dir = framework_dir / "build" / "test-results" / "test"
 
-            log()
-            log("Testing with Modified (M) build script...")
-            log("=" * 60)
-            ok_modified, out_modified = _run_tests(framework_dir, sample_name, "M", modified_build, test_classes)
-            if ok_modified:
-                log("Modified PASSED (as expected)")
-            else:
-                log("Modified FAILED (unexpected)")
+            builds = {"O": ("Original", original_build), "M": ("Modified", modified_build)}
+            expected = {"O": "FAILED", "M": "PASSED"}
+            passed = {}
+            outputs = {}
+            decided = False
+            inconclusive = None
+            order = policy.order()
+            for variant in order:
+                label, build_file = builds[variant]
+                if decided:
+                    log(f"Skipping {label} ({variant}) build script: outcome already decided")
+                    log()
+                    policy.record_skip()
+                    continue
+                log(f"Testing with {label} ({variant}) build script...")
+                log("=" * 60)
+                # Reused workspaces still hold the previous run's reports
+                shutil.rmtree(results_dir, ignore_errors=True)
+                started = time.time()
+                passed[variant], outputs[variant] = _run_tests(
+                    framework_dir, sample_name, variant, build_file.resolve(), test_classes,
+                    daemon=daemon, jvm_heap_mb=jvm_heap_mb, testkit_dir=testkit_dir
+                )
+                records = parse_test_results(results_dir, test_classes)
+                if result_log is not None:
+                    test_seconds = sum(r["seconds"] for r in records)
+                    result_log.tests(sample_name, variant, records)
+                    result_log.phase(sample_name, variant, "tests", test_seconds)
+                    result_log.phase(sample_name, variant, "gradle",
+                                     max(0.0, time.time() - started - test_seconds))
+                if not records and not TEST_COMPILE_ERROR_RE.search(outputs[variant]):
+                    # Gradle stopped before the tests ran: no verdict on either variant
+                    inconclusive = variant
+                    log(f"ERROR: no test results for {label} ({variant}), Gradle failed before running tests")
+                    log()
+                    break
+                result = "PASSED" if passed[variant] else "FAILED"
+                log(f"{label} {result} ({'as expected' if result == expected[variant] else 'unexpected'})")
+                log()
+                decided = not policy.record(variant, passed[variant], time.time() - started)
+
+            def report(variant: str) -> str:
+                if variant == inconclusive:
+                    return "NO RESULTS"
+                if variant not in passed:
+                    return "SKIPPED"
+                ok = passed[variant] == (variant == "M")
+                return f"{'PASS' if passed[variant] else 'FAIL'} {'✓' if ok else '✗'}"
 
-            log()
             log("=" * 60)
             log("VERIFICATION RESULT")
             log("=" * 60)
-            log(f"Original (O): {'PASS ✗' if ok_original else 'FAIL ✓'}")
-            log(f"Modified (M): {'PASS ✓' if ok_modified else 'FAIL ✗'}")
+            log(f"Original (O): {report('O')}")
+            log(f"Modified (M): {report('M')}")
 
-            success = (not ok_original) and ok_modified
+            # A skipped variant can only mean the other one already rejected the sample
+            success = inconclusive is None and passed.get("O") is False and passed.get("M") is True
             log()
             log(f"Verification: {'SUCCESS' if success else 'FAILED'}")
 
             if not success:
-                log("\n--- Captured output (Original) ---\n")
-                log(out_original)
-                log("\n--- Captured output (Modified) ---\n")
-                log(out_modified)
+                for variant in order:
+                    if variant in outputs:
+                        log(f"\n{CAPTURED_OUTPUT} ({builds[variant][0]}) ---\n")
+                        log(outputs[variant])
 
             return success, "\n".join(output_lines)
     
@@ -172,12 +450,24 @@ def main() -> int:
         description="Verify a sample by running its verification tests against original and modified build scripts."
     )
     parser.add_argument("sample_dir", type=str, help="Path to a sample directory")
+    parser.add_argument("--fast", action="store_true",
+                        help="Run in a reusable workspace with a warm Gradle daemon (see --workspace-dir)")
+    parser.add_argument("--workspace-dir", type=str, default=None,
+                        help="Directory for fast-mode workspaces (default: ../data/workspaces)")
+    parser.add_argument("--full", action="store_true",
+                        help="Always run both variants, even when the first one already decides the outcome")
     args = parser.parse_args()
 
     sample_dir = Path(args.sample_dir).resolve()
     framework_src = (Path(__file__).resolve().parent.parent / "gradle-testkit-framework").resolve()
-    
-    success, _ = verify_sample(sample_dir, framework_src, verbose=True)
+
+    pool = None
+    if args.fast:
+        workspace_dir = Path(args.workspace_dir) if args.workspace_dir else framework_src.parent / "data" / "workspaces"
+        pool = WorkspacePool(framework_src, workspace_dir, slots=1, prewarm=False)
+
+    success, _ = verify_sample(sample_dir, framework_src, verbose=True, pool=pool,
+                               policy=VerificationPolicy(full=args.full))
     return 0 if success else 2
 
 
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+from analyze_pairs import PairAnalyzer
+from catalog import HEURISTIC, PipelineCatalog
+
+
+def pair(good):
+    return {"pr_id": 1, "pr_url": "https://github.com/owner/repo/pull/1", "bad_commit": f"bad-{good}",
+            "bad_msg": "Break", "good_commit": good, "good_msg": "Fix"}
+
+
+def response(status, files=()):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = json.dumps({"files": [{"filename": f} for f in files]}).encode()
+    return resp
+
+
+class TestPairAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.analyzer = PairAnalyzer("fake_token", "owner", "repo")
+        self.rate_limited = {"g2"}
+
+    def fake_get(self, url, **kwargs):
+        if url.endswith("/g2") and "g2" in self.rate_limited:
+            return response(403)
+        return response(200, ["build.gradle"])
+
+    def test_failed_fetch_leaves_the_pair_for_the_next_run(self):
+        input_file, output_file = os.path.join(self.tmp.name, "in.json"), os.path.join(self.tmp.name, "out.json")
+        with open(input_file, "w") as f:
+            json.dump([pair("g1"), pair("g2")], f)
+
+        with mock.patch("analyze_pairs.requests.get", side_effect=self.fake_get):
+            self.analyzer.analyze(input_file, output_file)
+            with open(output_file) as f:
+                self.assertEqual([p["good_commit"] for p in json.load(f)], ["g1"])
+
+            self.rate_limited.clear()
+            self.analyzer.analyze(input_file, output_file)
+        with open(output_file) as f:
+            analyzed = {p["good_commit"]: p for p in json.load(f)}
+        self.assertEqual(sorted(analyzed), ["g1", "g2"])
+        self.assertEqual(analyzed["g2"]["category"], "Dependency Update")
+
+    def test_failed_fetch_keeps_the_catalog_pair_pending(self):
+        catalog = PipelineCatalog(os.path.join(self.tmp.name, "catalog.db"))
+        catalog.add_pairs("owner/repo", [pair("g1"), pair("g2")])
+
+        with mock.patch("analyze_pairs.requests.get", side_effect=self.fake_get):
+            self.analyzer.analyze("", "", catalog=catalog)
+
+        pending = [p["good_commit"] for p in catalog.iter_pairs("owner/repo", missing_verdict=HEURISTIC)]
+        self.assertEqual(pending, ["g2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
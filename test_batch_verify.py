@@ -0,0 +1,116 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-poc", "runner"))
+
+import batch_verify
+from batch_verify import failing_packages, package_for, parse_junit_reports, rewrite_test_source
+from verify_sample import is_verdict
+from test_results import ResultLog, parse_test_results, read_log
+
+SOURCE = """import org.junit.jupiter.api.Test;
+
+public class BuildScriptTest {
+    @Test
+    public void test() {
+        String buildFilePath = System.getProperty("sample.buildFile");
+        String variant = System.getProperty("sample.variant", "?");
+    }
+}
+"""
+
+REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuite name="samples.s_1.o.BuildScriptTest" tests="2">
+  <testcase name="a" classname="samples.s_1.o.BuildScriptTest" time="0.25"/>
+  <testcase name="b" classname="samples.s_1.o.BuildScriptTest" time="1.5"><failure message="expected 2.0">trace</failure></testcase>
+</testsuite>
+"""
+
+class TestBatchVerify(unittest.TestCase):
+    def test_rewrite_inlines_properties_and_sets_package(self):
+        rewritten = rewrite_test_source(SOURCE, "samples.s_1.o", {"buildFile": "/tmp/a b/build.gradle.kts",
+                                                                  "variant": "O", "name": "1"})
+        self.assertTrue(rewritten.startswith("package samples.s_1.o;"))
+        self.assertIn('String buildFilePath = "/tmp/a b/build.gradle.kts";', rewritten)
+        self.assertIn('String variant = "O";', rewritten)
+        self.assertNotIn("System.getProperty", rewritten)
+
+        again = rewrite_test_source(rewritten, "samples.s_2.m", {})
+        self.assertEqual(again.count("package "), 1)
+        self.assertTrue(again.startswith("package samples.s_2.m;"))
+
+    def test_package_for_sanitizes_names(self):
+        self.assertEqual(package_for("example_1-dep.update"), "s_example_1_dep_update")
+
+    def test_failing_packages(self):
+        output = ("/tmp/x/framework/src/test/java/samples/s_1/m/BuildScriptTest.java:12: error: ';' expected\n"
+                  "BUILD FAILED\n")
+        self.assertEqual(list(failing_packages(output)), ["s_1"])
+
+    def test_parse_junit_reports(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, "TEST-samples.s_1.o.BuildScriptTest.xml").write_text(REPORT)
+            results = parse_junit_reports(Path(tmp))
+        self.assertEqual(results[("s_1", "O")]["tests"], 2)
+        self.assertEqual(results[("s_1", "O")]["failures"], ["b: expected 2.0"])
+        self.assertNotIn(("s_1", "M"), results)
+
+    def test_result_log_records_tests_and_phases(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, "TEST-samples.s_1.o.BuildScriptTest.xml").write_text(REPORT)
+            records = parse_test_results(Path(tmp), ["BuildScriptTest"])
+            self.assertEqual(parse_test_results(Path(tmp), ["OtherTest"]), [])
+
+            log = ResultLog(os.path.join(tmp, "results.jsonl"), run_id="run1")
+            log.tests("1", "O", records)
+            log.phase("1", "O", "tests", 1.75)
+            logged = list(read_log(log.path))
+
+        self.assertEqual([(r["test"], r["status"], r["seconds"]) for r in logged[:2]],
+                         [("a", "passed", 0.25), ("b", "failed", 1.5)])
+        self.assertEqual(logged[1]["message"], "expected 2.0")
+        self.assertEqual((logged[0]["sample"], logged[0]["variant"], logged[0]["run"]), ("1", "O", "run1"))
+        self.assertEqual(logged[2], {"type": "phase", "run": "run1", "sample": "1", "variant": "O",
+                                     "phase": "tests", "seconds": 1.75})
+    def test_variant_without_results_is_not_a_verdict(self):
+        passing_m = REPORT.replace(".o.", ".m.").replace('<failure message="expected 2.0">trace</failure>', "")
+        skipped_o = ('<testsuite name="samples.s_2.o.BuildScriptTest" tests="1"><testcase name="a" '
+                     'classname="samples.s_2.o.BuildScriptTest"><skipped/></testcase></testsuite>')
+        reports = {
+            # The O test JVM died: only M wrote a report
+            "TEST-samples.s_1.m.BuildScriptTest.xml": passing_m,
+            "TEST-samples.s_2.o.BuildScriptTest.xml": skipped_o,
+            "TEST-samples.s_2.m.BuildScriptTest.xml": passing_m.replace("s_1", "s_2"),
+        }
+
+        def gradle(project_dir, *args):
+            if args[0] == "test":
+                results = project_dir / "build" / "test-results" / "test"
+                results.mkdir(parents=True)
+                for name, report in reports.items():
+                    (results / name).write_text(report)
+            return True, "BUILD SUCCESSFUL"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            samples = []
+            for name in ("1", "2"):
+                verification = Path(tmp, name, "verification")
+                verification.mkdir(parents=True)
+                (verification / "BuildScriptTest.java").write_text(SOURCE)
+                samples.append(verification.parent)
+            with mock.patch.object(batch_verify, "_gradle", side_effect=gradle):
+                outcomes = batch_verify.batch_verify(samples, Path(tmp, "framework"))
+
+        for name, missing in (("1", "original (O)"), ("2", "original (O)")):
+            success, output = outcomes[name]
+            self.assertFalse(success)
+            self.assertIn(f"ERROR: no test results for {name}: {missing}", output)
+            self.assertFalse(is_verdict(success, output))
+
+
+if __name__ == '__main__':
+    unittest.main()
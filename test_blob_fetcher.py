@@ -0,0 +1,107 @@
+import json
+import os
+import re
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-poc", "generator"))
+
+from blob_fetcher import BlobFetcher
+
+# owner/repo -> {"sha:path": (oid, text)}
+BLOBS = {
+    "o/a": {"c1:build.gradle.kts": ("oid1", "plugins { java }"), "c2:build.gradle.kts": ("oid1", "plugins { java }"),
+            "c1:settings.gradle.kts": ("oid2", "include(\":app\")"), "c2:settings.gradle.kts": ("oid3", "include()")},
+    "o/b": {"d1:build.gradle": ("oid4", "apply plugin: 'java'")},
+}
+
+
+class StubFetcher(BlobFetcher):
+    """Answers the aliased lookups from BLOBS instead of GitHub."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, token="token", **kwargs)
+        self.queries = []
+        self.failing = set()
+
+    def _query(self, query):
+        self.queries.append(query)
+        data, errors = {}, []
+        repos = list(re.finditer(r'(r\d+): repository\(owner: "([^"]+)", name: "([^"]+)"\)', query))
+        for match, following in zip(repos, repos[1:] + [None]):
+            block = query[match.end():following.start() if following else len(query)]
+            blobs = BLOBS.get(f"{match.group(2)}/{match.group(3)}")
+            if blobs is None:
+                # Unknown repository: GitHub returns null with an error
+                data[match.group(1)] = None
+                continue
+            fields = {}
+            for alias, expression in re.findall(r'(f\d+): object\(expression: ("[^"]+")\)', block):
+                expression = json.loads(expression)
+                blob = blobs.get(expression)
+                fields[alias] = {"oid": blob[0], "text": blob[1], "isBinary": False, "isTruncated": False} if blob else None
+                if expression in self.failing:
+                    # Transient failure: null with an error for the alias
+                    fields[alias] = None
+                    errors.append({"message": "timeout", "path": [match.group(1), alias]})
+            data[match.group(1)] = fields
+        return data, errors
+
+
+class TestBlobFetcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_one_request_per_batch(self):
+        fetcher = StubFetcher(self.tmp.name, batch_size=2)
+        files = [("o", "a", sha, path) for sha in ("c1", "c2")
+                 for path in ("build.gradle.kts", "settings.gradle.kts")] + [("o", "b", "d1", "build.gradle")]
+        fetcher.prefetch(files + files[:2])
+        # Five distinct versions, two lookups per request, oid and text in the same selection
+        self.assertEqual(len(fetcher.queries), 3)
+        self.assertTrue(all(q.count("object(expression:") <= 2 and "text" in q for q in fetcher.queries))
+        self.assertEqual(fetcher.get("o", "a", "c2", "settings.gradle.kts"), "include()")
+        self.assertEqual(fetcher.get("o", "b", "d1", "build.gradle"), "apply plugin: 'java'")
+        self.assertEqual(len(fetcher.queries), 3)
+
+    def test_cache_hits_across_instances(self):
+        first = StubFetcher(self.tmp.name)
+        self.assertEqual(first.get("o", "a", "c1", "build.gradle.kts"), "plugins { java }")
+        self.assertEqual(first.get("o", "a", "c2", "build.gradle.kts"), "plugins { java }")
+        # Identical content is stored once, by oid
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, "blobs")), ["oi"])
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, "blobs", "oi")), ["d1"])
+
+        second = StubFetcher(self.tmp.name)
+        second.prefetch([("o", "a", "c1", "build.gradle.kts"), ("o", "a", "c2", "build.gradle.kts")])
+        self.assertEqual(second.get("o", "a", "c2", "build.gradle.kts"), "plugins { java }")
+        self.assertEqual(second.queries, [])
+
+    def test_missing_paths(self):
+        fetcher = StubFetcher(self.tmp.name)
+        fetcher.prefetch([("o", "a", "c1", "missing.gradle"), ("o", "missing", "c1", "build.gradle")])
+        self.assertIsNone(fetcher.get("o", "a", "c1", "missing.gradle"))
+        self.assertEqual(len(fetcher.queries), 1)
+        # A missing file is remembered; an unresolved repository is looked up again
+        self.assertIsNone(fetcher.get("o", "missing", "c1", "build.gradle"))
+        self.assertEqual(len(fetcher.queries), 2)
+
+    def test_failed_lookups_are_not_cached_as_missing(self):
+        fetcher = StubFetcher(self.tmp.name)
+        fetcher.failing = {"c1:build.gradle.kts"}
+        fetcher.prefetch([("o", "a", "c1", "build.gradle.kts"), ("o", "a", "c1", "missing.gradle")])
+        self.assertIsNone(fetcher.get("o", "a", "c1", "build.gradle.kts"))
+        self.assertEqual(len(fetcher.queries), 2)
+
+        fetcher.failing.clear()
+        self.assertEqual(fetcher.get("o", "a", "c1", "build.gradle.kts"), "plugins { java }")
+        self.assertIsNone(fetcher.get("o", "a", "c1", "missing.gradle"))
+        self.assertEqual(len(fetcher.queries), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
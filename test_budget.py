@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+from multiprocessing import Process
+from unittest import mock
+
+from budget import BUDGET_ENV, Budget, BudgetExhausted
+from mine_fixes import GitHubMiner
+
+
+def charge_many(path, n):
+    budget = Budget(path)
+    for _ in range(n):
+        budget.charge("rest_calls")
+
+
+class TestBudget(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "budget_ledger.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_charges_from_several_processes_add_up(self):
+        budget = Budget.create(self.path, {"rest_calls": 100, "llm_tokens": None})
+        workers = [Process(target=charge_many, args=(self.path, 25)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(budget.usage()["rest_calls"]["used"], 100)
+        self.assertEqual(budget.exhausted(), "rest_calls")
+        with self.assertRaises(BudgetExhausted):
+            budget.check()
+
+    def test_unlimited_resources_never_exhaust(self):
+        budget = Budget.create(self.path, {"graphql_points": 5})
+        budget.charge("llm_tokens", 10 ** 9)
+        self.assertIsNone(budget.exhausted())
+        budget.charge("graphql_points", 5)
+        self.assertEqual(budget.exhausted(), "graphql_points")
+
+    def test_miner_stops_at_checkpoint_and_saves_cursor(self):
+        Budget.create(self.path, {"graphql_points": 1})
+        page = {"data": {"repository": {"pullRequests": {
+            "pageInfo": {"hasNextPage": True, "endCursor": "page1"},
+            "nodes": [{"number": 1, "url": "u",
+                       "commits": {"pageInfo": {"hasNextPage": False, "endCursor": None}, "nodes": []}}],
+        }}}}
+        response = mock.Mock(status_code=200)
+        response.json.return_value = page
+        with mock.patch.dict(os.environ, {BUDGET_ENV: self.path}), \
+                mock.patch("mine_fixes.requests.post", return_value=response) as post:
+            miner = GitHubMiner("token", "owner", "repo", prescreen=False)
+            state = os.path.join(self.tmp.name, "state.json")
+            miner.mine(100, os.path.join(self.tmp.name, "out.json"), state)
+        self.assertEqual(post.call_count, 1)
+        with open(state) as f:
+            self.assertEqual(json.load(f), {"cursor": "page1"})
+
+
+if __name__ == '__main__':
+    unittest.main()
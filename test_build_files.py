@@ -0,0 +1,38 @@
+import unittest
+from build_files import classify_build_files, filter_build_files, is_build_file, match_build_file
+
+class TestBuildFiles(unittest.TestCase):
+    def test_match_build_file(self):
+        self.assertEqual(match_build_file("app/build.gradle.kts"), "build_script")
+        self.assertEqual(match_build_file("build.gradle"), "build_script")
+        self.assertEqual(match_build_file("settings.gradle.kts"), "settings_script")
+        self.assertEqual(match_build_file("gradle/libs.versions.toml"), "version_catalog")
+        self.assertEqual(match_build_file("gradle/wrapper/gradle-wrapper.properties"), "wrapper_properties")
+        self.assertEqual(match_build_file("gradle.properties"), "gradle_properties")
+        self.assertEqual(match_build_file("build-logic/convention/src/main/kotlin/Graph.kt"), "build_logic")
+
+    def test_case_insensitive(self):
+        self.assertEqual(match_build_file("buildSrc/src/main/kotlin/Deps.kt"), "build_logic")
+        self.assertEqual(match_build_file("App/Build.Gradle.KTS"), "build_script")
+
+    def test_non_build_files(self):
+        self.assertIsNone(match_build_file("README.md"))
+        self.assertIsNone(match_build_file("app/src/main/kotlin/MainActivity.kt"))
+        self.assertIsNone(match_build_file(""))
+        self.assertFalse(is_build_file("gradle/wrapper/gradle-wrapper.jar"))
+
+    def test_bulk_classification(self):
+        paths = [
+            "README.md",
+            "app/build.gradle.kts",
+            "core/src/main/kotlin/Foo.kt",
+            "gradle/libs.versions.toml",
+        ]
+        self.assertEqual(
+            classify_build_files(paths),
+            {"app/build.gradle.kts": "build_script", "gradle/libs.versions.toml": "version_catalog"},
+        )
+        self.assertEqual(filter_build_files(paths), ["app/build.gradle.kts", "gradle/libs.versions.toml"])
+
+if __name__ == '__main__':
+    unittest.main()
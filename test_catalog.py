@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import catalog as catalog_module
+from catalog import AI, HEURISTIC, PipelineCatalog
+
+PAIR = {
+    "pr_id": 1,
+    "pr_url": "https://github.com/owner/repo/pull/1",
+    "bad_commit": "bad1",
+    "bad_msg": "Break build",
+    "good_commit": "good1",
+    "good_msg": "Fix build",
+}
+
+class TestPipelineCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.catalog = PipelineCatalog(os.path.join(self.tmp.name, "catalog.db"))
+
+    def tearDown(self):
+        self.catalog.close()
+        self.tmp.cleanup()
+
+    def test_add_pairs_is_idempotent_and_stores_cursor(self):
+        self.assertEqual(self.catalog.add_pairs("owner/repo", [PAIR], cursor="c1"), 1)
+        self.assertEqual(self.catalog.add_pairs("owner/repo", [PAIR], cursor="c2"), 0)
+        self.assertEqual(self.catalog.get_cursor("owner/repo"), "c2")
+        self.assertTrue(self.catalog.has_good_commit("owner/repo", "good1"))
+        self.assertFalse(self.catalog.has_good_commit("other/repo", "good1"))
+
+    def test_verdicts_drive_resumption(self):
+        self.catalog.add_pairs("owner/repo", [PAIR])
+        self.assertEqual(len(list(self.catalog.iter_pairs("owner/repo", missing_verdict=HEURISTIC))), 1)
+
+        self.catalog.record_files("owner/repo", PAIR, ["README.md", "app/build.gradle.kts"], "Dependency Update")
+        self.assertEqual(list(self.catalog.iter_pairs("owner/repo", missing_verdict=HEURISTIC)), [])
+
+        pending_ai = list(self.catalog.iter_pairs("owner/repo", missing_verdict=AI, with_verdict=HEURISTIC))
+        self.assertEqual(pending_ai[0]["files_changed"], ["README.md", "app/build.gradle.kts"])
+
+        self.catalog.record_verdict("owner/repo", PAIR, AI, "YES")
+        self.assertEqual(list(self.catalog.iter_pairs("owner/repo", missing_verdict=AI)), [])
+
+    def test_candidates(self):
+        other = dict(PAIR, bad_commit="bad2", good_commit="good2")
+        unanalyzed = dict(PAIR, bad_commit="bad3", good_commit="good3")
+        self.catalog.add_pairs("owner/repo", [PAIR, other, unanalyzed])
+        self.catalog.record_files("owner/repo", PAIR, ["README.md", "app/build.gradle.kts"], "Dependency Update")
+        self.catalog.record_files("owner/repo", other, ["README.md"], "Other")
+
+        candidates = list(self.catalog.iter_candidates())
+        self.assertEqual([c["good_commit"] for c in candidates], ["good1", "good3"])
+        self.assertEqual(candidates[0]["build_files_changed"], ["app/build.gradle.kts"])
+        self.assertIsNone(candidates[1]["build_files_changed"])
+
+    def test_iteration_pages_with_one_file_query_per_page(self):
+        pairs = [dict(PAIR, pr_id=n, bad_commit=f"bad{n}", good_commit=f"good{n}") for n in range(7)]
+        self.catalog.add_pairs("owner/repo", pairs)
+        for pair in pairs[::2]:
+            self.catalog.record_files("owner/repo", pair, [f"m{pair['pr_id']}/build.gradle", "README.md"], "Other")
+
+        queries = []
+        fetchall = self.catalog._fetchall
+        with mock.patch.object(catalog_module, "PAGE_SIZE", 3), \
+                mock.patch.object(self.catalog, "_fetchall", lambda q, p=(): queries.append(q) or fetchall(q, p)):
+            resumed = []
+            for pair in self.catalog.iter_pairs("owner/repo", missing_verdict=HEURISTIC):
+                # Writing while iterating does not disturb the pages
+                self.catalog.record_files("owner/repo", pair, [], "Other")
+                resumed.append(pair["pr_id"])
+            candidates = list(self.catalog.iter_candidates("owner/repo"))
+
+        self.assertEqual(resumed, [1, 3, 5])
+        self.assertEqual([(c["pr_id"], c["build_files_changed"]) for c in candidates],
+                         [(n, [f"m{n}/build.gradle"]) for n in (0, 2, 4, 6)])
+        # Each page is one pair query plus one file query, and each iteration ends with an empty page:
+        # one page of pairs to resume, two pages of candidates
+        self.assertEqual(len(queries), (1 * 2 + 1) + (2 * 2 + 1))
+
+    def test_json_round_trip(self):
+        analyzed = [dict(PAIR, files_changed=["build.gradle"], category="Dependency Update")]
+        input_file = os.path.join(self.tmp.name, "analyzed_results.json")
+        output_file = os.path.join(self.tmp.name, "export.json")
+        with open(input_file, "w") as f:
+            json.dump(analyzed, f)
+
+        self.catalog.import_json("analyzed", input_file, "owner/repo")
+        self.assertEqual(self.catalog.export_json("analyzed", output_file, "owner/repo"), 1)
+        with open(output_file) as f:
+            self.assertEqual(json.load(f), analyzed)
+
+    def test_candidates_and_samples_round_trip(self):
+        self.catalog.add_pairs("owner/repo", [PAIR, dict(PAIR, pr_id=2, good_commit="good2")])
+        self.catalog.record_files("owner/repo", PAIR, ["build.gradle", "App.kt"], "Dependency Update")
+        self.catalog.record_sample("1_good1", path="/samples/1_good1", status="verified", details={"success": True})
+        exports = {}
+        for stage in ("candidates", "samples"):
+            exports[stage] = os.path.join(self.tmp.name, f"{stage}.json")
+            self.catalog.export_json(stage, exports[stage], "owner/repo")
+
+        other = PipelineCatalog(os.path.join(self.tmp.name, "other.db"))
+        try:
+            with mock.patch.object(other, "transaction", wraps=other.transaction) as transaction:
+                self.assertEqual(other.import_json("candidates", exports["candidates"], "owner/repo"), 2)
+                self.assertEqual(other.import_json("samples", exports["samples"]), 1)
+            self.assertEqual(transaction.call_count, 2)
+            for stage, path in exports.items():
+                copy = os.path.join(self.tmp.name, f"copy_{stage}.json")
+                other.export_json(stage, copy, "owner/repo")
+                with open(path) as f, open(copy) as g:
+                    self.assertEqual(json.load(g), json.load(f))
+        finally:
+            other.close()
+
+        with self.assertRaises(ValueError):
+            self.catalog.import_json("unknown", exports["samples"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import unittest
+from argparse import Namespace
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-poc"))
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from closed_loop import RESULT_FILE, ClosedLoop
+
+WRONG_VERDICT = "Original (O): PASS ✗\nModified (M): PASS ✓\n\nVerification: FAILED"
+NO_RESULTS = "ERROR: no test results for Original (O), Gradle failed before running tests"
+
+
+class TestClosedLoop(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.args = Namespace(no_llm=False, llm_cache=os.path.join(self.tmp.name, "llm_cache"),
+                              usage_log=os.path.join(self.tmp.name, "usage.jsonl"), workers=1, verify_workers=1,
+                              max_repairs=2, output=self.tmp.name, token_budget=1000, no_prompt_cache=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_loop(self, verdicts, repaired=True):
+        sample_dir = Path(self.tmp.name) / "1_abc"
+        sample_dir.mkdir()
+        loop = ClosedLoop(self.args, Path(self.tmp.name))
+        repairs = []
+        with mock.patch.object(loop, "_verify", side_effect=verdicts), \
+                mock.patch.object(loop, "_repair",
+                                  side_effect=lambda d, output, attempt: repairs.append(attempt) or repaired):
+            results = loop.run([], [sample_dir])
+        return loop, results, repairs, sample_dir
+
+    def test_wrong_verdict_is_repaired(self):
+        loop, results, repairs, _ = self.run_loop([(False, WRONG_VERDICT), (True, "Verification: SUCCESS")])
+        self.assertEqual(repairs, [1])
+        self.assertEqual(results, {"1_abc": True})
+        self.assertEqual(loop.repaired, 1)
+
+    def test_no_test_results_are_not_repaired(self):
+        loop, results, repairs, sample_dir = self.run_loop([(False, NO_RESULTS)])
+        self.assertEqual(repairs, [])
+        self.assertEqual(results, {})
+        self.assertEqual(loop.unverified, 1)
+        # Verified again by the next run
+        self.assertFalse((sample_dir / RESULT_FILE).exists())
+
+    def test_failed_repair_leaves_sample_unverified(self):
+        # call_llm returns None on a timeout or 429, so the repair writes no test
+        loop, results, repairs, sample_dir = self.run_loop([(False, WRONG_VERDICT)], repaired=False)
+        self.assertEqual(repairs, [1])
+        self.assertEqual((results, loop.unverified), ({}, 1))
+        self.assertFalse((sample_dir / RESULT_FILE).exists())
+
+    def test_verification_error_leaves_sample_unverified(self):
+        loop, results, repairs, sample_dir = self.run_loop([RuntimeError("daemon died")])
+        self.assertEqual((results, repairs, loop.unverified), ({}, [], 1))
+        self.assertFalse((sample_dir / RESULT_FILE).exists())
+
+    def test_wrong_verdict_after_last_repair_fails(self):
+        loop, results, repairs, sample_dir = self.run_loop([(False, WRONG_VERDICT)] * 3)
+        self.assertEqual((results, repairs), ({"1_abc": False}, [1, 2]))
+        self.assertTrue((sample_dir / RESULT_FILE).exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
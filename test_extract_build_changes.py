@@ -0,0 +1,80 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-poc"))
+
+from extract_build_changes import _pair_key, _sorted_by_key, extract_build_changes, extract_build_changes_streaming
+
+
+def pair(pr_id, n):
+    return {"pr_id": pr_id, "pr_url": f"https://github.com/o/r/pull/{pr_id}", "bad_commit": f"bad{n}",
+            "bad_msg": "broken", "good_commit": f"good{n}", "good_msg": "fixed"}
+
+
+class TestStreamingExtraction(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # Unsorted input with a duplicated pair and analyzed records for only some pairs
+        self.mining = [pair((i * 7) % 23, i % 5) for i in range(40)] + [pair(3, 3)]
+        self.analyzed = []
+        for i, item in enumerate(self.mining[::2]):
+            files = ["app/build.gradle.kts", "src/Main.kt"] if i % 3 else ["src/Main.kt"]
+            self.analyzed.append(dict(item, files_changed=files, category="Dependency Update"))
+        # A later analyzed record for the same pair wins in both paths
+        self.analyzed.append(dict(self.mining[0], files_changed=["gradle/libs.versions.toml"], category="Other"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def write(self, name, records, jsonl):
+        with open(self.path(name), "w") as f:
+            if jsonl:
+                f.writelines(json.dumps(r) + "\n" for r in records)
+            else:
+                json.dump(records, f)
+        return self.path(name)
+
+    def test_spilled_runs_match_in_memory_path(self):
+        extract_build_changes(self.write("mining.json", self.mining, False), self.path("expected.json"),
+                              self.write("analyzed.json", self.analyzed, False))
+        with open(self.path("expected.json")) as f:
+            expected = sorted(json.load(f), key=_pair_key)
+
+        sort_dir = self.path("sort")
+        os.makedirs(sort_dir)
+        # chunk_size 4 spills eleven sorted runs of mining pairs
+        extract_build_changes_streaming(self.write("mining.jsonl", self.mining, True), self.path("out.jsonl"),
+                                        self.write("analyzed.jsonl", self.analyzed, True),
+                                        chunk_size=4, tmp_dir=sort_dir)
+        with open(self.path("out.jsonl")) as f:
+            streamed = [json.loads(line) for line in f]
+
+        self.assertGreater(len(expected), 10)
+        self.assertEqual(streamed, expected)
+        # Sort runs are removed afterwards
+        self.assertEqual(os.listdir(sort_dir), [])
+
+    def test_sort_spills_runs(self):
+        merged = _sorted_by_key(iter(self.mining), self.tmp.name, 4)
+        first = next(merged)
+        self.assertEqual(len([n for n in os.listdir(self.tmp.name) if n.startswith("run_")]), 11)
+        self.assertEqual([first] + list(merged), sorted(self.mining, key=_pair_key))
+
+    def test_without_analyzed_file(self):
+        extract_build_changes(self.write("mining.json", self.mining, False), self.path("expected.json"))
+        extract_build_changes_streaming(self.write("mining.jsonl", self.mining, True), self.path("out.jsonl"),
+                                        chunk_size=3)
+        with open(self.path("expected.json")) as f:
+            expected = sorted(json.load(f), key=_pair_key)
+        with open(self.path("out.jsonl")) as f:
+            self.assertEqual([json.loads(line) for line in f], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from gharchive import archive_files, ingest_archives, scan_file
+from status_tracker import StatusTracker
+
+
+def pr_event(repo, number, action, sha, merged=False):
+    return {"type": "PullRequestEvent", "repo": {"name": repo}, "payload": {
+        "action": action, "number": number, "pull_request": {
+            "number": number, "html_url": f"https://github.com/{repo}/pull/{number}", "merged": merged,
+            "head": {"sha": sha}, "body": "x" * 100}}}
+
+
+def status_event(repo, sha, state):
+    return {"type": "StatusEvent", "repo": {"name": repo}, "payload": {
+        "sha": sha, "state": state, "context": "ci", "commit": {"commit": {"message": f"msg {sha}"}}}}
+
+
+def suite_event(repo, sha, conclusion):
+    return {"type": "CheckSuiteEvent", "repo": {"name": repo}, "payload": {
+        "action": "completed", "check_suite": {"head_sha": sha, "conclusion": conclusion, "app": {"slug": "gha"}}}}
+
+
+class TestGHArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.archive = os.path.join(self.tmp.name, "archive")
+        os.makedirs(self.archive)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, events, extra_lines=()):
+        with gzip.open(os.path.join(self.archive, name), 'wt') as f:
+            for line in extra_lines:
+                f.write(line + "\n")
+            for event in events:
+                f.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    def test_files_sort_by_hour(self):
+        for name in ("2024-01-01-10.json.gz", "2024-01-01-9.json.gz", "2023-12-31-23.json.gz"):
+            self.write(name, [])
+        self.assertEqual([os.path.basename(p) for p in archive_files([self.archive])],
+                         ["2023-12-31-23.json.gz", "2024-01-01-9.json.gz", "2024-01-01-10.json.gz"])
+
+    def test_prefilter_keeps_relevant_events(self):
+        self.write("2024-01-01-0.json.gz",
+                   [pr_event("o/a", 1, "opened", "a1"), pr_event("o/a", 2, "closed", "b1", merged=False),
+                    status_event("o/b", "c1", "success")],
+                   extra_lines=['{"type":"PushEvent","repo":{"name":"o/a"}}', "not json StatusEvent"])
+        events = scan_file(os.path.join(self.archive, "2024-01-01-0.json.gz"))
+        self.assertEqual([e for e, _ in events], ["pull_request", "status"])
+        self.assertNotIn("body", events[0][1]["pull_request"])
+        self.assertEqual(scan_file(os.path.join(self.archive, "2024-01-01-0.json.gz"), repos={"o/b"})[0][0], "status")
+
+    def test_ingest_writes_pairs_and_candidates(self):
+        self.write("2024-01-01-0.json.gz", [
+            pr_event("o/a", 1, "opened", "a1"),
+            status_event("o/a", "a1", "failure"),
+            pr_event("o/a", 1, "synchronize", "a2"),
+            pr_event("o/b", 5, "opened", "b1"),
+            suite_event("o/b", "b1", "failure"),
+        ])
+        self.write("2024-01-01-1.json.gz", [
+            pr_event("o/a", 1, "closed", "a2", merged=True),
+            pr_event("o/b", 5, "closed", "b2", merged=True),
+            # Reported after the merge event, still counts
+            status_event("o/a", "a2", "success"),
+        ])
+        results = os.path.join(self.tmp.name, "results")
+        db = os.path.join(self.tmp.name, "status.db")
+        self.assertEqual(ingest_archives([self.archive], db, workers=2, results_dir=results), 1)
+
+        with open(os.path.join(results, "o_a", "mining_results.json")) as f:
+            pairs = json.load(f)
+        self.assertEqual([(p["pr_id"], p["bad_commit"], p["good_commit"], p["bad_msg"]) for p in pairs],
+                         [(1, "a1", "a2", "msg a1")])
+        with open(os.path.join(results, "o_b", "candidate_prs.json")) as f:
+            self.assertEqual([(c["pr_id"], c["bad_commit"]) for c in json.load(f)], [(5, "b1")])
+
+        # Already merged PRs are not emitted again
+        self.assertEqual(ingest_archives([self.archive], db, workers=1, results_dir=results), 0)
+
+        # A later dump completes the candidate's build: the merged PR is re-evaluated
+        self.write("2024-01-01-2.json.gz", [status_event("o/b", "b2", "success")])
+        self.assertEqual(ingest_archives([os.path.join(self.archive, "2024-01-01-2.json.gz")], db, workers=1,
+                                         results_dir=results), 1)
+        with open(os.path.join(results, "o_b", "mining_results.json")) as f:
+            self.assertEqual([(p["pr_id"], p["bad_commit"], p["good_commit"]) for p in json.load(f)], [(5, "b1", "b2")])
+
+    def test_incomplete_events_are_skipped(self):
+        headless = pr_event("o/a", 1, "closed", "a2", merged=True)
+        headless["payload"]["pull_request"]["head"] = {}
+        self.write("2024-01-01-0.json.gz", [
+            pr_event("o/a", 1, "opened", "a1"),
+            status_event("o/a", "a1", "failure"),
+            status_event("o/a", None, "success"),
+            suite_event("o/a", None, "success"),
+            headless,
+            pr_event("o/a", 1, "synchronize", "a2"),
+            status_event("o/a", "a2", "success"),
+            pr_event("o/a", 1, "closed", "a2", merged=True),
+        ])
+        events = scan_file(os.path.join(self.archive, "2024-01-01-0.json.gz"))
+        self.assertEqual(len(events), 5)
+
+        results = os.path.join(self.tmp.name, "results")
+        self.assertEqual(ingest_archives([self.archive], os.path.join(self.tmp.name, "status.db"), workers=1,
+                                         results_dir=results), 1)
+
+        # Events the tracker rejects are counted and skipped, the rest is still ingested
+        original = StatusTracker.handle_event
+
+        def reject_first_status(tracker, event, payload):
+            if payload.get("sha") == "a1":
+                raise ValueError("bad payload")
+            return original(tracker, event, payload)
+
+        with mock.patch.object(StatusTracker, "handle_event", reject_first_status):
+            self.assertEqual(ingest_archives([self.archive], os.path.join(self.tmp.name, "other.db"), workers=1,
+                                             results_dir=os.path.join(self.tmp.name, "other")), 0)
+
+    def test_stateless_candidates_from_pull_request_events_only(self):
+        self.write("2024-01-01-0.json.gz", [
+            pr_event("o/a", 1, "opened", "a1"),
+            pr_event("o/a", 1, "synchronize", "a2"),
+            pr_event("o/a", 1, "closed", "a2", merged=True),
+            pr_event("o/a", 2, "opened", "c1"),
+            pr_event("o/a", 2, "closed", "c1", merged=False),
+        ])
+        results = os.path.join(self.tmp.name, "results")
+        candidates = os.path.join(results, "o_a", "candidate_prs.json")
+
+        # Without the option, PRs without any state yield nothing
+        self.assertEqual(ingest_archives([self.archive], os.path.join(self.tmp.name, "plain.db"), workers=1,
+                                         results_dir=results), 0)
+        self.assertFalse(os.path.exists(candidates))
+
+        self.assertEqual(ingest_archives([self.archive], os.path.join(self.tmp.name, "status.db"), repos={"o/a"},
+                                         workers=1, results_dir=results, stateless_candidates=True), 0)
+        with open(candidates) as f:
+            self.assertEqual([(c["pr_id"], c["bad_commit"]) for c in json.load(f)], [(1, None)])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from git_objects import GitError, LocalGitRepo, open_repo
+
+def _git(cwd, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"] + list(args),
+        cwd=cwd, check=True, stdout=subprocess.PIPE,
+    ).stdout.decode().strip()
+
+class TestLocalGitRepo(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        src = os.path.join(self.tmp.name, "src")
+        os.makedirs(src)
+        _git(src, "init", "-q")
+        _git(src, "config", "uploadpack.allowFilter", "true")
+        with open(os.path.join(src, "build.gradle.kts"), "w") as f:
+            f.write("version = \"1.0\"\n")
+        _git(src, "add", ".")
+        _git(src, "commit", "-qm", "Bad")
+        self.bad = _git(src, "rev-parse", "HEAD")
+        with open(os.path.join(src, "build.gradle.kts"), "w") as f:
+            f.write("version = \"1.1\"\n")
+        _git(src, "commit", "-qam", "Good")
+        self.good = _git(src, "rev-parse", "HEAD")
+
+        self.repo = LocalGitRepo("owner", "repo", os.path.join(self.tmp.name, "cache"))
+        self.repo.remote_url = f"file://{src}"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parent_and_file_at(self):
+        self.assertEqual(self.repo.parent(self.good), self.bad)
+        self.assertIsNone(self.repo.parent(self.bad))
+        self.assertEqual(self.repo.file_at(self.bad, "build.gradle.kts"), "version = \"1.0\"\n")
+        self.assertIsNone(self.repo.file_at(self.bad, "missing.txt"))
+
+    def test_file_at_raises_when_blob_fetch_fails(self):
+        self.repo.ensure()
+        # Blobs of a blobless clone come from the promisor remote, which is gone now
+        self.repo._git("remote", "set-url", "origin", f"file://{self.tmp.name}/gone")
+        self.assertIsNone(self.repo.file_at(self.bad, "missing.txt"))
+        with self.assertRaises(GitError):
+            self.repo.file_at(self.bad, "build.gradle.kts")
+
+    def test_token_stays_off_the_command_line(self):
+        self.repo.token = "secret-token"
+        with mock.patch("git_objects.subprocess.run") as run:
+            run.return_value = subprocess.CompletedProcess([], 0, b"", b"")
+            self.repo._git("status")
+        cmd, env = run.call_args[0][0], run.call_args[1]["env"]
+        self.assertFalse(any("secret" in arg or "extraheader" in arg.lower() for arg in cmd))
+        index = int(env["GIT_CONFIG_COUNT"]) - 1
+        self.assertEqual(env[f"GIT_CONFIG_KEY_{index}"], "http.https://github.com/.extraheader")
+        self.assertTrue(env[f"GIT_CONFIG_VALUE_{index}"].startswith("AUTHORIZATION: basic "))
+
+    def test_file_patch(self):
+        patch = self.repo.file_patch(self.bad, self.good, "build.gradle.kts")
+        self.assertTrue(patch.startswith("@@"))
+        self.assertIn("+version = \"1.1\"", patch)
+        self.assertIsNone(self.repo.file_patch(self.bad, self.good, "missing.txt"))
+
+    def test_open_repo_is_optional(self):
+        saved = os.environ.pop("GIT_OBJECT_CACHE", None)
+        try:
+            self.assertIsNone(open_repo("owner", "repo"))
+            self.assertIsNotNone(open_repo("owner", "repo", self.tmp.name))
+        finally:
+            if saved is not None:
+                os.environ["GIT_OBJECT_CACHE"] = saved
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import time
+import unittest
+from lease_queue import DONE, FAILED, LEASED, PENDING, LeaseQueue
+
+
+class TestLeaseQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "queue.db")
+        self.queue = LeaseQueue(self.path)
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def test_claims_are_exclusive_and_by_priority(self):
+        self.queue.add("q", "a", priority=1)
+        self.queue.add("q", "b", priority=5)
+        self.assertFalse(self.queue.add("q", "a"))
+
+        other = LeaseQueue(self.path)
+        try:
+            first = self.queue.claim("q", "w1", lease_seconds=60)
+            second = other.claim("q", "w2", lease_seconds=60)
+            self.assertEqual([u["key"] for u in first + second], ["b", "a"])
+            self.assertEqual(other.claim("q", "w2", lease_seconds=60), [])
+        finally:
+            other.close()
+
+        self.assertFalse(self.queue.complete("q", "b", "w2", {"ok": True}))
+        self.assertTrue(self.queue.complete("q", "b", "w1", {"ok": True}))
+        self.assertEqual(self.queue.get("q", "b")["result"], {"ok": True})
+        self.assertEqual(self.queue.counts("q"), {DONE: 1, LEASED: 1})
+        self.assertEqual(self.queue.unfinished("q"), 1)
+
+    def test_expired_lease_is_reclaimed_with_cursor(self):
+        self.queue.add("q", "repo")
+        self.queue.claim("q", "crashed", lease_seconds=60)
+        self.assertTrue(self.queue.checkpoint("q", "repo", "crashed", "cursor-1", lease_seconds=0.01))
+        time.sleep(0.05)
+
+        unit = self.queue.claim("q", "w2", lease_seconds=60)[0]
+        self.assertEqual((unit["owner"], unit["cursor"], unit["attempts"]), ("w2", "cursor-1", 2))
+        # The old owner can no longer write progress
+        self.assertFalse(self.queue.checkpoint("q", "repo", "crashed", "cursor-0", lease_seconds=60))
+        self.assertTrue(self.queue.release("q", "repo", "w2"))
+        self.assertEqual(self.queue.get("q", "repo")["status"], PENDING)
+
+    def test_max_attempts_and_reset_if_changed(self):
+        self.queue.add("q", "s", {"key": "v1"})
+        self.queue.claim("q", "w", lease_seconds=60)
+        self.queue.release("q", "s", "w", error="boom")
+        self.assertEqual(self.queue.claim("q", "w", lease_seconds=60, max_attempts=1), [])
+        self.assertEqual(self.queue.get("q", "s")["status"], FAILED)
+
+        self.assertFalse(self.queue.add("q", "s", {"key": "v1"}, reset_if_changed=True))
+        self.assertTrue(self.queue.add("q", "s", {"key": "v2"}, reset_if_changed=True))
+        unit = self.queue.get("q", "s")
+        self.assertEqual((unit["status"], unit["attempts"], unit["payload"]), (PENDING, 0, {"key": "v2"}))
+
+    def test_leased_units_are_not_reset(self):
+        self.queue.add("q", "s", {"key": "v1"})
+        self.queue.claim("q", "w", lease_seconds=60)
+        self.assertFalse(self.queue.add("q", "s", {"key": "v2"}, reset_if_changed=True))
+        self.assertTrue(self.queue.complete("q", "s", "w", {"success": True}))
+        # Once finished, the changed sample is queued again
+        self.assertTrue(self.queue.add("q", "s", {"key": "v2"}, reset_if_changed=True))
+        self.assertEqual(self.queue.get("q", "s")["status"], PENDING)
+
+
+if __name__ == '__main__':
+    unittest.main()
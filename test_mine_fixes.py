@@ -1,6 +1,21 @@
+import json
+import os
+import tempfile
 import unittest
+from datetime import date
+from unittest import mock
+
 from mine_fixes import GitHubMiner
 
+
+def commit(oid, state):
+    return {"commit": {"oid": oid, "message": f"{oid} message\nbody", "statusCheckRollup": {"state": state}}}
+
+
+def pr_node(number, commits):
+    return {"number": number, "url": f"https://github.com/owner/repo/pull/{number}",
+            "commits": {"pageInfo": {"hasNextPage": False, "endCursor": None}, "nodes": commits}}
+
 class TestGitHubMiner(unittest.TestCase):
     def setUp(self):
         self.miner = GitHubMiner("fake_token", "owner", "repo")
@@ -38,5 +53,196 @@ class TestGitHubMiner(unittest.TestCase):
         # and these unit tests for the helper predicates.
         pass
 
+    def test_mine_reports_whether_it_finished(self):
+        page = {"data": {"repository": {"pullRequests": {
+            "pageInfo": {"hasNextPage": True, "endCursor": "c1"}, "nodes": [{"number": 1}]}}}}
+        rate_limited = {"data": None, "errors": [{"type": "RATE_LIMITED"}]}
+        self.miner.prescreen = False
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(self.miner, "new_pairs", return_value=[]):
+            output, state = os.path.join(tmp, "out.json"), os.path.join(tmp, "state.json")
+            with mock.patch.object(self.miner, "_query", side_effect=[page, rate_limited]):
+                self.miner.mine(100, output, state)
+            self.assertFalse(self.miner.finished)
+            with mock.patch.object(self.miner, "_query", side_effect=[page]):
+                self.miner.mine(1, output, state)
+            self.assertTrue(self.miner.finished)
+
+    def test_find_pairs(self):
+        pr = pr_node(7, [])
+        commits = [commit("a", "SUCCESS"), commit("b", "FAILURE"), commit("c", "PENDING"),
+                   commit("d", "SUCCESS"), commit("e", "SUCCESS")]
+        pairs = self.miner.find_pairs(pr, commits)
+        self.assertEqual([(p["bad_commit"], p["good_commit"]) for p in pairs], [("b", "d")])
+        self.assertEqual(pairs[0]["bad_msg"], "b message")
+
+    def test_plan_windows_splits_until_small_enough(self):
+        counts = {(date(2024, 1, 1), date(2024, 1, 4)): 30, (date(2024, 1, 1), date(2024, 1, 2)): 25,
+                  (date(2024, 1, 3), date(2024, 1, 4)): 0, (date(2024, 1, 1), date(2024, 1, 1)): 15,
+                  (date(2024, 1, 2), date(2024, 1, 2)): 10}
+        with mock.patch.object(self.miner, "count_window", side_effect=lambda s, e: counts[(s, e)]):
+            windows = self.miner.plan_windows(date(2024, 1, 1), date(2024, 1, 4), max_prs=20)
+        self.assertEqual(windows, [(date(2024, 1, 1), date(2024, 1, 1)), (date(2024, 1, 2), date(2024, 1, 2))])
+
+    def test_mine_sharded_merges_and_deduplicates_windows(self):
+        # The same fix shows up in both windows (e.g. a PR merged twice via a backport)
+        pages = {
+            "merged:2024-01-01..2024-01-01": [pr_node(1, [commit("b1", "FAILURE"), commit("g1", "SUCCESS")])],
+            "merged:2024-01-02..2024-01-02": [pr_node(2, [commit("b1", "FAILURE"), commit("g1", "SUCCESS")]),
+                                              pr_node(3, [commit("b3", "ERROR"), commit("g3", "SUCCESS")])],
+        }
+
+        def fake_query(query, variables):
+            window = variables["q"].split()[-1]
+            return {"data": {"search": {"pageInfo": {"hasNextPage": False, "endCursor": "end"},
+                                        "nodes": pages[window] + [{}]}}}
+
+        self.miner.prescreen = False
+        with tempfile.TemporaryDirectory() as tmp:
+            output, state = os.path.join(tmp, "out.json"), os.path.join(tmp, "state.json")
+            with mock.patch.object(self.miner, "plan_windows", return_value=[
+                    (date(2024, 1, 1), date(2024, 1, 1)), (date(2024, 1, 2), date(2024, 1, 2))]), \
+                    mock.patch.object(self.miner, "_query", side_effect=fake_query):
+                results = self.miner.mine_sharded(100, output, state, workers=2, since=date(2024, 1, 1))
+            with open(state) as f:
+                shards = json.load(f)["shards"]
+            with open(output) as f:
+                saved = json.load(f)
+
+        self.assertEqual(sorted(p["good_commit"] for p in results), ["g1", "g3"])
+        self.assertEqual(len(saved), 2)
+        self.assertEqual(self.miner.prs_scanned, 3)
+        self.assertTrue(all(shard["done"] for shard in shards.values()))
+
+    def test_later_runs_extend_the_plan_until_today(self):
+        import mine_fixes
+
+        class Today(date):
+            value = date(2024, 1, 2)
+
+            @classmethod
+            def today(cls):
+                return cls.value
+
+        planned, queries = [], []
+
+        def plan_windows(start, end, max_prs):
+            planned.append((start, end))
+            return [(start, end)]
+
+        def fake_query(query, variables):
+            queries.append(variables["q"])
+            return {"data": {"search": {"pageInfo": {"hasNextPage": False, "endCursor": "end"}, "nodes": []}}}
+
+        self.miner.prescreen = False
+        with tempfile.TemporaryDirectory() as tmp:
+            output, state = os.path.join(tmp, "out.json"), os.path.join(tmp, "state.json")
+            with mock.patch.object(mine_fixes, "date", Today), \
+                    mock.patch.object(self.miner, "plan_windows", side_effect=plan_windows), \
+                    mock.patch.object(self.miner, "_query", side_effect=fake_query):
+                self.miner.mine_sharded(100, output, state, since=date(2024, 1, 1))
+                Today.value = date(2024, 1, 9)
+                self.miner.mine_sharded(100, output, state)
+            with open(state) as f:
+                saved = json.load(f)
+
+        self.assertEqual(planned, [(date(2024, 1, 1), date(2024, 1, 2)), (date(2024, 1, 2), date(2024, 1, 9))])
+        self.assertEqual(saved["shards_until"], "2024-01-09")
+        self.assertEqual(sorted(saved["shards"]), ["2024-01-01..2024-01-02", "2024-01-02..2024-01-09"])
+        self.assertEqual(queries[-1], "repo:owner/repo is:pr is:merged sort:created-asc merged:2024-01-02..2024-01-09")
+
+    def test_replanning_keeps_window_progress_and_honours_earlier_since(self):
+        import mine_fixes
+
+        class Today(date):
+            @classmethod
+            def today(cls):
+                return date(2024, 1, 9)
+
+        planned = []
+
+        def plan_windows(start, end, max_prs):
+            planned.append((start, end))
+            return [(start, end)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output, state = os.path.join(tmp, "out.json"), os.path.join(tmp, "state.json")
+            with open(state, "w") as f:
+                json.dump({"shards": {"2024-01-09..2024-01-09": {"cursor": "c5", "done": False}},
+                           "shards_since": "2024-01-05", "shards_until": "2024-01-09"}, f)
+            with mock.patch.object(mine_fixes, "date", Today), \
+                    mock.patch.object(self.miner, "plan_windows", side_effect=plan_windows), \
+                    mock.patch.object(self.miner, "_query", return_value={"data": None}):
+                self.miner.mine_sharded(100, output, state, since=date(2024, 1, 1))
+                self.miner.mine_sharded(100, output, state, since=date(2024, 1, 3))
+            with open(state) as f:
+                saved = json.load(f)
+
+        self.assertEqual(planned, [(date(2024, 1, 1), date(2024, 1, 4)), (date(2024, 1, 9), date(2024, 1, 9)),
+                                   (date(2024, 1, 9), date(2024, 1, 9))])
+        self.assertEqual(saved["shards_since"], "2024-01-01")
+        self.assertEqual(saved["shards"]["2024-01-09..2024-01-09"], {"cursor": "c5", "done": False})
+        self.assertEqual(saved["shards"]["2024-01-01..2024-01-04"], {"cursor": None, "done": False})
+
+    def test_prescreen_fetches_full_history_of_candidates_only(self):
+        def light(number, states, total=None):
+            nodes = [{"commit": {"statusCheckRollup": {"state": state}}} for state in states]
+            return {"number": number, "commits": {"totalCount": total or len(nodes), "nodes": nodes}}
+
+        page = [light(1, ["SUCCESS", "SUCCESS"]), light(2, ["FAILURE", "SUCCESS"]),
+                light(3, ["SUCCESS", "FAILURE"]), light(4, ["SUCCESS"] * 100, total=150)]
+        self.assertEqual([self.miner.may_contain_pair(pr) for pr in page], [False, True, False, True])
+
+        queries = []
+
+        def fake_query(query, variables):
+            queries.append(query)
+            full = pr_node(2, [{"commit": {"oid": "b2", "messageHeadline": "Break",
+                                           "statusCheckRollup": {"state": "FAILURE"}}},
+                               {"commit": {"oid": "g2", "messageHeadline": "Fix",
+                                           "statusCheckRollup": {"state": "SUCCESS"}}}])
+            return {"data": {"repository": {"pr2": full, "pr4": pr_node(4, [])}}}
+
+        with mock.patch.object(self.miner, "_query", side_effect=fake_query):
+            pairs = self.miner.new_pairs(page, set())
+
+        self.assertEqual(len(queries), 1)
+        self.assertIn("pr2: pullRequest(number: 2)", queries[0])
+        self.assertIn("pr4: pullRequest(number: 4)", queries[0])
+        self.assertNotIn("number: 1)", queries[0])
+        self.assertEqual([(p["bad_msg"], p["good_msg"]) for p in pairs], [("Break", "Fix")])
+
+    def test_prescreen_pages_are_buffered_until_a_full_batch(self):
+        def light(number, states):
+            return {"number": number, "commits": {"totalCount": len(states), "nodes": [
+                {"commit": {"statusCheckRollup": {"state": state}}} for state in states]}}
+
+        def page(cursor, prs, more=True):
+            return {"data": {"repository": {"pullRequests": {
+                "pageInfo": {"hasNextPage": more, "endCursor": cursor}, "nodes": prs}}}}
+
+        pages = [page("c1", [light(1, ["FAILURE", "SUCCESS"]), light(2, ["SUCCESS"])]),
+                 page("c2", [light(3, ["SUCCESS"])]),
+                 page("c3", [light(4, ["FAILURE", "SUCCESS"])], more=False)]
+        calls, checkpoints = [], []
+
+        def fake_query(query, variables):
+            calls.append((query, variables))
+            return pages[len(calls) - 1]
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(self.miner, "_query", side_effect=fake_query), \
+                mock.patch.object(self.miner, "new_pairs", return_value=[]) as new_pairs:
+            self.miner.mine(1000, os.path.join(tmp, "out.json"), os.path.join(tmp, "state.json"),
+                            checkpoint=lambda cursor, scanned: checkpoints.append((cursor, scanned)) or True)
+
+        self.assertIn("commits(last: 20)", calls[0][0])
+        self.assertNotIn("status {", calls[0][0])
+        self.assertEqual([v["limit"] for _, v in calls], [100, 100, 100])
+        self.assertEqual([v["cursor"] for _, v in calls], [None, "c1", "c2"])
+        # One batch for the candidates of all three pages, checkpointed once
+        self.assertEqual([[pr["number"] for pr in c.args[0]] for c in new_pairs.call_args_list], [[1, 4]])
+        self.assertEqual(checkpoints, [("c3", 4)])
+        self.assertTrue(self.miner.finished)
+
 if __name__ == '__main__':
     unittest.main()
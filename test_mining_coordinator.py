@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import mining_coordinator
+from lease_queue import DONE, PENDING, LeaseQueue
+from mining_coordinator import MiningWorker, add_repos, decode_progress, encode_progress
+
+
+class TestMiningCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = LeaseQueue(os.path.join(self.tmp.name, "queue.db"))
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def test_add_repos_skips_invalid_and_duplicates(self):
+        self.assertEqual(add_repos(self.queue, ["a/b", "invalid", "a/b"], "fixes", limit=50), 1)
+        self.assertEqual(self.queue.get("fixes", "a/b")["payload"], {"limit": 50})
+
+    def test_resumes_from_checkpoint_of_dead_worker(self):
+        add_repos(self.queue, ["owner/repo"], "fixes", limit=100)
+        # A previous worker scanned 40 PRs, checkpointed and died
+        self.queue.claim("fixes", "dead", lease_seconds=60)
+        self.queue.checkpoint("fixes", "owner/repo", "dead", encode_progress("c40", 40), lease_seconds=-1)
+
+        calls = []
+
+        def fake_mine(miner, limit, output_file, state_file, catalog=None, cursor=None, checkpoint=None):
+            calls.append((limit, cursor))
+            self.assertTrue(checkpoint("c90", 50))
+            miner.finished = True
+            return [{"good_commit": "g"}]
+
+        worker = MiningWorker(self.queue, "token", "alive", lease_seconds=60, results_dir=self.tmp.name)
+        with mock.patch.object(mining_coordinator.GitHubMiner, "mine", fake_mine):
+            self.assertTrue(worker.run_one("fixes"))
+            self.assertFalse(worker.run_one("fixes"))
+
+        self.assertEqual(calls, [(60, "c40")])
+        unit = self.queue.get("fixes", "owner/repo")
+        self.assertEqual(unit["status"], DONE)
+        self.assertEqual(unit["result"], {"prs": 90, "pairs": 1})
+        self.assertEqual(decode_progress(unit["cursor"]), ("c90", 90))
+
+    def test_early_stop_gives_unit_back_with_cursor(self):
+        add_repos(self.queue, ["owner/repo"], "fixes", limit=100)
+
+        def rate_limited(miner, limit, output_file, state_file, catalog=None, cursor=None, checkpoint=None):
+            # One batch, then "No data returned" (e.g. RATE_LIMITED): finished stays False
+            self.assertTrue(checkpoint("c30", 30))
+            return []
+
+        worker = MiningWorker(self.queue, "token", "w", lease_seconds=60, results_dir=self.tmp.name)
+        with mock.patch.object(mining_coordinator.GitHubMiner, "mine", rate_limited):
+            self.assertTrue(worker.run_one("fixes"))
+        self.assertTrue(worker.failed_last)
+        unit = self.queue.get("fixes", "owner/repo")
+        self.assertEqual((unit["status"], unit["attempts"]), (PENDING, 1))
+        self.assertIn("stopped early after 30 of 100 PRs", unit["error"])
+        self.assertEqual(decode_progress(unit["cursor"]), ("c30", 30))
+
+    def test_exhausted_budget_stops_worker_without_counting_attempt(self):
+        add_repos(self.queue, ["owner/a", "owner/b"], "fixes", limit=100)
+        budget = mock.Mock()
+        budget.exhausted.return_value = "graphql_points"
+
+        def out_of_budget(miner, limit, output_file, state_file, catalog=None, cursor=None, checkpoint=None):
+            return []
+
+        worker = MiningWorker(self.queue, "token", "w", lease_seconds=60, results_dir=self.tmp.name)
+        with mock.patch.object(mining_coordinator.GitHubMiner, "mine", out_of_budget), \
+                mock.patch("budget.Budget.from_env", return_value=budget):
+            worker.run("fixes", poll_interval=0)
+        # The worker stopped after the first unit, which is pending again with no attempt used
+        self.assertEqual([(u["key"], u["status"], u["attempts"]) for u in self.queue.iter_units("fixes")],
+                         [("owner/a", PENDING, 0), ("owner/b", PENDING, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-poc", "runner"))
+
+from offline_mirror import activate, mirror_modules, OFFLINE_ENV, offline_args
+
+
+class TestOfflineMirror(unittest.TestCase):
+    def test_mirror_modules_uses_maven_layout(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            files = Path(tmp, "modules-2", "files-2.1", "org.junit.jupiter", "junit-jupiter", "5.10.2")
+            for sha, name in (("aa11", "junit-jupiter-5.10.2.jar"), ("bb22", "junit-jupiter-5.10.2.pom")):
+                Path(files, sha).mkdir(parents=True)
+                Path(files, sha, name).write_text(name)
+            repo = Path(tmp, "maven")
+
+            self.assertEqual(mirror_modules(Path(tmp, "modules-2"), repo), 2)
+            version_dir = repo / "org" / "junit" / "jupiter" / "junit-jupiter" / "5.10.2"
+            self.assertEqual(sorted(p.name for p in version_dir.iterdir()),
+                             ["junit-jupiter-5.10.2.jar", "junit-jupiter-5.10.2.pom"])
+            # Already mirrored files are not copied again
+            self.assertEqual(mirror_modules(Path(tmp, "modules-2"), repo), 0)
+
+    def test_activate_sets_gradle_home_and_offline_flag(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop(OFFLINE_ENV, None)
+            with self.assertRaises(FileNotFoundError):
+                activate(Path(tmp))
+            self.assertEqual(offline_args(), [])
+
+            Path(tmp, "gradle-home").mkdir()
+            Path(tmp, "gradle-home", "gradle.properties").write_text("systemProp.sample.offlineRepo=file:/x\n")
+            Path(tmp, "maven").mkdir()
+            activate(Path(tmp))
+            self.assertEqual(os.environ["GRADLE_USER_HOME"], str(Path(tmp, "gradle-home").resolve()))
+            self.assertEqual(offline_args(), ["--offline"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-poc", "generator"))
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+from prompt_budget import estimate_tokens, reduce_diff
+
+DIFF = "\n".join(
+    ["@@ -1,40 +1,40 @@", " plugins {", "     id(\"java\")", " }"]
+    + [f" // filler line {i} with some padding text" for i in range(30)]
+    + [" dependencies {", "-    implementation(\"com.example:lib:1.0\")", "+    implementation(\"com.example:lib:2.0\")", " }"]
+    + ["@@ -80,3 +80,3 @@", " // comment", "-// old note", "+// new note"]
+    + [f"+// another note {i}" for i in range(10)]
+)
+
+class TestReduceDiff(unittest.TestCase):
+    def test_fitting_diff_is_unchanged(self):
+        self.assertEqual(reduce_diff(DIFF, 10000), DIFF)
+
+    def test_context_is_trimmed_first(self):
+        reduced = reduce_diff(DIFF, estimate_tokens(DIFF) - 50)
+        self.assertLessEqual(estimate_tokens(reduced), estimate_tokens(DIFF) - 50)
+        self.assertIn("+    implementation(\"com.example:lib:2.0\")", reduced)
+        self.assertIn(" dependencies {", reduced)
+        self.assertNotIn("filler line 5 ", reduced)
+
+    def test_least_relevant_hunks_are_dropped(self):
+        reduced = reduce_diff(DIFF, 50)
+        self.assertLessEqual(estimate_tokens(reduced), 50)
+        self.assertIn("lib:2.0", reduced)
+        self.assertNotIn("new note", reduced)
+        self.assertIn("omitted", reduced)
+
+class _StubHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(body)
+        payload = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "```java\npublic class BuildScriptTest {}\n```"}}],
+            "usage": {"prompt_tokens": 1200, "completion_tokens": 10, "total_tokens": 1210,
+                      "prompt_tokens_details": {"cached_tokens": 1000}},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class TestStubCompletion(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), _StubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved_env = dict(os.environ)
+        os.environ.update({
+            "LITELLM_API_KEY": "stub",
+            "LITE_LLM_URL": f"http://127.0.0.1:{self.server.server_port}/v1",
+            "LLM_MODEL": "openai/stub-model",
+        })
+        _StubHandler.requests = []
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+        os.environ.clear()
+        os.environ.update(self.saved_env)
+
+    def test_prefix_is_system_message_and_usage_is_logged(self):
+        import test_generator as tg
+        usage_log = tg.UsageLog(os.path.join(self.tmp.name, "usage.jsonl"))
+        cache = tg.LLMResponseCache(os.path.join(self.tmp.name, "cache"))
+
+        for _ in range(2):
+            code = tg.generate_test_with_llm("# Task", DIFF, cache=cache, usage_log=usage_log,
+                                             token_budget=100, label="sample_1")
+            self.assertEqual(code, "public class BuildScriptTest {}")
+
+        # The second call is answered from the response cache
+        self.assertEqual(len(_StubHandler.requests), 1)
+        messages = _StubHandler.requests[0]["messages"]
+        self.assertEqual(messages[0]["role"], "system")
+        self.assertNotIn("{diff}", json.dumps(messages[0]))
+        self.assertIn("lib:2.0", messages[1]["content"])
+
+        with open(usage_log.path) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["sample"], "sample_1")
+        self.assertEqual(entries[0]["cached_tokens"], 1000)
+
+class TestPartialSamples(unittest.TestCase):
+    def test_only_temp_dirs_of_dead_processes_are_removed(self):
+        import subprocess
+        import test_generator as tg
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        with tempfile.TemporaryDirectory() as output_dir:
+            names = [f".1_abc.tmp-{os.getpid()}-1", f".2_abc.tmp-{dead.pid}-1", "3_abc"]
+            for name in names:
+                os.makedirs(os.path.join(output_dir, name))
+            tg.remove_partial_samples(output_dir)
+            self.assertEqual(sorted(os.listdir(output_dir)), [names[0], names[2]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+from mine_fixes import GitHubMiner
+from repo_scheduler import PRIOR_RATE, RepoScheduler
+
+
+def prescreen_pr(number, states):
+    return {"number": number, "commits": {"totalCount": len(states), "nodes": [
+        {"commit": {"statusCheckRollup": {"state": state} if state else None, "status": None}} for state in states]}}
+
+
+# Probe pages per repository: a gold mine, a repo with statuses but no fixes, and one without CI
+PAGES = {
+    "o/gold": [prescreen_pr(1, ["FAILURE", "SUCCESS"]), prescreen_pr(2, ["FAILURE", "SUCCESS", "FAILURE", "SUCCESS"]),
+               prescreen_pr(3, ["SUCCESS"])],
+    "o/green": [prescreen_pr(4, ["SUCCESS"]), prescreen_pr(5, ["SUCCESS", "SUCCESS"])],
+    "o/noci": [prescreen_pr(6, [None]), prescreen_pr(7, [None])],
+    "o/recent": [],
+}
+
+
+class TestRepoScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state = os.path.join(self.tmp.name, "schedule_state.json")
+        self.probed = []
+
+        def prescreen_window(miner, start, end, limit):
+            self.probed.append(f"{miner.owner}/{miner.name}")
+            return PAGES[f"{miner.owner}/{miner.name}"]
+
+        patches = [
+            mock.patch.object(GitHubMiner, "repo_created_date", lambda miner: date(2020, 1, 1)),
+            mock.patch.object(GitHubMiner, "count_window", lambda miner, start, end: 500),
+            mock.patch.object(GitHubMiner, "prescreen_window", prescreen_window),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_plan_orders_by_yield_and_skips_repos_without_ci(self):
+        scheduler = RepoScheduler("token", self.state, samples=1, seed=1)
+        plan = scheduler.plan(["o/green", "o/noci", "o/gold"], budget=607, max_per_repo=400)
+        # 7 probed PRs leave 600: the gold mine gets its full limit, the rest goes to the next repo
+        self.assertEqual([(repo, limit) for repo, limit, _ in plan], [("o/gold", 400), ("o/green", 200)])
+        self.assertGreater(plan[0][2], plan[1][2])
+
+    def test_history_and_cached_probes(self):
+        scheduler = RepoScheduler("token", self.state, samples=1, seed=1)
+        scheduler.plan(["o/green", "o/gold"], budget=1000, max_per_repo=100)
+        scheduler.record_run("o/green", 100, 30)
+        scheduler.record_run("o/gold", 100, 0)
+
+        # A new run reuses the probes and lets history overrule them
+        self.probed.clear()
+        plan = RepoScheduler("token", self.state, samples=1).plan(["o/gold", "o/green"], budget=1000, max_per_repo=500)
+        self.assertEqual(self.probed, [])
+        self.assertEqual([(repo, limit) for repo, limit, _ in plan], [("o/green", 400), ("o/gold", 400)])
+
+    def test_empty_probe_falls_back_to_prior(self):
+        scheduler = RepoScheduler("token", self.state, samples=1, seed=1)
+        estimate = scheduler.estimate("o/recent")
+        self.assertEqual(scheduler.state["repos"]["o/recent"]["probe"]["prs"], 0)
+        self.assertAlmostEqual(estimate["rate"], PRIOR_RATE)
+        plan = scheduler.plan(["o/noci", "o/recent"], budget=100, max_per_repo=50)
+        self.assertEqual([(repo, limit) for repo, limit, _ in plan], [("o/recent", 50)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-poc", "runner"))
+
+import scheduler
+from scheduler import JVMScheduler, TimingHistory
+
+class TestScheduler(unittest.TestCase):
+    def test_concurrency_is_capped_by_memory(self):
+        with mock.patch.object(scheduler, "available_memory_mb", return_value=8192):
+            self.assertEqual(JVMScheduler(max_jvms=16, mem_per_jvm_mb=1024).concurrency(), 2)
+            self.assertEqual(JVMScheduler(max_jvms=3, mem_per_jvm_mb=512).concurrency(), 1)
+        with mock.patch.object(scheduler, "available_memory_mb", return_value=100):
+            self.assertEqual(JVMScheduler(max_jvms=16, mem_per_jvm_mb=1024).concurrency(), 1)
+
+    def test_longest_first_and_history_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "timings.json")
+            history = TimingHistory(path)
+            history.record("fast", 5)
+            history.record("slow", 60)
+            history.save()
+
+            history = TimingHistory(path)
+            self.assertEqual(history.longest_first(["fast", "new", "slow"]), ["slow", "new", "fast"])
+
+    def test_run_yields_all_results_and_records_timings(self):
+        history = TimingHistory(None)
+        with mock.patch.object(scheduler, "available_memory_mb", return_value=64 * 1024):
+            results = dict(JVMScheduler(max_jvms=6).run([("a", 1), ("b", 2)], lambda x: x * 10, history=history))
+        self.assertEqual(results, {"a": 10, "b": 20})
+        self.assertEqual(sorted(history.timings), ["a", "b"])
+
+    def test_queue_worker_goes_through_memory_admission(self):
+        import threading
+        import time
+        from pathlib import Path
+        from lease_queue import LeaseQueue
+        from verify import VERIFY_QUEUE, run_queue_worker
+
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def verify_fn(sample_dir):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return sample_dir.name, True, "Verification: SUCCESS"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = LeaseQueue(os.path.join(tmp, "queue.db"))
+            for name in ("s1", "s2", "s3", "s4"):
+                queue.add(VERIFY_QUEUE, name, {"key": name})
+            jvm_scheduler = JVMScheduler(max_jvms=12, poll_interval=0.01)
+            # Three claim loops, but memory only admits one verification at a time
+            with mock.patch.object(JVMScheduler, "concurrency", return_value=3), \
+                    mock.patch.object(scheduler, "available_memory_mb", return_value=100):
+                results = dict(run_queue_worker(queue, "w", Path(tmp), verify_fn, jvm_scheduler, lease_seconds=60))
+            queue.close()
+        self.assertEqual(sorted(results), ["s1", "s2", "s3", "s4"])
+        self.assertEqual(peak[0], 1)
+
+    def test_queue_worker_releases_non_verdicts_without_yielding_them(self):
+        from pathlib import Path
+        from lease_queue import FAILED, LeaseQueue
+        from verify import MAX_ATTEMPTS, VERIFY_QUEUE, run_queue_worker
+
+        calls = []
+
+        def verify_fn(sample_dir):
+            calls.append(sample_dir.name)
+            if sample_dir.name == "broken":
+                return sample_dir.name, False, "ERROR: no test results for O (original), Gradle failed"
+            return sample_dir.name, False, "Verification: FAILED"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = LeaseQueue(os.path.join(tmp, "queue.db"))
+            for name in ("broken", "ok"):
+                queue.add(VERIFY_QUEUE, name, {"key": name})
+            with mock.patch.object(JVMScheduler, "concurrency", return_value=1):
+                results = list(run_queue_worker(queue, "w", Path(tmp), verify_fn, JVMScheduler(poll_interval=0.01),
+                                                lease_seconds=60))
+            broken = queue.get(VERIFY_QUEUE, "broken")
+            queue.close()
+        self.assertEqual([name for name, _ in results], ["ok"])
+        self.assertEqual(calls.count("broken"), MAX_ATTEMPTS)
+        self.assertEqual(broken["status"], FAILED)
+
+if __name__ == '__main__':
+    unittest.main()
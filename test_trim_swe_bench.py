@@ -0,0 +1,69 @@
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-mining"))
+
+from trim_swe_bench import StratifiedReservoir, expand_inputs, iter_instances, stratum_of
+
+
+def instance(repo, number, created_at):
+    return {"repo": repo, "instance_id": f"{repo.replace('/', '__')}-{number}", "created_at": created_at}
+
+
+INSTANCES = [instance(f"o/r{r}", n, f"2024-0{1 + n % 6}-15T10:00:00Z") for r in range(4) for n in range(30)]
+
+
+def trim(shards, per_repo=3, seed=7, stratify_by=None):
+    reservoir = StratifiedReservoir(per_repo, seed, stratify_by)
+    for path in shards:
+        for item in iter_instances(path):
+            reservoir.add(item)
+    return reservoir.sample()
+
+
+class TestTrimSweBench(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        shuffled = list(INSTANCES)
+        random.Random(1).shuffle(shuffled)
+        # Three shards in different formats; the last one repeats instances of the first
+        self.shards = []
+        for i, chunk in enumerate([shuffled[:50], shuffled[50:], shuffled[:10]]):
+            path = os.path.join(self.tmp.name, f"shard_{i}.jsonl" + (".gz" if i == 1 else ""))
+            with (gzip.open if i == 1 else open)(path, "wt") as f:
+                f.writelines(json.dumps(item) + "\n" for item in chunk)
+            self.shards.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_k_per_repo(self):
+        sample = trim(self.shards)
+        self.assertEqual(Counter(item["repo"] for item in sample), {f"o/r{r}": 3 for r in range(4)})
+        self.assertEqual(len({item["instance_id"] for item in sample}), len(sample))
+
+    def test_deterministic_for_seed(self):
+        self.assertEqual(trim(self.shards), trim(self.shards))
+        self.assertNotEqual(trim(self.shards, seed=7), trim(self.shards, seed=8))
+
+    def test_independent_of_shard_order(self):
+        expected = trim(self.shards)
+        self.assertEqual(trim(list(reversed(self.shards))), expected)
+        with open(os.path.join(self.tmp.name, "all.json"), "w") as f:
+            json.dump(INSTANCES, f)
+        self.assertEqual(trim(expand_inputs([os.path.join(self.tmp.name, "all.json")])), expected)
+
+    def test_k_per_window(self):
+        sample = trim(self.shards, per_repo=2, stratify_by="window")
+        windows = {stratum_of(item, "window", 90) for item in INSTANCES}
+        per_stratum = Counter((item["repo"], stratum_of(item, "window", 90)) for item in sample)
+        self.assertEqual(per_stratum, {(f"o/r{r}", w): 2 for r in range(4) for w in windows})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-poc", "runner"))
+
+import verification_cache
+from verification_cache import FRAMEWORK_INPUTS, VerificationCache
+
+VERDICT = "Original (O): FAIL ✓\nModified (M): PASS ✓\n\nVerification: SUCCESS"
+REJECTED = ("Original (O): PASS ✗\nModified (M): PASS ✓\n\nVerification: FAILED\n"
+            "\n--- Captured output (Original) ---\n\nERROR: reported by the test itself")
+
+
+class TestVerificationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.framework = root / "framework"
+        (self.framework / "gradle" / "wrapper").mkdir(parents=True)
+        for name in FRAMEWORK_INPUTS:
+            (self.framework / name).write_text(f"{name} v1")
+        self.sample = root / "samples" / "1_abc"
+        for part in ("original", "modified", "verification"):
+            (self.sample / part).mkdir(parents=True)
+        (self.sample / "original" / "build.gradle.kts").write_text("version 1")
+        (self.sample / "modified" / "build.gradle.kts").write_text("version 2")
+        (self.sample / "verification" / "BuildScriptTest.java").write_text("class BuildScriptTest {}")
+        (self.sample / "task_description.md").write_text("# Task")
+        self.cache_dir = root / "cache"
+        self.jdk = mock.patch.object(verification_cache, "jdk_version", return_value="openjdk 17.0.9")
+        self.jdk.start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.tmp.cleanup()
+
+    def cache(self):
+        return VerificationCache(str(self.cache_dir), self.framework)
+
+    def test_key_covers_every_input(self):
+        keys = {self.cache().key(self.sample)}
+        edits = [self.sample / "original" / "build.gradle.kts", self.sample / "modified" / "build.gradle.kts",
+                 self.sample / "verification" / "BuildScriptTest.java"]
+        edits += [self.framework / name for name in FRAMEWORK_INPUTS]
+        for path in edits:
+            path.write_text(path.read_text() + " edited")
+            keys.add(self.cache().key(self.sample))
+        (self.sample / "verification" / "ExtraTest.java").write_text("class ExtraTest {}")
+        keys.add(self.cache().key(self.sample))
+        self.jdk.stop()
+        with mock.patch.object(verification_cache, "jdk_version", return_value="openjdk 21.0.1"):
+            keys.add(self.cache().key(self.sample))
+        self.jdk.start()
+        self.assertEqual(len(keys), len(edits) + 3)
+
+        # Files outside the verification inputs do not matter
+        key = self.cache().key(self.sample)
+        (self.sample / "task_description.md").write_text("# Edited task")
+        self.assertEqual(self.cache().key(self.sample), key)
+
+    def test_hit_and_miss(self):
+        cache = self.cache()
+        self.assertIsNone(cache.get(self.sample))
+        cache.put(self.sample, True, VERDICT)
+        self.assertEqual(self.cache().get(self.sample), (True, VERDICT))
+
+        # A failed verdict is cached too, even if the Gradle output contains "ERROR:" lines
+        (self.sample / "verification" / "BuildScriptTest.java").write_text("class BuildScriptTest { }")
+        self.assertIsNone(cache.get(self.sample))
+        cache.put(self.sample, False, REJECTED)
+        self.assertEqual(cache.get(self.sample), (False, REJECTED))
+
+    def test_errors_are_not_cached(self):
+        cache = self.cache()
+        for output in ("Sample: 1_abc\nERROR: Missing original build.gradle.kts",
+                       "Testing with Original (O) build script...\n"
+                       "ERROR: no test results for Original (O), Gradle failed before running tests\n"
+                       "\n--- Captured output (Original) ---\n\nCould not resolve org.junit.jupiter:junit-jupiter"):
+            cache.put(self.sample, False, output)
+            self.assertIsNone(cache.get(self.sample))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-poc", "runner"))
+
+from verification_policy import MODIFIED, ORIGINAL, VerificationPolicy
+
+class TestVerificationPolicy(unittest.TestCase):
+    def test_decisive_results_stop_the_run(self):
+        policy = VerificationPolicy()
+        self.assertEqual(policy.order(), [ORIGINAL, MODIFIED])
+        self.assertFalse(policy.record(ORIGINAL, True, 10))   # O passed: invalid
+        self.assertTrue(policy.record(ORIGINAL, False, 10))   # O failed: M decides
+        self.assertFalse(policy.record(MODIFIED, False, 10))  # M failed: invalid
+        self.assertTrue(VerificationPolicy(full=True).record(ORIGINAL, True, 10))
+
+    def test_more_decisive_variant_runs_first(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "policy.json")
+            policy = VerificationPolicy(path)
+            for _ in range(5):
+                policy.record(ORIGINAL, False, 20)
+                policy.record(MODIFIED, False, 20)
+            policy.save()
+            self.assertEqual(VerificationPolicy(path).order(), [MODIFIED, ORIGINAL])
+
+if __name__ == '__main__':
+    unittest.main()
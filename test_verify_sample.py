@@ -0,0 +1,111 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "swe-bench-poc", "runner"))
+
+import verify_sample
+from verify_sample import WorkspacePool, is_verdict
+
+REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuite name="BuildScriptTest" tests="1">
+  <testcase name="test" classname="BuildScriptTest" time="0.5">{failure}</testcase>
+</testsuite>
+"""
+
+
+class TestWorkspacePool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.framework = Path(self.tmp.name) / "framework"
+        (self.framework / "gradle" / "wrapper").mkdir(parents=True)
+        for name in ("build.gradle.kts", "settings.gradle.kts", "gradlew"):
+            (self.framework / name).write_text(f"{name} v1")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def replace(self, name, text):
+        # Like a git checkout: a new file (new inode) renamed over the old one
+        tmp = self.framework / f"{name}.new"
+        tmp.write_text(text)
+        os.replace(tmp, self.framework / name)
+
+    def test_slots_follow_replaced_framework_files(self):
+        workspaces = Path(self.tmp.name) / "workspaces"
+        WorkspacePool(self.framework, workspaces, slots=1, prewarm=False)
+        slot = workspaces / "slot_0"
+        self.assertTrue(os.path.samefile(slot / "build.gradle.kts", self.framework / "build.gradle.kts"))
+
+        # A later run reuses the slot directory
+        self.replace("build.gradle.kts", "build.gradle.kts v2")
+        pool = WorkspacePool(self.framework, workspaces, slots=1, prewarm=False)
+        self.assertEqual((slot / "build.gradle.kts").read_text(), "build.gradle.kts v2")
+
+        # ... and so does every sample of a long run
+        self.replace("gradlew", "gradlew v2")
+        with pool.acquire() as acquired:
+            self.assertEqual(acquired, slot)
+            self.assertEqual((slot / "gradlew").read_text(), "gradlew v2")
+            self.assertEqual((slot / "settings.gradle.kts").read_text(), "settings.gradle.kts v1")
+            self.assertTrue(os.path.samefile(slot / "gradle", self.framework / "gradle"))
+
+
+
+class TestVerdicts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.framework = root / "framework"
+        self.framework.mkdir()
+        (self.framework / "gradlew").write_text("")
+        self.sample = root / "1_abc"
+        for part in ("original", "modified", "verification"):
+            (self.sample / part).mkdir(parents=True)
+        (self.sample / "original" / "build.gradle.kts").write_text("version 1")
+        (self.sample / "modified" / "build.gradle.kts").write_text("version 2")
+        (self.sample / "verification" / "BuildScriptTest.java").write_text("public class BuildScriptTest {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def verify(self, outcomes):
+        """outcomes: variant -> (passed, JUnit failure or None for no report, Gradle output)"""
+        def run_tests(framework_dir, sample_name, variant, *args, **kwargs):
+            passed, failure, output = outcomes[variant]
+            if failure is not None:
+                results_dir = framework_dir / "build" / "test-results" / "test"
+                results_dir.mkdir(parents=True, exist_ok=True)
+                (results_dir / "TEST-BuildScriptTest.xml").write_text(REPORT.format(failure=failure))
+            return passed, output
+
+        with mock.patch.object(verify_sample, "_run_tests", run_tests):
+            return verify_sample.verify_sample(self.sample, self.framework, verbose=False)
+
+    def test_tests_that_ran_give_a_verdict(self):
+        success, output = self.verify({"O": (False, "<failure message='old version'/>", "BUILD FAILED"),
+                                       "M": (True, "", "BUILD SUCCESSFUL")})
+        self.assertTrue(success)
+        success, output = self.verify({"O": (True, "", "BUILD SUCCESSFUL"), "M": (True, "", "BUILD SUCCESSFUL")})
+        self.assertFalse(success)
+        self.assertTrue(is_verdict(success, output))
+
+    def test_broken_test_is_a_verdict(self):
+        javac = "/tmp/w/src/test/java/BuildScriptTest.java:3: error: cannot find symbol\nBUILD FAILED"
+        success, output = self.verify({"O": (False, None, javac), "M": (False, None, javac)})
+        self.assertFalse(success)
+        self.assertTrue(is_verdict(success, output))
+
+    def test_no_test_results_is_not_a_verdict(self):
+        resolution = "Could not resolve org.junit.jupiter:junit-jupiter:5.10.2\nBUILD FAILED"
+        success, output = self.verify({"O": (False, None, resolution), "M": (True, "", "BUILD SUCCESSFUL")})
+        self.assertFalse(success)
+        self.assertFalse(is_verdict(success, output))
+        self.assertIn("Original (O): NO RESULTS", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from catalog import PipelineCatalog
+from status_tracker import StatusTracker
+from webhook_receiver import PairSink, WebhookServer, signature
+
+SECRET = "s3cret"
+REPO = {"full_name": "octo/app"}
+
+
+def pull_request(action, sha, merged=False):
+    return {"action": action, "repository": REPO, "pull_request": {
+        "number": 7, "html_url": "https://github.com/octo/app/pull/7", "merged": merged, "head": {"sha": sha}}}
+
+
+def status(sha, state, context="ci/build"):
+    return {"repository": REPO, "sha": sha, "state": state, "context": context,
+            "commit": {"commit": {"message": f"commit {sha}\n\nbody"}}}
+
+
+def check_suite(sha, conclusion):
+    return {"action": "completed", "repository": REPO, "check_suite": {
+        "head_sha": sha, "conclusion": conclusion, "app": {"slug": "github-actions"},
+        "head_commit": {"message": f"commit {sha}"}}}
+
+
+class TestWebhookReceiver(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.catalog = PipelineCatalog(os.path.join(self.tmp.name, "catalog.db"))
+        self.tracker = StatusTracker(os.path.join(self.tmp.name, "status.db"))
+        self.sink = PairSink(self.catalog)
+        self.server = WebhookServer(("127.0.0.1", 0), self.tracker, self.sink, SECRET)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.sink.close()
+        self.tracker.close()
+        self.tmp.cleanup()
+
+    def post(self, event, payload, secret=SECRET):
+        body = json.dumps(payload).encode()
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{self.server.server_address[1]}/", data=body, method="POST",
+            headers={"X-GitHub-Event": event, "Content-Type": "application/json",
+                     "X-Hub-Signature-256": signature(secret, body)})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_merge_emits_pairs_into_catalog(self):
+        self.post("pull_request", pull_request("opened", "aaa"))
+        self.post("status", status("aaa", "failure"))
+        self.post("pull_request", pull_request("synchronize", "bbb"))
+        # Out of order: the suite finishes before the legacy status
+        self.post("check_suite", check_suite("bbb", "success"))
+        self.post("status", status("bbb", "pending"))
+        self.post("status", status("bbb", "success"))
+
+        code, body = self.post("pull_request", pull_request("closed", "bbb", merged=True))
+        self.assertEqual((code, body["pairs"], body["added"]), (202, 1, 1))
+        pairs = list(self.catalog.iter_pairs("octo/app"))
+        self.assertEqual([(p["bad_commit"], p["good_commit"], p["bad_msg"]) for p in pairs],
+                         [("aaa", "bbb", "commit aaa")])
+
+        # Redelivery emits nothing
+        self.assertEqual(self.post("pull_request", pull_request("closed", "bbb", merged=True))[1]["pairs"], 0)
+
+    def test_failing_context_blocks_success(self):
+        self.post("pull_request", pull_request("opened", "aaa"))
+        self.post("check_suite", check_suite("aaa", "timed_out"))
+        self.post("pull_request", pull_request("synchronize", "bbb"))
+        self.post("status", status("bbb", "success"))
+        self.post("check_suite", check_suite("bbb", "failure"))
+        self.assertEqual(self.post("pull_request", pull_request("closed", "bbb", merged=True))[1]["pairs"], 0)
+
+    def test_state_after_merge_emits_pair(self):
+        self.post("pull_request", pull_request("opened", "aaa"))
+        self.post("status", status("aaa", "failure"))
+        self.post("pull_request", pull_request("synchronize", "bbb"))
+        self.post("status", status("bbb", "pending"))
+        self.assertEqual(self.post("pull_request", pull_request("closed", "bbb", merged=True))[1]["pairs"], 0)
+
+        code, body = self.post("status", status("bbb", "success"))
+        self.assertEqual((code, body["pairs"], body["added"]), (202, 1, 1))
+        self.assertEqual([p["good_commit"] for p in self.catalog.iter_pairs("octo/app")], ["bbb"])
+
+        # Further states and redeliveries do not emit the pair again
+        self.assertEqual(self.post("check_suite", check_suite("bbb", "success"))[1]["pairs"], 0)
+        self.assertEqual(self.post("pull_request", pull_request("closed", "bbb", merged=True))[1]["pairs"], 0)
+
+    def test_rejects_malformed_payloads(self):
+        for event, payload in [
+            ("status", {"repository": REPO, "state": "success", "context": "ci"}),
+            ("pull_request", {"action": "opened", "repository": REPO, "pull_request": {"number": 7}}),
+            ("check_suite", {"action": "completed", "repository": REPO}),
+            ("status", ["not", "an", "object"]),
+        ]:
+            code, body = self.post(event, payload)
+            self.assertEqual(code, 400, payload)
+            self.assertIn("error", body)
+        self.assertEqual(self.tracker.commit_nodes("octo/app", 7), [])
+
+    def test_rejects_bad_signature(self):
+        code, _ = self.post("status", status("aaa", "failure"), secret="wrong")
+        self.assertEqual(code, 401)
+        self.assertEqual(self.tracker.commit_nodes("octo/app", 7), [])
+        self.assertEqual(self.post("ping", {"zen": "hi"})[0], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+"""
+Real-time pair ingestion from GitHub webhooks.
+
+A small HTTP server that receives `pull_request`, `status` and `check_suite`
+deliveries (configure the webhook with content type application/json and
+those events). Commit states are tracked per PR in a StatusTracker database;
+when a PR is merged its Bad -> Good pairs are emitted at once (or when a
+build that was still running at the merge reports its state) and handed to
+the heuristic analysis (analyze_pairs.py):
+
+- with --catalog, pairs go to the pipeline catalog and their changed files
+  and verdict are recorded as soon as they are classified
+- otherwise they are merged into results/<owner>_<name>/mining_results.json
+  and analyzed_results.json, the files run_pipeline.py writes
+
+Analysis runs in a background thread, so deliveries are acknowledged
+immediately. Only PRs whose pushes were seen by the receiver have a full
+commit history; for PRs that were already open, only the states seen since
+then count.
+
+    python webhook_receiver.py --port 8080 --secret $GITHUB_WEBHOOK_SECRET --catalog catalog.db
+
+Recorded payloads can be replayed against it locally:
+
+    curl -X POST localhost:8080 -H "X-GitHub-Event: status" -H "Content-Type: application/json" -d @status.json
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from analyze_pairs import PairAnalyzer
+from catalog import PipelineCatalog
+from mine_fixes import load_env
+from status_tracker import StatusTracker
+
+EVENTS = ("pull_request", "status", "check_suite")
+
+
+def signature(secret: str, body: bytes) -> str:
+    """Value of the X-Hub-Signature-256 header GitHub sends for `body`."""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def merge_results(path: str, pairs: List[Dict[str, Any]]) -> int:
+    """Adds pairs to a JSON results file, skipping good commits already in it."""
+    existing = []
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            existing = json.load(f)
+    known = {pair["good_commit"] for pair in existing}
+    new = [pair for pair in pairs if pair["good_commit"] not in known]
+    if new:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(existing + new, f, indent=2)
+    return len(new)
+
+
+class PairSink:
+    """Stores emitted pairs and classifies them in the background."""
+
+    def __init__(self, catalog: Optional[PipelineCatalog] = None, results_dir: str = "results",
+                 token: Optional[str] = None, workers: int = 2):
+        self.catalog = catalog
+        self.results_dir = results_dir
+        self.token = token
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def _output(self, repo: str, filename: str) -> str:
+        owner, name = repo.split("/", 1)
+        return os.path.join(self.results_dir, f"{owner}_{name}", filename)
+
+    def add(self, repo: str, pairs: List[Dict[str, Any]]) -> int:
+        """Stores the pairs and schedules their analysis; returns the number of new pairs."""
+        pairs = [{k: v for k, v in pair.items() if k != "repo"} for pair in pairs]
+        with self._lock:
+            if self.catalog is not None:
+                added = self.catalog.add_pairs(repo, pairs)
+            else:
+                added = merge_results(self._output(repo, "mining_results.json"), pairs)
+        if self.token and added:
+            self.executor.submit(self.analyze, repo, pairs)
+        return added
+
+    def analyze(self, repo: str, pairs: List[Dict[str, Any]]) -> None:
+        owner, name = repo.split("/", 1)
+        analyzer = PairAnalyzer(self.token, owner, name)
+        analyzed = []
+        for pair in pairs:
+            try:
+                result = analyzer.classify_pair(dict(pair))
+            except Exception as e:
+                print(f"[{repo}] Analysis failed for {pair['good_commit'][:7]}: {e}")
+                continue
+            analyzed.append(result)
+            if self.catalog is not None:
+                self.catalog.record_files(repo, result, result["files_changed"], result["category"])
+            print(f"[{repo}] Analyzed {result['good_commit'][:7]} -> {result['category']}")
+        if self.catalog is None and analyzed:
+            with self._lock:
+                merge_results(self._output(repo, "analyzed_results.json"), analyzed)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    # Set on the server by make_server()
+    server: "WebhookServer"
+
+    def _reply(self, code: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        secret = self.server.secret
+        if secret and not hmac.compare_digest(self.headers.get("X-Hub-Signature-256", ""), signature(secret, body)):
+            self._reply(401, {"error": "invalid signature"})
+            return
+
+        event = self.headers.get("X-GitHub-Event", "")
+        if event == "ping":
+            self._reply(200, {"ok": True})
+            return
+        if event not in EVENTS:
+            self._reply(202, {"ignored": event})
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._reply(400, {"error": "invalid JSON"})
+            return
+
+        try:
+            pairs = self.server.tracker.handle_event(event, payload)
+        except ValueError as e:
+            self._reply(400, {"error": str(e)})
+            return
+        added = 0
+        if pairs:
+            repo = pairs[0]["repo"]
+            added = self.server.sink.add(repo, pairs)
+            print(f"[{repo}] PR #{pairs[0]['pr_id']}: {len(pairs)} pair(s), {added} new")
+        self._reply(202, {"event": event, "pairs": len(pairs), "added": added})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, tracker: StatusTracker, sink: PairSink, secret: Optional[str] = None):
+        super().__init__(address, WebhookHandler)
+        self.tracker = tracker
+        self.sink = sink
+        self.secret = secret
+
+
+def main():
+    load_env()
+
+    parser = argparse.ArgumentParser(description="Receive GitHub webhooks and emit Bad -> Good pairs as PRs merge")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument("--secret", default=None,
+                        help="Webhook secret for signature checks (default: GITHUB_WEBHOOK_SECRET)")
+    parser.add_argument("--tracker-db", default="webhook_status.db", help="Per-PR commit status database")
+    parser.add_argument("--catalog", help="Pipeline catalog (SQLite) for the emitted pairs")
+    parser.add_argument("--results-dir", default="results",
+                        help="Per-repo JSON results without a catalog (default: results/<owner>_<name>)")
+    parser.add_argument("--no-analyze", action="store_true", help="Only store pairs, skip analyze_pairs.py")
+
+    args = parser.parse_args()
+
+    secret = args.secret or os.environ.get("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        print("Warning: No webhook secret set; deliveries are not authenticated.")
+    token = None if args.no_analyze else os.environ.get("GITHUB_TOKEN")
+    if not args.no_analyze and not token:
+        print("Warning: No GitHub token set (GITHUB_TOKEN); pairs are stored without analysis.")
+
+    catalog = PipelineCatalog(args.catalog) if args.catalog else None
+    sink = PairSink(catalog, args.results_dir, token)
+    server = WebhookServer((args.host, args.port), StatusTracker(args.tracker_db), sink, secret)
+    print(f"Listening for webhooks on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        server.server_close()
+        sink.close()
+
+if __name__ == "__main__":
+    main()